@@ -1,100 +1,349 @@
 # agent_core/agent_wrapper.py
 
+import os
 import re
-from langchain_core.messages import HumanMessage
-from typing import Dict, Any, Optional
+import time
+import uuid
+import hashlib
+import threading
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from typing import Dict, Any, Iterator, Optional
 
 # Import the compiled graph (the brain) from the same core directory
-from .state_and_graph import REACT_GRAPH
+from .state_and_graph import REACT_GRAPH, ASYNC_REACT_GRAPH, CHECKPOINTER, build_react_graph
+from .checkpointing import open_checkpointer
+from .prefetch import AGENT_PREFETCH, Prefetcher, detect_input_files
+from .guard import AGENT_GUARD, UNGUARDED_TOOL_ROUNDS, RunGuard, recursion_limit
+from .router import AGENT_ROUTER
+from .instrumentation import AGENT_VERBOSE, RunMetrics
+
+# AGENT_VERBOSE=0 silences the debug dumps on the hot path; AGENT_METRICS_PATH
+# appends per-run timing/token events as JSON lines.
+AGENT_METRICS_PATH = os.getenv("AGENT_METRICS_PATH")
+
+# Sentinel returned by BasicAgent._resume_input for threads that already finished
+_FINISHED = object()
+# Longest message content carried by a streamed event
+STREAM_CONTENT_CHARS = 2000
+
+
+def _message_event(message) -> Dict[str, Any]:
+    """JSON-ready summary of one graph message for streaming clients."""
+    content = str(message.content) if message.content is not None else ""
+    event: Dict[str, Any] = {"type": message.type, "content": content[:STREAM_CONTENT_CHARS]}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        event["tool_calls"] = [{"name": c["name"], "args": c.get("args", {})} for c in message.tool_calls]
+    if isinstance(message, ToolMessage):
+        event["tool"] = message.name
+    return event
+
 
 class BasicAgent:
     """
     Wrapper class that executes the LangGraph Agent and manages the final 
     response parsing, ensuring compatibility with the external evaluation framework.
+
+    With a checkpointer (`checkpoint_path` or AGENT_CHECKPOINT_PATH) every run
+    is stored under a thread id. Calling again with the same `thread_id`
+    resumes an interrupted run from its last completed node, and returns the
+    stored answer of a finished one.
+
+    One agent may serve several threads at once (batch and service modes):
+    `last_run_metrics` and `last_thread_id` refer to the calling thread's
+    last run.
     """
-    def __init__(self):
-        print("BasicAgent initialized. LangGraph Agent ready.")
+    def __init__(self, verbose: Optional[bool] = None, metrics_path: Optional[str] = None,
+                 checkpoint_path: Optional[str] = None, thread_id: Optional[str] = None,
+                 prefetch: Optional[bool] = None, guard: Optional[bool] = None, router: Optional[bool] = None):
+        self.verbose = AGENT_VERBOSE if verbose is None else verbose
+        self.prefetch = AGENT_PREFETCH if prefetch is None else prefetch
+        self.guard = AGENT_GUARD if guard is None else guard
+        self.router = AGENT_ROUTER if router is None else router
+        self.metrics_path = metrics_path or AGENT_METRICS_PATH
+        self.thread_id = thread_id
+        self._last = threading.local()
         # Load the pre-compiled graph (the brain)
-        self.agent_graph = REACT_GRAPH
+        if checkpoint_path:
+            self.checkpointer = open_checkpointer(checkpoint_path)
+            self.agent_graph = build_react_graph(checkpointer=self.checkpointer)
+            self.async_agent_graph = build_react_graph(async_mode=True, checkpointer=self.checkpointer)
+        else:
+            self.checkpointer = CHECKPOINTER
+            self.agent_graph = REACT_GRAPH
+            self.async_agent_graph = ASYNC_REACT_GRAPH
+        self._log("BasicAgent initialized. LangGraph Agent ready.")
+
+    @property
+    def last_run_metrics(self) -> Optional[RunMetrics]:
+        return getattr(self._last, "run_metrics", None)
+
+    @property
+    def last_thread_id(self) -> Optional[str]:
+        return getattr(self._last, "thread_id", None)
 
-    def __call__(self, question: str) -> str:
+    def __call__(self, question: str, thread_id: Optional[str] = None) -> str:
         """
         Executes the agent with a question and extracts the final, formatted answer.
         This method is the entry point used by the evaluation script.
         """
-        print(f"\n--- Agent Execution Started for: {question[:80]}...")
+        initial_state = self._prepare_state(question)
+        metrics = RunMetrics(run_label=question[:80])
+        config = self._run_config(metrics, question, thread_id)
+        
+        try:
+            graph_input = initial_state
+            if self.checkpointer is not None:
+                snapshot = self.agent_graph.get_state(config)
+                graph_input = self._resume_input(snapshot, initial_state, metrics)
+                if graph_input is _FINISHED:
+                    return self._parse_final_state(snapshot.values)
+
+            if graph_input is initial_state:
+                self._start_prefetch(initial_state, config, metrics)
+
+            # Invoke the graph to run the ReAct cycle
+            final_state = self.agent_graph.invoke(graph_input, config=config)
+            self._annotate_run(metrics, final_state)
+            return self._parse_final_state(final_state)
+            
+        except Exception as e:
+            error_msg = f"LangGraph Execution Error: {e}"
+            print(f"❌ {error_msg}")
+            return f"AGENT ERROR: {error_msg}"
+
+        finally:
+            self._finish_metrics(metrics, config)
+
+    async def acall(self, question: str, thread_id: Optional[str] = None) -> str:
+        """
+        Awaitable counterpart of `__call__`. Runs the async graph, where the
+        model may request several tools per turn and they execute concurrently.
+        """
+        initial_state = self._prepare_state(question)
+        metrics = RunMetrics(run_label=question[:80])
+        config = self._run_config(metrics, question, thread_id)
+        
+        try:
+            graph_input = initial_state
+            if self.checkpointer is not None:
+                snapshot = await self.async_agent_graph.aget_state(config)
+                graph_input = self._resume_input(snapshot, initial_state, metrics)
+                if graph_input is _FINISHED:
+                    return self._parse_final_state(snapshot.values)
+
+            if graph_input is initial_state:
+                self._start_prefetch(initial_state, config, metrics)
+
+            final_state = await self.async_agent_graph.ainvoke(graph_input, config=config)
+            self._annotate_run(metrics, final_state)
+            return self._parse_final_state(final_state)
+            
+        except Exception as e:
+            error_msg = f"LangGraph Execution Error: {e}"
+            print(f"❌ {error_msg}")
+            return f"AGENT ERROR: {error_msg}"
+
+        finally:
+            self._finish_metrics(metrics, config)
+
+    def stream(self, question: str, thread_id: Optional[str] = None,
+               deadline: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Runs the agent and yields JSON-ready events as the graph progresses:
+        one {"event": "node"} per completed node with the messages it added,
+        then {"event": "final"} with the parsed answer and the run summary.
+
+        `deadline` (time.monotonic()) is checked between graph steps; once it
+        passes the run stops with a {"event": "timeout"} event. With a
+        checkpointer the interrupted thread can be resumed later.
+        """
+        initial_state = self._prepare_state(question)
+        metrics = RunMetrics(run_label=question[:80])
+        config = self._run_config(metrics, question, thread_id)
+        final_event: Dict[str, Any] = {}
+
+        try:
+            graph_input = initial_state
+            if self.checkpointer is not None:
+                snapshot = self.agent_graph.get_state(config)
+                graph_input = self._resume_input(snapshot, initial_state, metrics)
+                if graph_input is _FINISHED:
+                    final_event = {"event": "final", "answer": self._parse_final_state(snapshot.values)}
+                    return
+
+            if graph_input is initial_state:
+                self._start_prefetch(initial_state, config, metrics)
+
+            final_state = None
+            for mode, chunk in self.agent_graph.stream(graph_input, config=config, stream_mode=["updates", "values"]):
+                if mode == "values":
+                    final_state = chunk
+                    continue
+                for node, update in chunk.items():
+                    messages = update.get("messages") or [] if isinstance(update, dict) else []
+                    messages = messages if isinstance(messages, list) else [messages]
+                    yield {"event": "node", "node": node, "messages": [_message_event(m) for m in messages]}
+                if deadline is not None and time.monotonic() > deadline:
+                    metrics.annotate(timed_out=True)
+                    final_event = {"event": "timeout", "error": "Run stopped at its deadline."}
+                    return
+
+            self._annotate_run(metrics, final_state)
+            final_event = {"event": "final", "answer": self._parse_final_state(final_state)}
+
+        except Exception as e:
+            error_msg = f"LangGraph Execution Error: {e}"
+            print(f"❌ {error_msg}")
+            final_event = {"event": "error", "error": error_msg}
+
+        finally:
+            self._finish_metrics(metrics, config)
+            if final_event:
+                # Not emitted when the consumer closed the stream early
+                yield {**final_event, "thread_id": metrics.annotations.get("thread_id"), "metrics": metrics.summary()}
+
+    def _run_config(self, metrics: RunMetrics, question: str, thread_id: Optional[str]) -> Dict[str, Any]:
+        """Graph config for one run; with a checkpointer it names the thread the run is stored under."""
+        config: Dict[str, Any] = {"callbacks": [metrics], "configurable": {"router": self.router, "verbose": self.verbose}}
+        if self.guard:
+            run_guard = RunGuard(metrics=metrics, verbose=self.verbose)
+            config["configurable"]["guard"] = run_guard
+            config["recursion_limit"] = recursion_limit(run_guard.max_steps)
+        else:
+            # The compact step makes each tool round three supersteps instead of two
+            config["recursion_limit"] = recursion_limit(UNGUARDED_TOOL_ROUNDS)
+        if self.checkpointer is None:
+            return config
+        thread_id = thread_id or self.thread_id or uuid.uuid4().hex
+        # A thread belongs to one question: reusing the id for another one starts a separate thread
+        stored = self.agent_graph.get_state({"configurable": {"thread_id": thread_id}}).values.get("messages")
+        if stored and str(stored[0].content) != question:
+            thread_id = f"{thread_id}:{hashlib.sha1(question.encode('utf-8')).hexdigest()[:12]}"
+        self._last.thread_id = thread_id
+        metrics.annotate(thread_id=thread_id)
+        config["configurable"]["thread_id"] = thread_id
+        return config
+
+    def _start_prefetch(self, initial_state: Dict[str, Any], config: Dict[str, Any], metrics: RunMetrics) -> None:
+        """Speculative mode: starts the likely tool for each input file before the first LLM turn."""
+        if not self.prefetch or not initial_state["input_files"]:
+            return
+        prefetcher = Prefetcher(initial_state["input_files"], callbacks=[metrics], verbose=self.verbose)
+        config["configurable"]["prefetch"] = prefetcher
+
+    def _resume_input(self, snapshot, initial_state: Dict[str, Any], metrics: RunMetrics):
+        """
+        Chooses how to drive the graph for a checkpointed thread: the initial
+        state for a new thread, None to continue an interrupted one, or
+        _FINISHED when the thread already holds a final answer.
+        """
+        if not snapshot.values.get("messages"):
+            return initial_state
+        if snapshot.next:
+            self._log(f"⏯️ Resuming thread {metrics.annotations.get('thread_id')} at node(s) {list(snapshot.next)}.")
+            metrics.annotate(resumed=True)
+            return None
+        self._log(f"♻️ Thread {metrics.annotations.get('thread_id')} already finished; returning its stored answer.")
+        metrics.annotate(resumed=True)
+        return _FINISHED
+
+    @staticmethod
+    def _annotate_run(metrics: RunMetrics, final_state: Dict[str, Any]) -> None:
+        """Adds the run's compaction savings and route (reported per route by METRICS) to its summary."""
+        metrics.annotate(compaction_tokens_saved=final_state.get("compaction_tokens_saved", 0))
+        if final_state.get("route"):
+            route = "escalated" if final_state.get("route_escalated") else final_state["route"]
+            metrics.annotate(route=route, route_tools=final_state.get("route_tools") or [])
+
+    def _log(self, message: str) -> None:
+        """Prints debug output only when the agent is verbose."""
+        if self.verbose:
+            print(message)
+
+    def _finish_metrics(self, metrics: RunMetrics, config: Optional[Dict[str, Any]] = None) -> None:
+        """Closes the run's metrics and exports them."""
+        configurable = (config or {}).get("configurable") or {}
+        for helper in (configurable.get("prefetch"), configurable.get("guard")):
+            if helper is not None:
+                metrics.annotate(**helper.close())
+        thread_id = metrics.annotations.get("thread_id")
+        if self.checkpointer is not None and thread_id:
+            metrics.annotate(**self.checkpointer.write_stats(thread_id))
+        metrics.close()
+        self._last.run_metrics = metrics
+        if self.metrics_path:
+            try:
+                metrics.to_jsonl(self.metrics_path)
+            except OSError as e:
+                print(f"⚠️ Could not write metrics to {self.metrics_path}: {e}")
+        self._log(f"📊 Run metrics: {metrics.summary()}")
+
+    def _prepare_state(self, question: str) -> Dict[str, Any]:
+        """Detects the input file and builds the initial graph state."""
+        self._log(f"\n--- Agent Execution Started for: {question[:80]}...")
         
         # 1. File Path Detection
-        # Detects if the question contains a local file path (e.g., /tmp/file.png)
-        input_file: Optional[str] = None
-        if "/" in question and "." in question:
-            words = question.split()
-            for word in words:
-                if word.endswith(('.png', '.jpg', '.jpeg', '.webp', '.txt', '.pdf', '.xlsx', '.csv', '.json', '.html', '.mp3', '.wav', '.xls')):
-                    input_file = word.strip().strip('"').strip("'")
-                    print(f"📦 Found input file path: {input_file}")
-                    break
+        # Detects every local file path in the question (e.g., /tmp/file.png); the first is the input_file
+        input_files = detect_input_files(question)
+        input_file: Optional[str] = input_files[0] if input_files else None
+        for path in input_files:
+            self._log(f"📦 Found input file path: {path}")
         
-        # 2. Prepare Initial State and Execute LangGraph
+        # 2. Prepare Initial State
         messages = [HumanMessage(content=question)]
-        initial_state = {"messages": messages, "input_file": input_file}
-        
+        return {"messages": messages, "input_file": input_file, "input_files": input_files, "guard_stop": None,
+                "route": None, "route_tools": [], "route_escalated": False}
+
+    def _parse_final_state(self, final_state: Dict[str, Any]) -> str:
+        """Extracts and cleans the FINAL ANSWER from the last message of a run."""
         final_answer = "ERROR: No FINAL ANSWER found."
-        
-        try:
-            # Invoke the graph to run the ReAct cycle
-            final_state = self.agent_graph.invoke(initial_state)
 
+        if self.verbose:
             print("\n******----> DEBUG: FULL MESSAGE HISTORY START ---")
             for message in final_state['messages']:
                 print("/////////////// Message ---")
                 print(message)
             print("******----> DEBUG: FULL MESSAGE HISTORY END ---\n")
+        
+        # 3. CRITICAL: Extract and Parse the FINAL ANSWER
+        final_message = final_state['messages'][-1]
+        
+        # Ensure we get the string content
+        full_llm_output = str(final_message.content) if final_message.content is not None else ""
+
+        self._log(f"******* ----> DEBUG Full LLM Output:\n{full_llm_output}\n")
+        
+        search_string = "FINAL ANSWER:"
+        
+        # Search robustly for the format
+        normalized_output = full_llm_output.upper()
+        
+        if search_string in normalized_output:
+            start_index = normalized_output.find(search_string)
+            # Extract the raw answer from the ORIGINAL text
+            raw_answer = full_llm_output[start_index + len(search_string):].strip()
             
-            # 3. CRITICAL: Extract and Parse the FINAL ANSWER
-            final_message = final_state['messages'][-1]
+            # --- Robust Anti-Metadata Logic ---
+            final_answer = raw_answer
+            lower_raw = raw_answer.lower()
+            end_of_answer = len(raw_answer)
             
-            # Ensure we get the string content
-            full_llm_output = str(final_message.content) if final_message.content is not None else ""
-
-            print(f"******* ----> DEBUG Full LLM Output:\n{full_llm_output}\n")
+            # Common separators that the LLM might append from search results or tool calls
+            separators = [", 'extras'", ", extras", ", 'signature'", ", signature", ', {', 'tool_output', '", ']
             
-            search_string = "FINAL ANSWER:"
+            # Find the earliest separator to truncate the answer
+            for sep in separators:
+                idx = lower_raw.find(sep)
+                if idx != -1:
+                    end_of_answer = min(end_of_answer, idx)
             
-            # Search robustly for the format
-            normalized_output = full_llm_output.upper()
+            # Truncate and clean the final string
+            final_answer = raw_answer[:end_of_answer].strip()
+            final_answer = final_answer.strip('[]').strip('"').strip("'").strip('`').strip()
             
-            if search_string in normalized_output:
-                start_index = normalized_output.find(search_string)
-                # Extract the raw answer from the ORIGINAL text
-                raw_answer = full_llm_output[start_index + len(search_string):].strip()
-                
-                # --- Robust Anti-Metadata Logic ---
-                final_answer = raw_answer
-                lower_raw = raw_answer.lower()
-                end_of_answer = len(raw_answer)
-                
-                # Common separators that the LLM might append from search results or tool calls
-                separators = [", 'extras'", ", extras", ", 'signature'", ", signature", ', {', 'tool_output', '", ']
-                
-                # Find the earliest separator to truncate the answer
-                for sep in separators:
-                    idx = lower_raw.find(sep)
-                    if idx != -1:
-                        end_of_answer = min(end_of_answer, idx)
-                
-                # Truncate and clean the final string
-                final_answer = raw_answer[:end_of_answer].strip()
-                final_answer = final_answer.strip('[]').strip('"').strip("'").strip('`').strip()
-                
-            else:
-                print(f"🚨 Format Error: LLM did not use the template {search_string}.")
-                final_answer = full_llm_output 
-                
-            print(f"🎉 Agent returning final answer (parsed): {final_answer[:50]}...")
-            return final_answer
+        else:
+            self._log(f"🚨 Format Error: LLM did not use the template {search_string}.")
+            final_answer = full_llm_output 
             
-        except Exception as e:
-            error_msg = f"LangGraph Execution Error: {e}"
-            print(f"❌ {error_msg}")
-            return f"AGENT ERROR: {error_msg}"
\ No newline at end of file
+        self._log(f"🎉 Agent returning final answer (parsed): {final_answer[:50]}...")
+        return final_answer
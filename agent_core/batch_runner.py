@@ -0,0 +1,155 @@
+# agent_core/batch_runner.py
+
+import os
+import json
+import math
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Set, Tuple
+
+ID_FIELDS = ("task_id", "question_id", "request_id", "id")
+QUESTION_FIELDS = ("question", "prompt", "body", "title")
+
+
+# --- 1. Input streaming ---
+def iter_questions(input_path: str, question_field: Optional[str] = None) -> Iterator[Tuple[str, str, dict]]:
+    """
+    Yields (question_id, question, record) from a JSONL file one line at a
+    time, so arbitrarily large question sets are never loaded at once.
+    """
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            fields = (question_field,) if question_field else QUESTION_FIELDS
+            question = next((str(record[k]) for k in fields if record.get(k)), None)
+            if question is None:
+                print(f"⚠️ Line {line_no}: no question field found, skipping.")
+                continue
+            question_id = next((str(record[k]) for k in ID_FIELDS if record.get(k) is not None), str(line_no))
+            yield question_id, question, record
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Task ids already answered without error in an existing output file."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue   # partially written last line of an interrupted batch
+            if not record.get("error"):
+                done.add(str(record.get("task_id")))
+    return done
+
+
+# --- 2. Statistics ---
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+@dataclass
+class BatchReport:
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    wall_time_s: float = 0.0
+    latencies_s: List[float] = field(default_factory=list)
+
+    @property
+    def throughput_qpm(self) -> float:
+        return 60.0 * (self.completed + self.failed) / self.wall_time_s if self.wall_time_s else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "wall_time_s": round(self.wall_time_s, 2),
+            "throughput_qpm": round(self.throughput_qpm, 2),
+            "latency_p50_s": round(percentile(self.latencies_s, 50), 2),
+            "latency_p95_s": round(percentile(self.latencies_s, 95), 2),
+        }
+
+
+# --- 3. Runner ---
+def run_batch(agent: Callable[[str], str], input_path: str, output_path: str, concurrency: int = 4,
+              question_field: Optional[str] = None, resume: bool = False) -> BatchReport:
+    """
+    Runs `agent` over every question in `input_path` with at most
+    `concurrency` questions in flight, appending one JSON line per answer
+    to `output_path` as soon as it is ready.
+
+    With `resume=True`, questions already answered in `output_path` are
+    skipped and the others run with `thread_id=<task id>`, so a checkpointing
+    agent continues interrupted questions from their last completed node.
+    """
+    report = BatchReport()
+    done_ids = completed_ids(output_path) if resume else set()
+    if resume and os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            # An interrupted write may have left a partial line: start on a new one
+            if f.read(1) != b"\n":
+                with open(output_path, "a", encoding="utf-8") as out:
+                    out.write("\n")
+    write_lock = threading.Lock()
+    # Bounds the number of submitted-but-unfinished questions (backpressure on the reader)
+    slots = threading.BoundedSemaphore(max(1, concurrency))
+
+    with open(output_path, "a", encoding="utf-8") as out:
+
+        def solve(question_id: str, question: str) -> None:
+            start = time.perf_counter()
+            error = None
+            try:
+                answer = agent(question, thread_id=question_id) if resume else agent(question)
+                if answer.startswith("AGENT ERROR:"):
+                    error = answer
+            except Exception as e:
+                answer, error = "", str(e)
+            latency = time.perf_counter() - start
+
+            with write_lock:
+                out.write(json.dumps({
+                    "task_id": question_id,
+                    "question": question,
+                    "submitted_answer": answer,
+                    "latency_s": round(latency, 3),
+                    "error": error,
+                }, ensure_ascii=False) + "\n")
+                out.flush()
+                report.latencies_s.append(latency)
+                if error:
+                    report.failed += 1
+                else:
+                    report.completed += 1
+                done = report.completed + report.failed
+                print(f"📝 [{done}] {question_id} answered in {latency:.1f}s")
+
+        def release(_future) -> None:
+            slots.release()
+
+        batch_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for question_id, question, _ in iter_questions(input_path, question_field):
+                if question_id in done_ids:
+                    report.skipped += 1
+                    continue
+                slots.acquire()
+                pool.submit(solve, question_id, question).add_done_callback(release)
+        report.wall_time_s = time.perf_counter() - batch_start
+
+    return report
@@ -0,0 +1,121 @@
+# agent_core/checkpointing.py
+
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional, Sequence
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+# Empty (default) disables checkpointing; set e.g. .cache/checkpoints.sqlite
+# to make interrupted runs resumable.
+AGENT_CHECKPOINT_PATH = os.getenv("AGENT_CHECKPOINT_PATH", "")
+
+
+def _thread_id(config) -> str:
+    return str(((config or {}).get("configurable") or {}).get("thread_id", ""))
+
+
+class TimedCheckpointSaver(BaseCheckpointSaver):
+    """
+    Wraps a synchronous checkpoint saver (SqliteSaver) to:
+      * time every checkpoint write, per thread, so the overhead per graph
+        step can be reported with the run's metrics;
+      * serve the async graph by running the sync saver in a worker thread
+        (SqliteSaver itself has no async implementation).
+    """
+    def __init__(self, inner: BaseCheckpointSaver):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self._lock = threading.Lock()
+        self._writes = defaultdict(lambda: [0, 0.0])   # thread_id -> [count, seconds]
+
+    def _timed(self, config, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self._writes[_thread_id(config)]
+                entry[0] += 1
+                entry[1] += elapsed
+
+    def write_stats(self, thread_id: str, reset: bool = True) -> dict:
+        """Number of checkpoint writes and time spent writing for one thread."""
+        with self._lock:
+            count, seconds = self._writes.pop(thread_id, [0, 0.0]) if reset else self._writes.get(thread_id, [0, 0.0])
+        return {
+            "checkpoint_writes": count,
+            "checkpoint_write_s": round(seconds, 6),
+            "checkpoint_ms_per_write": round(1000 * seconds / count, 3) if count else 0.0,
+        }
+
+    # --- Sync API (delegated) ---
+    @property
+    def config_specs(self) -> list:
+        return self.inner.config_specs
+
+    def get_tuple(self, config):
+        return self.inner.get_tuple(config)
+
+    def list(self, config, *, filter=None, before=None, limit=None) -> Iterator:
+        return self.inner.list(config, filter=filter, before=before, limit=limit)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        return self._timed(config, self.inner.put, config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes: Sequence[tuple], task_id: str, task_path: str = "") -> None:
+        return self._timed(config, self.inner.put_writes, config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        return self.inner.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    # --- Async API (sync saver in a worker thread) ---
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes: Sequence[tuple], task_id: str, task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_SAVERS = {}
+_SAVERS_LOCK = threading.Lock()
+
+
+def open_checkpointer(path: str = AGENT_CHECKPOINT_PATH) -> Optional[TimedCheckpointSaver]:
+    """
+    Returns the shared SQLite checkpointer for `path` (one per file per
+    process), or None when `path` is empty.
+    """
+    if not path:
+        return None
+    with _SAVERS_LOCK:
+        saver = _SAVERS.get(path)
+        if saver is None:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            # WAL + NORMAL sync: commits skip the fsync, so a step costs one append to the log
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            saver = _SAVERS[path] = TimedCheckpointSaver(SqliteSaver(conn))
+        return saver
@@ -0,0 +1,108 @@
+# agent_core/compaction.py
+
+import os
+from typing import Callable, List, Optional, Tuple
+
+from langchain_core.messages import AnyMessage, HumanMessage, ToolMessage
+
+from .instrumentation import run_log
+
+# truncate: keep the head and tail of old observations
+# summarize: replace old observations with a short LLM summary
+# off: keep the full history (previous behaviour)
+COMPACTION_MODE = os.getenv("COMPACTION_MODE", "truncate").lower()
+COMPACTION_TOKEN_BUDGET = int(os.getenv("COMPACTION_TOKEN_BUDGET", "12000"))
+COMPACTION_KEEP_RECENT = int(os.getenv("COMPACTION_KEEP_RECENT", "2"))
+COMPACTION_HEAD_CHARS = 1200
+COMPACTION_TAIL_CHARS = 300
+COMPACTED_MARKER = "[compacted]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English/Spanish text)."""
+    return len(text) // 4
+
+
+def history_tokens(messages: List[AnyMessage]) -> int:
+    return sum(estimate_tokens(str(m.content)) for m in messages)
+
+
+def truncate_observation(content: str) -> str:
+    """Keeps the beginning and end of a long observation."""
+    if len(content) <= COMPACTION_HEAD_CHARS + COMPACTION_TAIL_CHARS:
+        return content
+    omitted = len(content) - COMPACTION_HEAD_CHARS - COMPACTION_TAIL_CHARS
+    return (f"{COMPACTED_MARKER} {content[:COMPACTION_HEAD_CHARS]}\n"
+            f"... [{omitted} characters omitted to save context] ...\n"
+            f"{content[-COMPACTION_TAIL_CHARS:]}")
+
+
+def summarize_observation(content: str, question: str, llm) -> str:
+    """Asks the model for a short, question-focused summary of an observation."""
+    prompt = (
+        "Summarize the following tool output in at most 120 words. Keep every number, "
+        f"name and date that could help answer this question: {question}\n\n{content}"
+    )
+    summary = llm.invoke([HumanMessage(content=prompt)]).content
+    return f"{COMPACTED_MARKER} Summary of earlier observation: {str(summary).strip()}"
+
+
+def compact_messages(messages: List[AnyMessage], budget: int = COMPACTION_TOKEN_BUDGET,
+                     keep_recent: int = COMPACTION_KEEP_RECENT, mode: str = COMPACTION_MODE,
+                     summarizer_llm=None, log: Callable[[str], None] = print) -> Tuple[List[ToolMessage], int]:
+    """
+    Shrinks old tool observations, oldest first, until the history fits in
+    `budget` tokens. The `keep_recent` latest observations are never touched.
+    Warnings go to `log`.
+
+    Returns the replacement ToolMessages (same ids, so `add_messages` swaps
+    them in place) and the number of tokens saved.
+    """
+    total = history_tokens(messages)
+    if mode == "off" or total <= budget:
+        return [], 0
+
+    question = next((str(m.content) for m in messages if isinstance(m, HumanMessage)), "")
+    observations = [m for m in messages if isinstance(m, ToolMessage)]
+    candidates = observations[:-keep_recent] if keep_recent > 0 else observations
+
+    replacements, saved = [], 0
+    for message in candidates:
+        if total - saved <= budget:
+            break
+        content = str(message.content)
+        if content.startswith(COMPACTED_MARKER):
+            continue
+        if mode == "summarize" and summarizer_llm is not None:
+            try:
+                new_content = summarize_observation(content, question, summarizer_llm)
+            except Exception as e:
+                log(f"⚠️ Observation summary failed, truncating instead: {e}")
+                new_content = truncate_observation(content)
+        else:
+            new_content = truncate_observation(content)
+        gain = estimate_tokens(content) - estimate_tokens(new_content)
+        if gain <= 0:
+            continue
+        replacements.append(message.model_copy(update={"content": new_content}))
+        saved += gain
+    return replacements, saved
+
+
+def make_compaction_node(summarizer_llm: Optional[Callable] = None):
+    """
+    Builds the graph node that runs between `tools` and `assistant`.
+    `summarizer_llm` is a zero-argument callable returning the model used in
+    summarize mode (resolved lazily so the client is only built when needed).
+    """
+    def compact(state, config) -> dict:
+        replacements, saved = compact_messages(
+            state["messages"],
+            summarizer_llm=summarizer_llm() if (summarizer_llm and COMPACTION_MODE == "summarize") else None,
+            log=lambda message: run_log(config, message),
+        )
+        if not replacements:
+            return {}
+        run_log(config, f"🗜️ Compacted {len(replacements)} old observation(s), ~{saved} tokens saved.")
+        return {"messages": replacements, "compaction_tokens_saved": saved}
+    return compact
@@ -0,0 +1,192 @@
+# agent_core/guard.py
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from tools.result_cache import is_error_result
+from .compaction import COMPACTED_MARKER, estimate_tokens, history_tokens
+from .instrumentation import AGENT_VERBOSE
+from .prefetch import call_key
+
+# Guard around the tools node: repeated identical calls are answered from the
+# run's memo, repetitive cycles and exhausted budgets force the final answer.
+AGENT_GUARD = os.getenv("AGENT_GUARD", "1").lower() not in ("0", "false", "no")
+GUARD_MAX_STEPS = int(os.getenv("GUARD_MAX_STEPS", "8"))           # tool rounds per run
+GUARD_MAX_SECONDS = float(os.getenv("GUARD_MAX_SECONDS", "240"))
+GUARD_MAX_TOKENS = int(os.getenv("GUARD_MAX_TOKENS", "200000"))    # LLM input + output tokens per run
+# A turn (or a sequence of turns) repeated this many times in a row is a cycle
+GUARD_CYCLE_REPEATS = int(os.getenv("GUARD_CYCLE_REPEATS", "3"))
+# Tool rounds allowed without the guard: what LangGraph's default limit (25)
+# gave the original assistant -> tools loop
+UNGUARDED_TOOL_ROUNDS = 12
+
+GUARD_FINAL_PROMPT = (
+    "Stop using tools: {reason}. Using only the observations above, give your reasoning "
+    "and your best answer now, ending with the required FINAL ANSWER template."
+)
+REPEATED_CALL_NOTE = (
+    "[Repeated call] {name} was already called with these exact arguments and its result, "
+    "shown in an earlier observation, has not changed. Use it, or call the tool with different arguments."
+)
+
+
+def recursion_limit(max_steps: int = GUARD_MAX_STEPS) -> int:
+    """Graph recursion limit that lets the step budget, not LangGraph, end a long run."""
+    # Each tool round is assistant -> tools -> compact, plus the forced final turn,
+    # the router and a possible escalate -> assistant hand-over
+    return 3 * max_steps + 8
+
+
+# --- 1. Per-run guard ---
+class RunGuard:
+    """
+    Per-run memo of tool results and budget tracker, handed to the tools node
+    through config["configurable"]["guard"].
+    """
+    def __init__(self, max_steps: int = GUARD_MAX_STEPS, max_seconds: float = GUARD_MAX_SECONDS,
+                 max_tokens: int = GUARD_MAX_TOKENS, cycle_repeats: int = GUARD_CYCLE_REPEATS, metrics=None,
+                 verbose: bool = AGENT_VERBOSE):
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+        self.cycle_repeats = max(2, cycle_repeats)
+        self.metrics = metrics
+        self.verbose = verbose
+        self.started = time.monotonic()
+        self.memo: Dict[str, tuple] = {}         # call key -> (content, tool_call_id)
+        self.turns: List[tuple] = []             # call keys requested per tool round
+        self.steps = 0
+        self.memo_hits = 0
+        self.tokens_saved = 0
+        self.steps_saved = 0
+        self.stop_reason: Optional[str] = None
+
+    def tokens_used(self) -> int:
+        """LLM tokens spent so far in the run, from the run's metrics."""
+        if self.metrics is None:
+            return 0
+        return sum(e.get("input_tokens", 0) + e.get("output_tokens", 0)
+                   for e in list(self.metrics.events) if e["type"] == "llm")
+
+    def in_cycle(self) -> bool:
+        """True when the latest 1-3 turns were repeated `cycle_repeats` times in a row."""
+        for period in (1, 2, 3):
+            window = period * self.cycle_repeats
+            if len(self.turns) >= window:
+                tail = self.turns[-window:]
+                if all(tail[i] == tail[i % period] for i in range(window)):
+                    return True
+        return False
+
+    def check(self, history_size: int) -> Optional[str]:
+        """Reason to stop calling tools after this round, if any."""
+        if self.in_cycle():
+            reason = "the same tool calls keep repeating without new information"
+            # Rounds the loop would have run until the step budget, each costing about
+            # the tokens of an average round so far (or at least resending the history)
+            self.steps_saved = max(0, self.max_steps - self.steps)
+            per_round = max(history_size, self.tokens_used() // max(1, self.steps))
+            self.tokens_saved += self.steps_saved * per_round
+        elif self.steps >= self.max_steps:
+            reason = f"the budget of {self.max_steps} tool rounds is used up"
+        elif time.monotonic() - self.started > self.max_seconds:
+            reason = f"the time budget of {self.max_seconds:.0f}s is used up"
+        elif self.max_tokens and self.tokens_used() > self.max_tokens:
+            reason = f"the budget of {self.max_tokens} tokens is used up"
+        else:
+            return None
+        self.stop_reason = reason
+        if self.verbose:
+            print(f"🛑 Guard: {reason}; forcing the final answer.")
+        return reason
+
+    def close(self) -> dict:
+        return {"guard_steps": self.steps, "guard_memo_hits": self.memo_hits,
+                "guard_tokens_saved": self.tokens_saved, "guard_steps_saved": self.steps_saved,
+                "guard_stop": self.stop_reason or ""}
+
+
+def _observation_intact(messages, tool_call_id: str) -> bool:
+    """True if the earlier observation is still in the history and was not compacted."""
+    for m in reversed(messages):
+        if isinstance(m, ToolMessage) and m.tool_call_id == tool_call_id:
+            return not str(m.content).startswith(COMPACTED_MARKER)
+    return False
+
+
+def _split(guard: RunGuard, state, message: AIMessage):
+    """Memo hits for the calls already made in this run, and the calls still to run."""
+    memo_hits, remaining, keys = {}, [], {}
+    for call in message.tool_calls:
+        key = keys[call["id"]] = call_key(call["name"], call.get("args") or {})
+        hit = guard.memo.get(key)
+        if hit is None:
+            remaining.append(call)
+            continue
+        content, first_id = hit
+        if _observation_intact(state["messages"], first_id):
+            note = REPEATED_CALL_NOTE.format(name=call["name"])
+            guard.tokens_saved += max(0, estimate_tokens(content) - estimate_tokens(note))
+            content = note
+        guard.memo_hits += 1
+        memo_hits[call["id"]] = ToolMessage(content=content, name=call["name"], tool_call_id=call["id"])
+    guard.turns.append(tuple(sorted(keys.values())))
+    guard.steps += 1
+    return memo_hits, remaining, keys
+
+
+def _finish(guard: RunGuard, state, message: AIMessage, memo_hits: dict, ran: List[Any], keys: dict) -> dict:
+    """Records new results in the memo, orders the observations and applies the budgets."""
+    by_id = dict(memo_hits)
+    for m in ran:
+        if not isinstance(m, ToolMessage):
+            continue
+        by_id[m.tool_call_id] = m
+        content = str(m.content)
+        # Errors are not memoized: retrying them may succeed
+        if m.tool_call_id in keys and getattr(m, "status", "success") != "error" and not is_error_result(content):
+            guard.memo.setdefault(keys[m.tool_call_id], (content, m.tool_call_id))
+    observations = [by_id[call["id"]] for call in message.tool_calls if call["id"] in by_id]
+    update: Dict[str, Any] = {"messages": observations}
+    reason = guard.check(history_tokens(list(state["messages"]) + observations))
+    if reason:
+        update["guard_stop"] = reason
+    return update
+
+
+# --- 2. Tools node wrapper ---
+def make_guarded_tools_node(tools_node, async_mode: bool = False):
+    """
+    Wraps a tools node function (e.g. from make_tools_node). With a RunGuard in
+    config["configurable"]["guard"] identical calls within the run are
+    answered from its memo, and a cycle or an exhausted budget sets
+    `guard_stop`, which makes the assistant answer without tools.
+    """
+    def _guard(config) -> Optional[RunGuard]:
+        return ((config or {}).get("configurable") or {}).get("guard")
+
+    def _remaining_state(state, message, remaining):
+        return {**state, "messages": list(state["messages"][:-1]) + [message.model_copy(update={"tool_calls": remaining})]}
+
+    def tools(state, config):
+        guard = _guard(config)
+        message = state["messages"][-1]
+        if guard is None or not isinstance(message, AIMessage):
+            return tools_node(state, config)
+        memo_hits, remaining, keys = _split(guard, state, message)
+        ran = tools_node(_remaining_state(state, message, remaining), config)["messages"] if remaining else []
+        return _finish(guard, state, message, memo_hits, ran, keys)
+
+    async def atools(state, config):
+        guard = _guard(config)
+        message = state["messages"][-1]
+        if guard is None or not isinstance(message, AIMessage):
+            return await tools_node(state, config)
+        memo_hits, remaining, keys = _split(guard, state, message)
+        ran = (await tools_node(_remaining_state(state, message, remaining), config))["messages"] if remaining else []
+        return _finish(guard, state, message, memo_hits, ran, keys)
+
+    return atools if async_mode else tools
@@ -0,0 +1,260 @@
+# agent_core/instrumentation.py
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# AGENT_VERBOSE=0 silences the debug dumps and progress lines on the hot path
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "1").lower() not in ("0", "false", "no")
+
+GRAPH_NODES = ("router", "assistant", "tools", "compact", "escalate")
+
+
+def run_log(config, message: str) -> None:
+    """Prints a progress line from inside a graph run, unless config["configurable"]["verbose"] is off."""
+    if ((config or {}).get("configurable") or {}).get("verbose", AGENT_VERBOSE):
+        print(message)
+
+# USD per million (input, output) tokens, matched against the model name;
+# cached input tokens are billed at a quarter of the input price
+MODEL_PRICES_PER_MTOK = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+CACHED_INPUT_DISCOUNT = 0.25
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Reads input/output (and cached) token counts from an LLMResult."""
+    usage = {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+    for generations in getattr(response, "generations", []) or []:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None) or {}
+            usage["input_tokens"] += int(metadata.get("input_tokens", 0) or 0)
+            usage["output_tokens"] += int(metadata.get("output_tokens", 0) or 0)
+            details = metadata.get("input_token_details") or {}
+            usage["cached_tokens"] += int(details.get("cache_read", 0) or 0)
+    return usage
+
+
+def llm_cost_usd(event: dict) -> float:
+    """Estimated price of one LLM call event (0 for models without a known price)."""
+    matches = [m for m in MODEL_PRICES_PER_MTOK if m in event.get("name", "")]
+    if not matches:
+        return 0.0
+    input_price, output_price = MODEL_PRICES_PER_MTOK[max(matches, key=len)]
+    cached = event.get("cached_tokens", 0)
+    uncached = max(0, event.get("input_tokens", 0) - cached)
+    return (uncached * input_price + cached * input_price * CACHED_INPUT_DISCOUNT
+            + event.get("output_tokens", 0) * output_price) / 1e6
+
+
+def _payload_size(output) -> int:
+    """Size in bytes of a tool output (ToolMessage content or raw value)."""
+    content = getattr(output, "content", output)
+    return len(str(content).encode("utf-8"))
+
+
+# --- 1. Process-wide aggregate (Prometheus snapshot) ---
+class MetricsRegistry:
+    """Aggregates run metrics across the process for a Prometheus-style text snapshot."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.graph_iterations = 0
+        self.tokens = defaultdict(int)
+        self.durations = defaultdict(lambda: [0.0, 0])   # (kind, name) -> [sum_s, count]
+        self.tool_output_bytes = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.routes = defaultdict(lambda: [0, 0.0, 0.0])   # route -> [runs, seconds, cost_usd]
+
+    def record(self, event: dict) -> None:
+        with self._lock:
+            kind, name = event["type"], event["name"]
+            if "duration_s" in event:
+                bucket = self.durations[(kind, name)]
+                bucket[0] += event["duration_s"]
+                bucket[1] += 1
+            if kind == "llm":
+                for key in ("input_tokens", "output_tokens", "cached_tokens"):
+                    self.tokens[key] += event.get(key, 0)
+            if kind == "tool":
+                self.tool_output_bytes[name] += event.get("output_bytes", 0)
+            if kind == "node" and name == "assistant":
+                self.graph_iterations += 1
+            if event.get("error"):
+                self.errors[(kind, name)] += 1
+
+    def record_run(self, route: Optional[str] = None, duration_s: float = 0.0, cost_usd: float = 0.0) -> None:
+        with self._lock:
+            self.runs += 1
+            if route:
+                bucket = self.routes[route]
+                bucket[0] += 1
+                bucket[1] += duration_s
+                bucket[2] += cost_usd
+
+    def prometheus_text(self) -> str:
+        """Renders the aggregate in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# TYPE agent_runs_total counter",
+                f"agent_runs_total {self.runs}",
+                "# TYPE agent_graph_iterations_total counter",
+                f"agent_graph_iterations_total {self.graph_iterations}",
+                "# TYPE agent_llm_tokens_total counter",
+            ]
+            for direction in ("input_tokens", "output_tokens", "cached_tokens"):
+                lines.append(f'agent_llm_tokens_total{{type="{direction}"}} {self.tokens[direction]}')
+            lines.append("# TYPE agent_duration_seconds summary")
+            for (kind, name), (total, count) in sorted(self.durations.items()):
+                lines.append(f'agent_duration_seconds_sum{{kind="{kind}",name="{name}"}} {total:.6f}')
+                lines.append(f'agent_duration_seconds_count{{kind="{kind}",name="{name}"}} {count}')
+            lines.append("# TYPE agent_tool_output_bytes_total counter")
+            for name, size in sorted(self.tool_output_bytes.items()):
+                lines.append(f'agent_tool_output_bytes_total{{tool="{name}"}} {size}')
+            lines.append("# TYPE agent_errors_total counter")
+            for (kind, name), count in sorted(self.errors.items()):
+                lines.append(f'agent_errors_total{{kind="{kind}",name="{name}"}} {count}')
+            lines.append("# TYPE agent_route_runs_total counter")
+            for route, (runs, _, _) in sorted(self.routes.items()):
+                lines.append(f'agent_route_runs_total{{route="{route}"}} {runs}')
+            lines.append("# TYPE agent_route_seconds_total counter")
+            for route, (_, seconds, _) in sorted(self.routes.items()):
+                lines.append(f'agent_route_seconds_total{{route="{route}"}} {seconds:.6f}')
+            lines.append("# TYPE agent_route_cost_usd_total counter")
+            for route, (_, _, cost) in sorted(self.routes.items()):
+                lines.append(f'agent_route_cost_usd_total{{route="{route}"}} {cost:.8f}')
+            return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+# --- 2. Per-run callback handler ---
+class RunMetrics(BaseCallbackHandler):
+    """
+    Callback handler attached to one graph run. Times every assistant turn,
+    LLM call and tool call, and records token counts and tool payload sizes.
+    """
+    def __init__(self, run_label: str = "", registry: Optional[MetricsRegistry] = METRICS):
+        self.run_label = run_label
+        self.registry = registry
+        self.events: List[dict] = []
+        self._starts: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.annotations: Dict[str, Any] = {}
+
+    # --- Internal helpers ---
+    def _start(self, run_id: UUID, kind: str, name: str) -> None:
+        with self._lock:
+            self._starts[run_id] = (kind, name, time.perf_counter())
+
+    def _finish(self, run_id: UUID, **fields) -> None:
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        kind, name, start = started
+        event = {"run": self.run_label, "type": kind, "name": name,
+                 "duration_s": round(time.perf_counter() - start, 6), "ts": time.time(), **fields}
+        with self._lock:
+            self.events.append(event)
+        if self.registry is not None:
+            self.registry.record(event)
+
+    # --- Graph nodes ---
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not the runnables nested inside it
+        if node in GRAPH_NODES and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=str(error))
+
+    # --- LLM calls ---
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        name = params.get("model") or params.get("model_name") or (serialized or {}).get("name", "llm")
+        self._start(run_id, "llm", str(name))
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "llm", (serialized or {}).get("name", "llm"))
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, **_token_usage(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=str(error))
+
+    # --- Tool calls ---
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, **kwargs: Any) -> None:
+        self._start(run_id, "tool", (serialized or {}).get("name") or kwargs.get("name", "tool"))
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, output_bytes=_payload_size(output))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, error=str(error))
+
+    # --- Export ---
+    def annotate(self, **fields: Any) -> None:
+        """Attaches run-level values (e.g. tokens saved by compaction) to the summary."""
+        self.annotations.update(fields)
+
+    def cost_usd(self) -> float:
+        """Estimated LLM spend of the run, from MODEL_PRICES_PER_MTOK."""
+        with self._lock:
+            return sum(llm_cost_usd(e) for e in self.events if e["type"] == "llm")
+
+    def close(self) -> None:
+        self.finished_at = time.time()
+        if self.registry is not None:
+            # Per-route totals: runs, wall time and LLM spend
+            self.registry.record_run(self.annotations.get("route"), self.finished_at - self.started_at, self.cost_usd())
+
+    def summary(self) -> dict:
+        """Totals for this run."""
+        with self._lock:
+            events = list(self.events)
+        tools = [e for e in events if e["type"] == "tool"]
+        llm_calls = [e for e in events if e["type"] == "llm"]
+        return {
+            "run": self.run_label,
+            "wall_time_s": round((self.finished_at or time.time()) - self.started_at, 3),
+            "graph_iterations": sum(1 for e in events if e["type"] == "node" and e["name"] == "assistant"),
+            "llm_calls": len(llm_calls),
+            "llm_time_s": round(sum(e["duration_s"] for e in llm_calls), 3),
+            "input_tokens": sum(e.get("input_tokens", 0) for e in llm_calls),
+            "output_tokens": sum(e.get("output_tokens", 0) for e in llm_calls),
+            "cached_tokens": sum(e.get("cached_tokens", 0) for e in llm_calls),
+            "cost_usd": round(sum(llm_cost_usd(e) for e in llm_calls), 8),
+            "tool_calls": len(tools),
+            "tool_time_s": round(sum(e["duration_s"] for e in tools), 3),
+            "tool_output_bytes": sum(e.get("output_bytes", 0) for e in tools),
+            **self.annotations,
+        }
+
+    def to_jsonl(self, path: str) -> None:
+        """Appends every event of this run, then a summary line, to a JSONL file."""
+        with self._lock:
+            events = list(self.events)
+        with open(path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.write(json.dumps({"type": "run_summary", **self.summary()}, ensure_ascii=False) + "\n")
@@ -0,0 +1,133 @@
+# agent_core/llm_cache.py
+
+import os
+import json
+import hashlib
+from typing import Any, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+
+from tools.result_cache import SQLiteResultCache
+
+# record: serve cached responses, call the model on a miss and store the result
+# replay: serve cached responses only; a miss raises LLMCacheMiss (fully offline runs)
+# passthrough: no caching at all (default)
+LLM_CACHE_MODES = ("record", "replay", "passthrough")
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "passthrough").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _message_fingerprint(message: BaseMessage) -> dict:
+    """
+    The parts of a message that change what the model sees. Random message ids,
+    usage counters and provider metadata are left out so the key is stable.
+    """
+    fingerprint = {"type": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        fingerprint["tool_calls"] = [
+            {"name": c["name"], "args": c["args"], "id": c.get("id")} for c in tool_calls
+        ]
+    if getattr(message, "tool_call_id", None):
+        fingerprint["tool_call_id"] = message.tool_call_id
+    if getattr(message, "name", None):
+        fingerprint["name"] = message.name
+    return fingerprint
+
+
+def _model_fingerprint(model: Any) -> Any:
+    """Model name and sampling parameters (e.g. model, temperature, max_output_tokens)."""
+    try:
+        return model._identifying_params
+    except Exception:
+        return type(model).__name__
+
+
+def _tools_fingerprint(tools: Sequence[Any]) -> List[dict]:
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+    return [convert_to_openai_tool(t) for t in tools]
+
+
+class LLMResponseCache:
+    """
+    Record/replay cache for the assistant node, keyed by a stable hash of the
+    model configuration, the bound tool schemas and the full message list.
+    Responses are stored in a local SQLite file with LRU eviction.
+    """
+    def __init__(self, mode: str = LLM_CACHE_MODE, path: str = LLM_CACHE_PATH, max_mb: float = LLM_CACHE_MAX_MB):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"LLM_CACHE_MODE must be one of {LLM_CACHE_MODES}, got '{mode}'.")
+        self.mode = mode
+        self.store = SQLiteResultCache(path=path, max_bytes=int(max_mb * 1024 * 1024))
+        self._tools_key_cache = {}
+
+    def _tools_key(self, tools: Sequence[Any]) -> str:
+        # Tool schemas are static, so they are serialized once per tool list
+        cache_key = tuple(id(t) for t in tools)
+        if cache_key not in self._tools_key_cache:
+            self._tools_key_cache[cache_key] = json.dumps(_tools_fingerprint(tools), sort_keys=True, default=str)
+        return self._tools_key_cache[cache_key]
+
+    def key(self, model: Any, tools: Sequence[Any], messages: Sequence[BaseMessage],
+            options: Optional[dict] = None) -> str:
+        payload = json.dumps({
+            "model": _model_fingerprint(model),
+            "options": options or {},
+            "tools": self._tools_key(tools),
+            "messages": [_message_fingerprint(m) for m in messages],
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str):
+        cached = self.store.get(key, tool="assistant")
+        if cached is not None:
+            response = messages_from_dict(json.loads(cached))[0]
+            # A fresh id lets add_messages append the replayed message instead of replacing it
+            response.id = None
+            return response
+        if self.mode == "replay":
+            raise LLMCacheMiss("LLM cache replay miss: this request was never recorded.")
+        return None
+
+    def _save(self, key: str, response: BaseMessage) -> None:
+        self.store.put(key, json.dumps(messages_to_dict([response])), tool="assistant")
+
+    # --- Public API ---
+    def invoke(self, runnable, messages: List[BaseMessage], model: Any, tools: Sequence[Any],
+               options: Optional[dict] = None):
+        """
+        Calls `runnable.invoke(messages)` through the cache according to `mode`.
+        `options` holds binding parameters (e.g. parallel_tool_calls) that are
+        part of the key but not of the model config.
+        """
+        if self.mode == "passthrough":
+            return runnable.invoke(messages)
+        key = self.key(model, tools, messages, options)
+        response = self._lookup(key)
+        if response is None:
+            response = runnable.invoke(messages)
+            self._save(key, response)
+        return response
+
+    async def ainvoke(self, runnable, messages: List[BaseMessage], model: Any, tools: Sequence[Any],
+                      options: Optional[dict] = None):
+        """Async counterpart of `invoke`."""
+        if self.mode == "passthrough":
+            return await runnable.ainvoke(messages)
+        key = self.key(model, tools, messages, options)
+        response = self._lookup(key)
+        if response is None:
+            response = await runnable.ainvoke(messages)
+            self._save(key, response)
+        return response
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, **self.store.stats()}
+
+
+LLM_CACHE = LLMResponseCache()
@@ -0,0 +1,227 @@
+# agent_core/prefetch.py
+
+import os
+import json
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from tools import TOOL_REGISTRY
+from .instrumentation import AGENT_VERBOSE
+
+# Opt-in: start the likely tool for each detected input file while the first
+# LLM turn is still in flight.
+AGENT_PREFETCH = os.getenv("AGENT_PREFETCH", "0").lower() in ("1", "true", "yes")
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "4"))
+
+FILE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.txt', '.pdf', '.xlsx', '.csv', '.json', '.html', '.mp3', '.wav', '.xls')
+
+# extension -> (tool the assistant is expected to call, name of its path argument)
+SPECULATIVE_TOOLS = {
+    '.png': ("extract_text", "img_path"),
+    '.jpg': ("extract_text", "img_path"),
+    '.jpeg': ("extract_text", "img_path"),
+    '.webp': ("extract_text", "img_path"),
+    '.mp3': ("audio_to_text", "audio_path"),
+    '.wav': ("audio_to_text", "audio_path"),
+}
+# Data files have no predictable tool call (the query is written by the model),
+# so they are only loaded ahead of time.
+WARM_DATA_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+        return _executor
+
+
+def detect_input_files(question: str) -> List[str]:
+    """Every local file path mentioned in the question, in order of appearance."""
+    files: List[str] = []
+    if "/" in question and "." in question:
+        for word in question.split():
+            candidate = word.strip().strip('"').strip("'").rstrip(",;:?!)").lstrip("(")
+            if candidate.lower().endswith(FILE_EXTENSIONS) and candidate not in files:
+                files.append(candidate)
+    return files
+
+
+def call_key(name: str, args: Dict[str, Any]) -> str:
+    """Tool call identity after filling in the tool's default arguments."""
+    tool = TOOL_REGISTRY.get(name)
+    full_args = dict(args)
+    schema = getattr(tool, "args_schema", None)
+    if schema is not None and hasattr(schema, "model_fields"):
+        for field_name, field in schema.model_fields.items():
+            if field_name not in full_args and not field.is_required():
+                full_args[field_name] = field.get_default()
+    return json.dumps([name, full_args], sort_keys=True, default=str)
+
+
+def _warm_data_file(path: str) -> str:
+    from tools.dataframe_cache import load_dataframe
+    from tools.code_executor import get_code_executor
+    from tools.ooc_query import is_large_file, prepare_sql_table
+    if is_large_file(path):
+        # Never loaded into pandas (query_data_file answers it with SQL): only its table is built
+        return "sql table ready" if prepare_sql_table(path) else "skipped"
+    load_dataframe(path, copy=False)
+    get_code_executor().preload(path)
+    return "loaded"
+
+
+# --- 1. Per-run prefetcher ---
+class Prefetcher:
+    """
+    Starts speculative work for the input files of one run and hands the
+    results to the tools node. A prefetched result is served when the
+    assistant calls the predicted tool with the same arguments; a call on the
+    same file with other arguments waits for the prefetch (which warms the
+    tool result cache) and then runs normally.
+    """
+    def __init__(self, files: List[str], callbacks: Optional[list] = None, verbose: bool = AGENT_VERBOSE):
+        self.callbacks = callbacks or []
+        self.verbose = verbose
+        self._calls: Dict[str, Future] = {}                 # exact call key -> future
+        self._by_path: Dict[Tuple[str, str], Future] = {}   # (tool, resolved path) -> future
+        self._lock = threading.Lock()
+        self.started = 0
+        self.served = 0
+        self.awaited = 0
+        for path in files:
+            self._start(path)
+
+    def _start(self, path: str) -> None:
+        extension = Path(path).suffix.lower()
+        if not Path(path).exists():
+            return
+        executor = _get_executor()
+        if extension in SPECULATIVE_TOOLS:
+            name, arg = SPECULATIVE_TOOLS[extension]
+            tool = TOOL_REGISTRY.get(name)
+            if tool is None:
+                return
+            args = {arg: path}
+            future = executor.submit(tool.invoke, args, {"callbacks": self.callbacks, "run_name": f"prefetch:{name}"})
+            self._calls[call_key(name, args)] = future
+            self._by_path[(name, str(Path(path).resolve()))] = future
+            self.started += 1
+            if self.verbose:
+                print(f"🚀 Prefetching {name} for {path} while the model plans.")
+        elif extension in WARM_DATA_EXTENSIONS:
+            executor.submit(_warm_data_file, path)
+            self.started += 1
+            if self.verbose:
+                print(f"🚀 Preloading data file {path} while the model plans.")
+
+    def take(self, call: dict) -> Optional[Future]:
+        """The prefetched future for an identical tool call (served once), if any."""
+        with self._lock:
+            future = self._calls.pop(call_key(call["name"], call.get("args") or {}), None)
+        if future is not None:
+            self.served += 1
+        return future
+
+    def pending_for(self, call: dict) -> Optional[Future]:
+        """A prefetch running on the same file as `call` (same tool, other arguments)."""
+        args = call.get("args") or {}
+        for value in args.values():
+            if isinstance(value, str) and value:
+                future = self._by_path.get((call["name"], str(Path(value).resolve())))
+                if future is not None:
+                    return future
+        return None
+
+    def close(self) -> dict:
+        """Cancels prefetches that never started and returns the run's counters."""
+        with self._lock:
+            unused = list(self._calls.values())
+            self._calls.clear()
+        for future in unused:
+            future.cancel()
+        return {"prefetch_started": self.started, "prefetch_served": self.served,
+                "prefetch_awaited": self.awaited, "prefetch_unused": len(unused)}
+
+
+def _tool_message(call: dict, future: Future) -> ToolMessage:
+    try:
+        content = future.result()
+    except Exception as e:
+        content = f"Error: {e}"
+    content = content.content if isinstance(content, ToolMessage) else content
+    return ToolMessage(content=str(content), name=call["name"], tool_call_id=call["id"])
+
+
+def _split_calls(prefetcher: Prefetcher, message: AIMessage):
+    """Separates calls served from prefetches from the ones the ToolNode still has to run."""
+    served, remaining, waits = {}, [], []
+    for call in message.tool_calls:
+        future = prefetcher.take(call)
+        if future is not None:
+            served[call["id"]] = (call, future)
+            continue
+        pending = prefetcher.pending_for(call)
+        if pending is not None:
+            waits.append(pending)
+        remaining.append(call)
+    return served, remaining, waits
+
+
+def _merge(message: AIMessage, served: dict, ran: List[Any]) -> List[ToolMessage]:
+    """ToolMessages in the order of the original tool calls."""
+    by_id = {m.tool_call_id: m for m in ran if isinstance(m, ToolMessage)}
+    by_id.update({call_id: _tool_message(call, future) for call_id, (call, future) in served.items()})
+    return [by_id[call["id"]] for call in message.tool_calls if call["id"] in by_id]
+
+
+# --- 2. Tools node wrapper ---
+def make_tools_node(tool_node, async_mode: bool = False):
+    """
+    Wraps the ToolNode so tool calls matching a speculative prefetch are
+    answered from it. The run's Prefetcher arrives in
+    config["configurable"]["prefetch"]; without one the ToolNode runs as is.
+    """
+    def _prefetcher(config) -> Optional[Prefetcher]:
+        return ((config or {}).get("configurable") or {}).get("prefetch")
+
+    def _remaining_state(state, message, remaining):
+        return {**state, "messages": list(state["messages"][:-1]) + [message.model_copy(update={"tool_calls": remaining})]}
+
+    def tools(state, config):
+        prefetcher = _prefetcher(config)
+        message = state["messages"][-1]
+        if prefetcher is None or not isinstance(message, AIMessage):
+            return tool_node.invoke(state, config)
+        served, remaining, waits = _split_calls(prefetcher, message)
+        for future in waits:
+            prefetcher.awaited += 1
+            future.exception()   # wait; the real call then hits the warmed result cache
+        ran = tool_node.invoke(_remaining_state(state, message, remaining), config)["messages"] if remaining else []
+        return {"messages": _merge(message, served, ran)}
+
+    async def atools(state, config):
+        prefetcher = _prefetcher(config)
+        message = state["messages"][-1]
+        if prefetcher is None or not isinstance(message, AIMessage):
+            return await tool_node.ainvoke(state, config)
+        served, remaining, waits = _split_calls(prefetcher, message)
+        for future in waits:
+            prefetcher.awaited += 1
+            await asyncio.wait([asyncio.wrap_future(future)])
+        ran = (await tool_node.ainvoke(_remaining_state(state, message, remaining), config))["messages"] if remaining else []
+        if served:
+            # Never block the event loop on a prefetch still in progress
+            await asyncio.wait([asyncio.wrap_future(future) for _, future in served.values()])
+        return {"messages": _merge(message, served, ran)}
+
+    return atools if async_mode else tools
@@ -0,0 +1,69 @@
+# agent_core/prompt_cache.py
+
+import os
+import time
+import threading
+from typing import Any, Optional, Sequence
+
+from langchain_core.messages import SystemMessage
+
+from tools.lazy import unwrap
+
+# implicit: rely on Gemini's automatic prefix caching of the stable system prompt (default)
+# explicit: upload the system prompt + tool schemas once as a Gemini context cache
+PROMPT_CACHE_MODE = os.getenv("PROMPT_CACHE_MODE", "implicit").lower()
+PROMPT_CACHE_TTL_S = int(os.getenv("PROMPT_CACHE_TTL_S", "3600"))
+
+
+class ExplicitPromptCache:
+    """
+    Holds a provider-side context cache with the static system prompt and the
+    tool schemas, and a copy of the main model that references it. The cache
+    is recreated shortly before its TTL expires. Any failure (e.g. the prefix
+    is below the provider's minimum cacheable size) disables explicit caching
+    and the caller falls back to sending the full prompt.
+    """
+    def __init__(self, mode: str = PROMPT_CACHE_MODE, ttl_s: int = PROMPT_CACHE_TTL_S):
+        self.mode = mode
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._model = None
+        self._model_source_id: Optional[int] = None
+        self._expires_at = 0.0
+        self.created = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode == "explicit"
+
+    def get_model(self, llm: Any, static_prompt: str, tools: Sequence[Any]):
+        """Returns a model bound to the cached prefix, or None to use the full prompt."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            fresh = self._model is not None and self._model_source_id == id(llm) and time.time() < self._expires_at
+            if fresh:
+                return self._model
+            try:
+                from langchain_google_genai import create_context_cache
+                cache_name = create_context_cache(
+                    unwrap(llm),
+                    messages=[SystemMessage(content=static_prompt)],
+                    tools=list(tools),
+                    ttl=f"{self.ttl_s}s",
+                )
+                self._model = llm.model_copy(update={"cached_content": cache_name})
+            except Exception as e:
+                print(f"⚠️ Explicit prompt caching unavailable, sending the full prompt instead: {e}")
+                self.mode = "implicit"
+                self._model = None
+                return None
+            self._model_source_id = id(llm)
+            # Refresh a minute early so requests never reference an expired cache
+            self._expires_at = time.time() + max(60, self.ttl_s - 60)
+            self.created += 1
+            print(f"🗂️ Created Gemini context cache for the static system prompt ({cache_name}).")
+            return self._model
+
+
+PROMPT_CACHE = ExplicitPromptCache()
@@ -0,0 +1,252 @@
+# agent_core/router.py
+
+import os
+import re
+import ast
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+from tools import TOOL_REGISTRY
+from .instrumentation import run_log
+
+# on: classify every question before the ReAct loop; off: always the full loop
+AGENT_ROUTER = os.getenv("AGENT_ROUTER", "1").lower() not in ("0", "false", "no")
+# Opt-in: ask the light model to classify questions the heuristics cannot settle.
+# It costs one light-model call before every such question, including the ones
+# that end up on the full route.
+ROUTER_CLASSIFY = os.getenv("ROUTER_CLASSIFY", "0").lower() in ("1", "true", "yes")
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.7"))
+# Longer questions are multi-step more often than not: straight to the full loop
+ROUTER_MAX_LIGHT_CHARS = int(os.getenv("ROUTER_MAX_LIGHT_CHARS", "300"))
+
+ROUTE_CALCULATOR = "calculator"   # answered by calculate_expression, no LLM call
+ROUTE_LIGHT = "light"             # light model, subset of tools
+ROUTE_FULL = "full"               # main model, every tool
+
+# Input file extension -> tools the light route binds
+LIGHT_FILE_TOOLS = {
+    '.png': ["extract_text"], '.jpg': ["extract_text"], '.jpeg': ["extract_text"], '.webp': ["extract_text"],
+    '.mp3': ["audio_to_text"], '.wav': ["audio_to_text"],
+}
+ALWAYS_LIGHT_TOOLS = ["calculate_expression"]
+
+ROUTER_SYSTEM_PROMPT = (
+    "You route questions for a research agent. Reply with JSON only: "
+    '{"route": "light" or "full", "tools": [tool names], "confidence": 0 to 1}. '
+    'Use "light" only for questions answerable in one or two tool calls with the listed tools; '
+    'use "full" for multi-step research, data analysis, or anything ambiguous.\n'
+    "Tools: {tools}"
+)
+LOW_CONFIDENCE_PATTERNS = re.compile(
+    r"i don't know|i do not know|cannot (be )?determine|unable to|not sure|no information|insufficient"
+    r"|^(unknown|none|n/?a)\.?$", re.I)
+
+
+# --- 1. Arithmetic fast path ---
+_NUMBER = r"\d+(?:\.\d+)?"
+_PREFIX = re.compile(r"^(what is|what's|whats|calculate|compute|evaluate|how much is|solve)\s+(the\s+)?")
+_REWRITES = [
+    (re.compile(rf"(?<=\d),(?=\d{{3}})"), ""),                                           # 1,000 -> 1000
+    (re.compile(rf"square root of\s*({_NUMBER})"), r"math.sqrt(\1)"),
+    (re.compile(rf"cube root of\s*({_NUMBER})"), r"(\1 ** (1 / 3))"),
+    (re.compile(rf"({_NUMBER})\s*(?:%|percent)\s+of\s+({_NUMBER})"), r"(\1 / 100 * \2)"),
+    (re.compile(rf"({_NUMBER})\s+squared"), r"(\1 ** 2)"),
+    (re.compile(rf"({_NUMBER})\s+cubed"), r"(\1 ** 3)"),
+    (re.compile(r"\s*(?:to the power of|raised to)\s*"), " ** "),
+    (re.compile(r"\s*\^\s*"), " ** "),
+    (re.compile(r"\s+plus\s+"), " + "),
+    (re.compile(r"\s+minus\s+"), " - "),
+    (re.compile(r"\s+(?:times|multiplied by|x)\s+"), " * "),
+    (re.compile(r"\s+(?:divided by|over)\s+"), " / "),
+    (re.compile(r"\s+(?:mod|modulo)\s+"), " % "),
+    (re.compile(r"(?<![.\w])sqrt\("), "math.sqrt("),
+]
+_SAFE_EXPRESSION = re.compile(r"^[\d\s.+\-*/%()]+$")
+# 12/25/2023 or 2023-12-25 are dates, not divisions or subtractions
+_DATE_LIKE = re.compile(r"\b\d+\s*/\s*\d+\s*/\s*\d+\b|\b\d+-\d+-\d+\b")
+# Largest exponent evaluated without a model; bases and exponents must not be powers
+# themselves, so the result stays small enough to compute and print instantly
+MAX_EXPONENT = 100
+# Significant digits kept in float answers (0.1 + 0.2 -> 0.3)
+ANSWER_SIGNIFICANT_DIGITS = 12
+
+
+def _constant_value(node) -> Optional[float]:
+    """Value of a sub-expression made only of numbers and + - * / (no powers or calls), else None."""
+    allowed = (ast.Constant, ast.BinOp, ast.UnaryOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.USub, ast.UAdd)
+    if not all(isinstance(n, allowed) for n in ast.walk(node)):
+        return None
+    try:
+        return float(eval(compile(ast.Expression(node), "<exponent>", "eval"), {"__builtins__": None}))
+    except (ArithmeticError, ValueError):
+        return None
+
+
+def _bounded(expression: str) -> bool:
+    """True if evaluating `expression` cannot take long: every power has a small constant exponent."""
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        return False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            if any(isinstance(n, ast.BinOp) and isinstance(n.op, ast.Pow) for n in ast.walk(node.left)):
+                return False
+            exponent = _constant_value(node.right)
+            if exponent is None or abs(exponent) > MAX_EXPONENT:
+                return False
+    return True
+
+
+def arithmetic_expression(question: str) -> Optional[str]:
+    """
+    The Python expression for a pure-arithmetic question ("What is the square
+    root of 625?", "12% of 80", "3^4 + 2"), or None when anything else is
+    asked, when it looks like a date, or when it could take long to evaluate.
+    """
+    text = _PREFIX.sub("", question.strip().lower().rstrip("?!. "))
+    if _DATE_LIKE.search(text):
+        return None
+    for pattern, replacement in _REWRITES:
+        text = pattern.sub(replacement, text)
+    text = text.strip()
+    bare = text.replace("math.sqrt", "")
+    if not _SAFE_EXPRESSION.match(bare) or not re.search(r"\d", bare):
+        return None
+    if not re.search(r"[+\-*/%]|math\.sqrt", text):
+        return None   # a lone number is not a calculation
+    return text if _bounded(text) else None
+
+
+def format_number(result: str) -> str:
+    """
+    Reads like the expected answers: float noise rounded away (0.3, not
+    0.30000000000000004) and no trailing .0 on integral results (25, not 25.0).
+    """
+    if re.fullmatch(r"-?\d+", result):
+        return result   # exact integers stay exact
+    try:
+        value = float(result)
+    except (ValueError, OverflowError):
+        return result
+    if value != value or value in (float("inf"), float("-inf")):
+        return result
+    value = float(f"{value:.{ANSWER_SIGNIFICANT_DIGITS}g}")
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+# --- 2. Route selection ---
+def _file_tools(files: List[str]) -> Optional[List[str]]:
+    """Tools for the light route when every input file has an obvious tool, else None."""
+    tools: List[str] = []
+    for path in files:
+        names = LIGHT_FILE_TOOLS.get(Path(path).suffix.lower())
+        if names is None:
+            return None
+        tools += [n for n in names if n not in tools]
+    return tools
+
+
+def parse_classification(text: str) -> Tuple[str, List[str], float]:
+    """(route, tools, confidence) from the light model's JSON reply; full with no confidence if unreadable."""
+    match = re.search(r"\{.*\}", text, re.S)
+    try:
+        data = json.loads(match.group(0)) if match else {}
+        route = ROUTE_LIGHT if data.get("route") == ROUTE_LIGHT else ROUTE_FULL
+        tools = [t for t in data.get("tools") or [] if t in TOOL_REGISTRY]
+        return route, tools, float(data.get("confidence", 0.0))
+    except (ValueError, TypeError, AttributeError):
+        return ROUTE_FULL, [], 0.0
+
+
+def classify(question: str, files: List[str], light_llm=None) -> Tuple[str, List[str], str]:
+    """(route, tool names, reason): heuristics first, then the light model for what is left."""
+    if files:
+        tools = _file_tools(files)
+        if tools is None:
+            return ROUTE_FULL, [], "input file needs analysis tools"
+        return ROUTE_LIGHT, tools + ALWAYS_LIGHT_TOOLS, "single-tool input file"
+    if len(question) > ROUTER_MAX_LIGHT_CHARS:
+        return ROUTE_FULL, [], "long question"
+    if not ROUTER_CLASSIFY or light_llm is None:
+        return ROUTE_FULL, [], "not classified"
+    prompt = ROUTER_SYSTEM_PROMPT.replace("{tools}", ", ".join(TOOL_REGISTRY))
+    reply = light_llm.invoke([SystemMessage(content=prompt), HumanMessage(content=question)])
+    route, tools, confidence = parse_classification(str(reply.content))
+    if route == ROUTE_LIGHT and confidence >= ROUTER_MIN_CONFIDENCE:
+        return ROUTE_LIGHT, [t for t in tools if t not in ALWAYS_LIGHT_TOOLS] + ALWAYS_LIGHT_TOOLS, \
+            f"classified light ({confidence:.2f})"
+    return ROUTE_FULL, [], f"classified {route} ({confidence:.2f})"
+
+
+def calculator_messages(question: str, expression: str, config=None) -> Optional[list]:
+    """Tool call, observation and final answer for the arithmetic fast path (None if evaluation fails)."""
+    result = TOOL_REGISTRY["calculate_expression"].invoke({"expression": expression}, config)
+    if str(result).startswith("Calculation Error"):
+        return None
+    call = {"name": "calculate_expression", "args": {"expression": expression}, "id": "router_calc", "type": "tool_call"}
+    return [
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(content=str(result), name="calculate_expression", tool_call_id=call["id"]),
+        AIMessage(content=f"Thought: The question is pure arithmetic: {expression} = {result}.\n"
+                          f"FINAL ANSWER: {format_number(str(result))}"),
+    ]
+
+
+# --- 3. Graph nodes and edges ---
+def make_router_node(light_llm):
+    """
+    Node run before the first assistant turn. It records the route in the
+    state; for the calculator route it also adds the answer, and the graph
+    ends without calling a model. config["configurable"]["router"] turns
+    routing on or off per run (default AGENT_ROUTER).
+    """
+    def router(state, config):
+        if not ((config or {}).get("configurable") or {}).get("router", AGENT_ROUTER):
+            return {"route": ROUTE_FULL, "route_tools": []}
+        question = str(state["messages"][-1].content)
+        expression = arithmetic_expression(question)
+        if expression is not None:
+            messages = calculator_messages(question, expression, config)
+            if messages is not None:
+                run_log(config, f"🧭 Route: calculator ({expression})")
+                return {"route": ROUTE_CALCULATOR, "route_tools": ["calculate_expression"], "messages": messages}
+        try:
+            route, tools, reason = classify(question, state.get("input_files") or [], light_llm())
+        except Exception as e:
+            route, tools, reason = ROUTE_FULL, [], f"classifier failed: {e}"
+        run_log(config, f"🧭 Route: {route} ({reason})")
+        return {"route": route, "route_tools": tools}
+    return router
+
+
+def after_router(state) -> str:
+    return "__end__" if state.get("route") == ROUTE_CALCULATOR else "assistant"
+
+
+def is_low_confidence(message) -> bool:
+    """A light-route answer that should be retried by the full loop."""
+    content = str(getattr(message, "content", "") or "")
+    if "FINAL ANSWER:" not in content.upper():
+        return True
+    answer = content[content.upper().rfind("FINAL ANSWER:") + len("FINAL ANSWER:"):].strip()
+    return not answer or bool(LOW_CONFIDENCE_PATTERNS.search(answer))
+
+
+def after_assistant(state) -> str:
+    """tools_condition, plus escalation of weak light-route answers."""
+    message = state["messages"][-1]
+    if getattr(message, "tool_calls", None):
+        return "tools"
+    if state.get("route") == ROUTE_LIGHT and not state.get("guard_stop") and is_low_confidence(message):
+        return "escalate"
+    return "__end__"
+
+
+def escalate(state, config) -> dict:
+    """Drops the weak answer and hands the run, with its observations, to the full loop."""
+    run_log(config, "🧭 Route: escalating light -> full (low-confidence answer)")
+    return {"route": ROUTE_FULL, "route_escalated": True, "messages": [RemoveMessage(id=state["messages"][-1].id)]}
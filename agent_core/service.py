@@ -0,0 +1,290 @@
+# agent_core/service.py
+
+import os
+import json
+import time
+import queue
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from .instrumentation import METRICS
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8080"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "4"))
+# Questions accepted but not yet picked up by a worker; beyond this the service answers 503
+SERVICE_QUEUE_SIZE = int(os.getenv("SERVICE_QUEUE_SIZE", "16"))
+SERVICE_TIMEOUT_S = float(os.getenv("SERVICE_TIMEOUT_S", "300"))
+SERVICE_MAX_BODY_BYTES = 1 << 20
+
+# End-of-run marker on a job's event queue
+_DONE = object()
+
+
+class ServiceBusy(Exception):
+    """The request queue is full."""
+
+
+@dataclass
+class Job:
+    """One question travelling from an HTTP handler to a worker and back as events."""
+    question: str
+    thread_id: Optional[str]
+    deadline: float                     # time.monotonic()
+    enqueued_at: float = field(default_factory=time.monotonic)
+    events: "queue.Queue" = field(default_factory=queue.Queue)
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    # Counter the cancellation is reported under: "timed_out" or "cancelled" (client gone)
+    cancel_reason: str = "cancelled"
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        if not self.cancelled.is_set():
+            self.cancel_reason = reason
+            self.cancelled.set()
+
+
+# --- 1. Worker pool with a bounded queue ---
+class AgentService:
+    """
+    Keeps one BasicAgent (its compiled graph, LLM clients and loaded models)
+    resident and runs questions on a fixed pool of worker threads fed by a
+    bounded queue. A full queue rejects new questions immediately instead of
+    letting latency grow without limit.
+    """
+    def __init__(self, agent, workers: int = SERVICE_WORKERS, queue_size: int = SERVICE_QUEUE_SIZE,
+                 timeout_s: float = SERVICE_TIMEOUT_S):
+        self.agent = agent
+        self.workers = max(1, workers)
+        self.timeout_s = timeout_s
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = []
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counters = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0, "timed_out": 0, "cancelled": 0}
+
+    def start(self) -> "AgentService":
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"agent-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        """Lets queued questions finish, then stops the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def submit(self, question: str, thread_id: Optional[str] = None, timeout_s: Optional[float] = None) -> Job:
+        """Queues a question; raises ServiceBusy when the queue is full."""
+        timeout_s = self.timeout_s if timeout_s is None else min(timeout_s, self.timeout_s)
+        job = Job(question, thread_id, deadline=time.monotonic() + timeout_s)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            raise ServiceBusy(f"{self._queue.maxsize} questions already queued")
+        self._count("accepted")
+        return job
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self.in_flight += 1
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                job.events.put(_DONE)
+
+    def _run(self, job: Job) -> None:
+        if job.cancelled.is_set():
+            self._count(job.cancel_reason)
+            return
+        if time.monotonic() > job.deadline:
+            # Expired while queued: do not spend model calls on it
+            self._count("timed_out")
+            job.events.put({"event": "timeout", "error": "Request expired in the queue."})
+            return
+        job.events.put({"event": "started", "queued_s": round(time.monotonic() - job.enqueued_at, 3)})
+        stream = self.agent.stream(job.question, thread_id=job.thread_id, deadline=job.deadline)
+        try:
+            for event in stream:
+                job.events.put(event)
+                if event["event"] in ("final", "error", "timeout"):
+                    self._count({"final": "completed", "error": "failed", "timeout": "timed_out"}[event["event"]])
+                elif job.cancelled.is_set():
+                    # Client gone or timed out: stop the graph after the current step
+                    self._count(job.cancel_reason)
+                    break
+        except Exception as e:
+            self._count("failed")
+            job.events.put({"event": "error", "error": str(e)})
+        finally:
+            stream.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"workers": self.workers, "queue_depth": self._queue.qsize(),
+                    "queue_capacity": self._queue.maxsize, "in_flight": self.in_flight, **self.counters}
+
+    def prometheus_text(self) -> str:
+        """Agent metrics aggregated over the process, followed by the service's own counters."""
+        stats = self.stats()
+        lines = ["# TYPE agent_service_queue_depth gauge", f"agent_service_queue_depth {stats['queue_depth']}",
+                 "# TYPE agent_service_in_flight gauge", f"agent_service_in_flight {stats['in_flight']}",
+                 "# TYPE agent_service_requests_total counter"]
+        for outcome in self.counters:
+            lines.append(f'agent_service_requests_total{{outcome="{outcome}"}} {stats[outcome]}')
+        return METRICS.prometheus_text() + "\n".join(lines) + "\n"
+
+
+# --- 2. HTTP front end ---
+def _parse_request(request) -> Tuple[str, Optional[str], Optional[float]]:
+    """(question, thread_id, timeout_s) from a request body; raises ValueError when it is malformed."""
+    if not isinstance(request, dict):
+        raise ValueError("the body must be a JSON object")
+    question = request.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise ValueError("'question' must be a non-empty string")
+    thread_id = request.get("thread_id")
+    if thread_id is not None and not isinstance(thread_id, (str, int)):
+        raise ValueError("'thread_id' must be a string")
+    timeout_s = request.get("timeout_s")
+    if timeout_s is not None:
+        if isinstance(timeout_s, bool) or not isinstance(timeout_s, (int, float, str)):
+            raise ValueError("'timeout_s' must be a number")
+        try:
+            timeout_s = float(timeout_s)
+        except ValueError:
+            raise ValueError("'timeout_s' must be a number") from None
+        if not 0 < timeout_s < float("inf"):
+            raise ValueError("'timeout_s' must be a positive number")
+    return question.strip(), None if thread_id is None else str(thread_id), timeout_s
+
+
+def make_handler(service: AgentService):
+    """
+    Request handler bound to `service`:
+      * POST /ask         {"question", "thread_id"?, "timeout_s"?} -> {"answer", "thread_id", "metrics"}
+      * POST /ask/stream  same body; graph events as newline-delimited JSON
+      * GET  /healthz     queue and worker status
+      * GET  /metrics     Prometheus text
+    """
+    class AgentRequestHandler(BaseHTTPRequestHandler):
+        server_version = "AgentService/1.0"
+
+        def log_message(self, format, *args):
+            if service.agent.verbose:
+                super().log_message(format, *args)
+
+        def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/healthz":
+                self._send_json(200, {"status": "ok", **service.stats()})
+            elif self.path == "/metrics":
+                body = service.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path not in ("/ask", "/ask/stream"):
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > SERVICE_MAX_BODY_BYTES:
+                    raise ValueError("request body too large")
+                request = json.loads(self.rfile.read(length) or b"{}")
+                question, thread_id, timeout_s = _parse_request(request)
+            except ValueError as e:
+                self._send_json(400, {"error": f"Bad request: {e}"})
+                return
+
+            try:
+                job = service.submit(question, thread_id=thread_id, timeout_s=timeout_s)
+            except ServiceBusy as e:
+                self._send_json(503, {"error": f"Service busy: {e}"}, headers={"Retry-After": "1"})
+                return
+
+            if self.path == "/ask":
+                self._answer(job)
+            else:
+                self._stream(job)
+
+        def _next_event(self, job: Job):
+            """The job's next event, or a timeout event once its deadline passes."""
+            try:
+                return job.events.get(timeout=max(0.0, job.deadline - time.monotonic()))
+            except queue.Empty:
+                job.cancel("timed_out")
+                return {"event": "timeout", "error": "Request timed out."}
+
+        def _answer(self, job: Job) -> None:
+            while True:
+                event = self._next_event(job)
+                if event is _DONE:
+                    event = {"event": "error", "error": "Run ended without an answer."}
+                if event["event"] == "final":
+                    self._send_json(200, {k: v for k, v in event.items() if k != "event"})
+                    return
+                if event["event"] == "timeout":
+                    self._send_json(504, {"error": event["error"]})
+                    return
+                if event["event"] == "error":
+                    self._send_json(500, {"error": event["error"]})
+                    return
+
+        def _stream(self, job: Job) -> None:
+            # HTTP/1.0 response: the body ends when the connection closes, so no chunking is needed
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            try:
+                while True:
+                    event = self._next_event(job)
+                    if event is _DONE:
+                        return
+                    self.wfile.write((json.dumps(event, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                    if event["event"] in ("final", "error", "timeout"):
+                        return
+            except (BrokenPipeError, ConnectionResetError):
+                job.cancel("cancelled")
+
+    return AgentRequestHandler
+
+
+def serve(service: AgentService, host: str = SERVICE_HOST, port: int = SERVICE_PORT) -> ThreadingHTTPServer:
+    """Starts the service's workers and returns the HTTP server (call serve_forever on it)."""
+    service.start()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
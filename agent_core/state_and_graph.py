@@ -1,14 +1,23 @@
 # agent_core/state_and_graph.py
 
+import operator
 from langgraph.graph.message import add_messages
 from typing import TypedDict, Annotated, Optional, List 
 from langgraph.graph import StateGraph, END, START
-from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_core.messages import AnyMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.prebuilt import ToolNode
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
 
 # Import the tools list from the tools directory
-from tools import ALL_TOOLS
+from tools import ALL_TOOLS, TOOL_REGISTRY
+from tools.lazy import LazyObject
+from tools.llm_scheduler import gemini_client
+from .llm_cache import LLM_CACHE
+from .prompt_cache import PROMPT_CACHE
+from .compaction import COMPACTION_MODE, make_compaction_node
+from .checkpointing import open_checkpointer
+from .prefetch import make_tools_node
+from .guard import GUARD_FINAL_PROMPT, make_guarded_tools_node
+from .router import ROUTE_LIGHT, after_assistant, after_router, escalate, make_router_node
 
 # --- 1. Agent State Definition ---
 class AgentState(TypedDict):
@@ -17,27 +26,65 @@ class AgentState(TypedDict):
     input_file: Optional[str] 
     # messages accumulates the conversation history (HumanMessage, AIMessage, ToolMessage)
     messages: Annotated[List[AnyMessage], add_messages] 
+    # every file path detected in the question (input_file is the first one)
+    input_files: List[str]
+    # estimated prompt tokens removed by the compaction node during the run
+    compaction_tokens_saved: Annotated[int, operator.add]
+    # set by the tools guard when a cycle or an exhausted budget ends tool use
+    guard_stop: Optional[str]
+    # set by the router: calculator, light (light model, route_tools bound) or full
+    route: Optional[str]
+    route_tools: List[str]
+    # True once a weak light-route answer was handed to the full loop
+    route_escalated: bool
 
 # --- 2. LLM Initialization and Tool Binding ---
-# Initialize the core LLM for reasoning and decision-making
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    max_output_tokens=4096,
-    request_timeout=270,
-    temperature=0.0
-)
-# Bind the LLM with the defined tools (this is where it learns the schemas)
-llm_with_tools = llm.bind_tools(ALL_TOOLS, parallel_tool_calls=False)
+# Initialize the core LLM for reasoning and decision-making.
+# The Gemini client is imported and built on the first assistant turn. It comes
+# from the shared registry, so its calls share quotas with the tools' clients
+# and are admitted before theirs.
+def _build_llm():
+    return gemini_client("main")
+
+llm = LazyObject(_build_llm, name="main ChatGoogleGenerativeAI")
+# Cheaper model for the router's classification and light-route questions
+light_llm = LazyObject(lambda: gemini_client("light"), name="light ChatGoogleGenerativeAI")
+
+_bound_llms = {}
+
+def get_llm_with_tools(parallel_tool_calls: bool = False, model=None, tools=None):
+    """
+    Returns `model` (default `llm`) bound with the schemas of `tools` (default
+    all tools); this is where it learns them. The binding is cached per model
+    instance and tool set, so replacing `llm` takes effect.
+    The async graph passes parallel_tool_calls=True: the model may request
+    several independent tools in one turn and ToolNode runs them concurrently.
+    """
+    model = llm if model is None else model
+    tools = ALL_TOOLS if tools is None else tools
+    key = (id(model), tuple(t.name for t in tools), parallel_tool_calls)
+    bound = _bound_llms.get(key)
+    if bound is None:
+        bound = model.bind_tools(tools, parallel_tool_calls=parallel_tool_calls)
+        # Drop bindings of a model that has since been replaced
+        live = {id(llm), id(light_llm), key[0]}
+        for stale in [k for k in _bound_llms if k[0] not in live]:
+            del _bound_llms[stale]
+        _bound_llms[key] = bound
+    return bound
 
 # --- 3. Assistant Node ---
-def assistant(state: AgentState) -> dict:
-    """The main node: The LLM makes a decision (think, use tool, or answer)."""
-    
+def build_static_system_prompt(tools) -> str:
+    """
+    Builds the question-independent system prompt: rules, tool descriptions and
+    answer format. It is built once, so every turn of every question shares the
+    same prefix and providers can cache it.
+    """
     # Generate tools description for the system prompt
-    tools_descriptions = "\n".join([f"    - {t.name}({t.args}): {t.description}" for t in ALL_TOOLS])
+    tools_descriptions = "\n".join([f"    - {t.name}({t.args}): {t.description}" for t in tools])
     
     # System Prompt: guides behavior, format, and priorities
-    system_prompt = f"""
+    return f"""
 You are an expert ReAct reasoning agent designed to answer complex GAIA-like questions accurately. 
 You have access to the following set of tools.
 
@@ -45,6 +92,7 @@ STRICT ReAct REASONING RULES:
 1.  **FILE EXTRACTION (Priority 1):** If the `input_file` state variable is set (meaning a file path was found in the question), 
     you MUST start by using the `extract_text` tool with that path.
 2.  **WEB SEARCH (Current Data):** Use the `search_web` tool **only** for external, current, or post-cutoff knowledge.
+    When several independent searches are needed, issue them together with `search_web_batch`.
 3.  **CALCULATION (Math):** Use `calculate_expression` **only** for mathematical operations.
 4.  **AUDIO TRANSCRIPTION (Priority 3 - Audio):**
     If the prompt references an audio file path (e.g., .mp3, .wav) and requires transcription, you MUST use the `audio_to_text` tool.
@@ -65,25 +113,117 @@ AVAILABLE TOOLS:
 - If the answer is a **number**, do not use commas (for thousands separator) or units ($ or %).
 - If the answer is a **string**, do not use articles (e.g., 'a', 'the') or abbreviations.
 - If the answer is a **list**, use commas to separate the elements.
+"""
+
+
+def build_state_message(state: AgentState) -> HumanMessage:
+    """The small per-question part of the prompt, sent right after the static prefix."""
+    content = f"Current Input File State: {state.get('input_file') or 'None'}"
+    files = state.get("input_files") or []
+    if len(files) > 1:
+        content += f" (all input files: {', '.join(files)})"
+    return HumanMessage(content=content)
+
+
+STATIC_SYSTEM_PROMPT = build_static_system_prompt(ALL_TOOLS)
+STATIC_SYSTEM_MESSAGE = SystemMessage(content=STATIC_SYSTEM_PROMPT)
+
+# Light-route system prompts, one per tool subset
+_light_system_messages = {}
 
-Current Input File State: {state.get('input_file', 'None')} 
-""" 
+def _route_setup(state: AgentState):
+    """(model, tools, system message) of the run's route: the light model with its tool subset, or the full setup."""
+    names = tuple(state.get("route_tools") or ())
+    if state.get("route") != ROUTE_LIGHT or not names:
+        return llm, ALL_TOOLS, STATIC_SYSTEM_MESSAGE
+    tools = [TOOL_REGISTRY[name] for name in names]
+    message = _light_system_messages.get(names)
+    if message is None:
+        message = _light_system_messages[names] = SystemMessage(content=build_static_system_prompt(tools))
+    return light_llm, tools, message
 
-    sys_msg = SystemMessage(content=system_prompt)
+
+def _prepare_call(state: AgentState, parallel_tool_calls: bool):
+    """
+    Returns (runnable, messages, cache options, model, tools) for one assistant
+    turn. With an explicit provider cache the static prompt and tool schemas
+    live server-side and only the per-question messages are sent.
+    """
+    model, tools, system_message = _route_setup(state)
+    history = [build_state_message(state)] + state["messages"]
+    options = {"parallel_tool_calls": parallel_tool_calls}
+    if state.get("guard_stop"):
+        # Forced final turn: no tools are bound, so the model can only answer
+        final_request = HumanMessage(content=GUARD_FINAL_PROMPT.format(reason=state["guard_stop"]))
+        return model, [system_message] + history + [final_request], {**options, "forced_final": True}, model, tools
+    if model is llm:
+        cached_model = PROMPT_CACHE.get_model(llm, STATIC_SYSTEM_PROMPT, ALL_TOOLS)
+        if cached_model is not None:
+            return cached_model, history, {**options, "prompt_cache": "explicit"}, model, tools
+    return get_llm_with_tools(parallel_tool_calls, model, tools), [system_message] + history, options, model, tools
+
+
+def _final_if_forced(state: AgentState, response):
+    """After a guard stop any tool call left in the response is dropped, so the run ends here."""
+    if state.get("guard_stop") and getattr(response, "tool_calls", None):
+        return response.model_copy(update={"tool_calls": []})
+    return response
+
+
+def assistant(state: AgentState) -> dict:
+    """The main node: The LLM makes a decision (think, use tool, or answer)."""
+    runnable, messages, options, model, tools = _prepare_call(state, parallel_tool_calls=False)
     
     # Invoke the LLM for a decision (response is either an AIMessage or a ToolCall)
-    response = llm_with_tools.invoke([sys_msg] + state["messages"])
+    # Served from the record/replay cache when LLM_CACHE_MODE is record or replay
+    response = LLM_CACHE.invoke(runnable, messages, model=model, tools=tools, options=options)
     
     # LangGraph will use add_messages to append [response] to state["messages"]
-    return {"messages": [response], "input_file": state["input_file"]}
+    return {"messages": [_final_if_forced(state, response)], "input_file": state["input_file"]}
+
+
+async def aassistant(state: AgentState) -> dict:
+    """Async variant of `assistant`: awaits the LLM and allows parallel tool calls."""
+    runnable, messages, options, model, tools = _prepare_call(state, parallel_tool_calls=True)
+    response = await LLM_CACHE.ainvoke(runnable, messages, model=model, tools=tools, options=options)
+    return {"messages": [_final_if_forced(state, response)], "input_file": state["input_file"]}
     
 # --- 4. LangGraph Construction and Compilation ---
-builder = StateGraph(AgentState)
-builder.add_node("assistant", assistant)
-builder.add_node("tools", ToolNode(ALL_TOOLS)) 
+def build_react_graph(async_mode: bool = False, checkpointer=None):
+    """
+    Compiles the ReAct graph. With `async_mode=True` the assistant node is a
+    coroutine and the graph must be driven with `ainvoke`/`astream`.
+    With a `checkpointer` every completed node is persisted per thread_id, so
+    an interrupted run can be resumed instead of started over.
+    The router node picks the route first: arithmetic is answered without a
+    model, simple questions go to the light model, the rest to the full loop.
+    """
+    builder = StateGraph(AgentState)
+    builder.add_node("router", make_router_node(light_llm=lambda: light_llm))
+    builder.add_node("assistant", aassistant if async_mode else assistant)
+    builder.add_node("escalate", escalate)
+    # Serves speculative prefetches when the run provides a Prefetcher, and
+    # memoizes repeated calls / enforces budgets when it provides a RunGuard
+    tools_node = make_tools_node(ToolNode(ALL_TOOLS), async_mode=async_mode)
+    builder.add_node("tools", make_guarded_tools_node(tools_node, async_mode=async_mode))
+
+    builder.add_edge(START, "router")
+    builder.add_conditional_edges("router", after_router, {"assistant": "assistant", "__end__": END})
+    # tools_condition, plus escalation of weak light-route answers to the full loop
+    builder.add_conditional_edges("assistant", after_assistant, {"tools": "tools", "escalate": "escalate", "__end__": END})
+    builder.add_edge("escalate", "assistant")
+    if COMPACTION_MODE == "off":
+        builder.add_edge("tools", "assistant")
+    else:
+        # Old observations are shrunk once the history exceeds the token budget
+        builder.add_node("compact", make_compaction_node(summarizer_llm=lambda: llm))
+        builder.add_edge("tools", "compact")
+        builder.add_edge("compact", "assistant")
+
+    return builder.compile(checkpointer=checkpointer)
 
-builder.add_edge(START, "assistant")
-builder.add_conditional_edges("assistant", tools_condition)
-builder.add_edge("tools", "assistant")
 
-REACT_GRAPH = builder.compile()
\ No newline at end of file
+# AGENT_CHECKPOINT_PATH enables the shared SQLite checkpointer (off by default)
+CHECKPOINTER = open_checkpointer()
+REACT_GRAPH = build_react_graph(checkpointer=CHECKPOINTER)
+ASYNC_REACT_GRAPH = build_react_graph(async_mode=True, checkpointer=CHECKPOINTER)
\ No newline at end of file
@@ -3,7 +3,6 @@
 import os
 import sys
 from dotenv import load_dotenv
-# Import the BasicAgent class (which invokes LangGraph)
 
 
 # LOAD ENVIRONMENT VARIABLES (Must be the first executable code)
@@ -14,16 +13,27 @@ try:
 except Exception as e:
     print(f"❌ Error attempting to load .secrets/.env: {e}")
 
-from agent_core.agent_wrapper import BasicAgent
-
 # --- 1. Agent Initialization ---
-try:
-    # Initialize your agent
-    agent = BasicAgent()
-    print("✅ BasicAgent initialized. Ready to test.")
-except Exception as e:
-    print(f"❌ ERROR: Failed to initialize BasicAgent. Check your API keys and configuration. Details: {e}")
-    sys.exit(1) # Exit if initialization fails
+agent = None
+
+def init_agent():
+    """
+    Builds the agent and preloads Whisper models. Only called under __main__:
+    the audio and code-execution worker pools use 'spawn', so each worker
+    re-imports this module and must not build an agent or load Whisper.
+    """
+    global agent
+    try:
+        # Import the BasicAgent class (which invokes LangGraph) and initialize your agent
+        from agent_core.agent_wrapper import BasicAgent
+        agent = BasicAgent()
+        print("✅ BasicAgent initialized. Ready to test.")
+        # Optionally preload Whisper models listed in WHISPER_WARM_MODELS (e.g. "base,small")
+        from tools.whisper_pool import warm_whisper_models
+        warm_whisper_models()
+    except Exception as e:
+        print(f"❌ ERROR: Failed to initialize BasicAgent. Check your API keys and configuration. Details: {e}")
+        sys.exit(1) # Exit if initialization fails
 
 
 # --- 2. Execution Function ---
@@ -64,6 +74,8 @@ def run_single_test(prompt: str):
 
 # --- 3. Main Execution Block ---
 if __name__ == "__main__":
+    init_agent()
+
     # The question is taken from command line arguments (sys.argv[1:])
     
     if len(sys.argv) > 1:
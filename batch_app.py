@@ -0,0 +1,50 @@
+# batch_app.py
+
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+
+# LOAD ENVIRONMENT VARIABLES (Must be the first executable code)
+try:
+    if not load_dotenv(dotenv_path='.secrets/.env'):
+        print("⚠️ Warning: Could not load .secrets/.env. Keys must be system variables.")
+except Exception as e:
+    print(f"❌ Error attempting to load .secrets/.env: {e}")
+
+from agent_core.agent_wrapper import BasicAgent
+from agent_core.batch_runner import run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs BasicAgent over a JSONL question set with bounded concurrency.")
+    parser.add_argument("input", help="JSONL file with one question per line (fields: question/prompt/body, task_id/id).")
+    parser.add_argument("output", help="JSONL file where answers are appended as they complete.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of questions in flight.")
+    parser.add_argument("--question-field", default=None, help="Field holding the question text (auto-detected by default).")
+    parser.add_argument("--quiet", action="store_true", help="Silence the agent's per-run debug output.")
+    parser.add_argument("--metrics-path", default=None, help="Append per-run timing/token events to this JSONL file.")
+    parser.add_argument("--checkpoint-path", default=None,
+                        help="SQLite file where every graph step is checkpointed (e.g. .cache/checkpoints.sqlite).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip questions already answered in OUTPUT and continue interrupted ones from their checkpoint.")
+    args = parser.parse_args()
+
+    # --- 1. Agent Initialization (paid once for the whole batch) ---
+    try:
+        agent = BasicAgent(verbose=not args.quiet, metrics_path=args.metrics_path, checkpoint_path=args.checkpoint_path)
+    except Exception as e:
+        print(f"❌ ERROR: Failed to initialize BasicAgent. Check your API keys and configuration. Details: {e}")
+        sys.exit(1)
+
+    # --- 2. Batch Execution ---
+    report = run_batch(agent, args.input, args.output, concurrency=args.concurrency,
+                       question_field=args.question_field, resume=args.resume)
+
+    print("\n--- BATCH REPORT ---")
+    print(json.dumps(report.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_agent_offline.py
+"""
+Offline benchmark of the agent loop: Gemini, Vision, Search and Whisper are
+replaced by deterministic fakes with configurable latency, and BasicAgent is
+driven through scripted multi-turn tool scenarios.
+
+Reports per-stage timings (LLM, tools, graph overhead), allocations and
+end-to-end throughput without any network access.
+
+Usage:
+    python -m benchmarks.bench_agent_offline [--repeats 5] [--llm-latency 0.05] [--tool-latency 0.02] [--concurrency 4]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import expect_answer, offline_stubs
+
+
+def build_scenarios(workdir: str) -> dict:
+    """Creates the input files and returns {name: (question, plan, expected answer)}."""
+    csv_path = os.path.join(workdir, "sales.csv")
+    with open(csv_path, "w") as f:
+        f.write("Region,Sales\n" + "".join(f"R{i % 4},{i}\n" for i in range(1000)))
+    audio_path = os.path.join(workdir, "audio.mp3")
+    image_path = os.path.join(workdir, "invoice.png")
+    for path in (audio_path, image_path):
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048)
+
+    return {
+        "calculator": ("What is the square root of 625?",
+                       [("calculate_expression", {"expression": "math.sqrt(625)"})], "25"),
+        "data_file": (f"What is the total of Sales in {csv_path} ?",
+                      [("query_data_file", {"data_path": csv_path, "code_query": "print(df['Sales'].sum())"})],
+                      "499500"),
+        "audio": (f"What is the year mentioned in the file {audio_path} ?",
+                  [("audio_to_text", {"audio_path": audio_path})], "1969"),
+        "image": (f"What is the invoice total in {image_path} ?",
+                  [("extract_text", {"img_path": image_path})], "1250"),
+        "search_then_math": ("How many moons does the answer have times two?",
+                             [("search_web", {"query": "the answer"}),
+                              ("calculate_expression", {"expression": "42 * 2"})], "84"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call.")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Seconds per fake vision/search/whisper call.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    from agent_core.agent_wrapper import BasicAgent
+
+    with tempfile.TemporaryDirectory() as workdir:
+        scenarios = build_scenarios(workdir)
+        plans = {question: plan for question, plan, _ in scenarios.values()}
+
+        with offline_stubs(args.llm_latency, args.tool_latency, plans=plans):
+            agent = BasicAgent(verbose=False)
+            # Warm-up: first-call imports and worker start-up are not part of the loop cost
+            for name, (question, _, expected) in scenarios.items():
+                expect_answer(name, agent(question), expected)
+
+            print(f"\n--- Offline agent benchmark ({args.repeats} runs/scenario, "
+                  f"LLM {args.llm_latency * 1000:.0f} ms, tools {args.tool_latency * 1000:.0f} ms) ---")
+            print(f"{'scenario':<18}{'wall ms':>9}{'llm ms':>9}{'tools ms':>10}{'graph ms':>10}"
+                  f"{'turns':>7}{'tokens':>8}{'peak KB':>9}")
+
+            tracemalloc.start()
+            for name, (question, _, expected) in scenarios.items():
+                rows = []
+                for _ in range(args.repeats):
+                    tracemalloc.reset_peak()
+                    base, _ = tracemalloc.get_traced_memory()
+                    answer = agent(question)
+                    _, peak = tracemalloc.get_traced_memory()
+                    expect_answer(name, answer, expected)
+                    summary = agent.last_run_metrics.summary()
+                    overhead = summary["wall_time_s"] - summary["llm_time_s"] - summary["tool_time_s"]
+                    rows.append((summary["wall_time_s"], summary["llm_time_s"], summary["tool_time_s"], overhead,
+                                 summary["graph_iterations"], summary["input_tokens"] + summary["output_tokens"],
+                                 (peak - base) / 1024))
+                mean = [statistics.mean(col) for col in zip(*rows)]
+                print(f"{name:<18}{mean[0] * 1000:>9.1f}{mean[1] * 1000:>9.1f}{mean[2] * 1000:>10.1f}"
+                      f"{mean[3] * 1000:>10.1f}{mean[4]:>7.0f}{mean[5]:>8.0f}{mean[6]:>9.0f}")
+            tracemalloc.stop()
+
+            # End-to-end throughput over the whole scenario mix
+            runs = [(name, question, expected) for name, (question, _, expected) in scenarios.items()] * args.repeats
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                answers = list(pool.map(agent, [question for _, question, _ in runs]))
+            elapsed = time.perf_counter() - start
+            for (name, _, expected), answer in zip(runs, answers):
+                expect_answer(name, answer, expected)
+            print(f"\nThroughput: {len(runs) / elapsed:.1f} runs/s "
+                  f"({len(runs)} runs, concurrency {args.concurrency}, {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
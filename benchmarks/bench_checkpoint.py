@@ -0,0 +1,75 @@
+# benchmarks/bench_checkpoint.py
+"""
+Cost and benefit of the persistent LangGraph checkpointer, offline.
+
+1. Overhead: the same multi-step scenario with and without the SQLite
+   checkpointer; reports writes per run and milliseconds per write.
+2. Resume: the fake LLM fails on a late call; the second attempt on the same
+   thread id continues from the last completed node, so the LLM and tool
+   calls made before the failure are not repeated.
+
+Usage:
+    python -m benchmarks.bench_checkpoint [--repeats 20] [--steps 6] [--llm-latency 0.05]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.fakes import offline_stubs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=6, help="Tool calls per scripted run.")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call.")
+    args = parser.parse_args()
+
+    from agent_core.agent_wrapper import BasicAgent
+
+    question = "What is 2 to the power of the number of steps?"
+    plan = [("calculate_expression", {"expression": f"2 ** {i + 1}"}) for i in range(args.steps)]
+
+    with tempfile.TemporaryDirectory() as tmp, offline_stubs(llm_latency_s=args.llm_latency,
+                                                             plans={question: plan}) as fakes:
+        # --- 1. Overhead ---
+        plain = BasicAgent(verbose=False)
+        durable = BasicAgent(verbose=False, checkpoint_path=os.path.join(tmp, "checkpoints.sqlite"))
+        results = {}
+        for label, agent in (("no checkpointer", plain), ("sqlite checkpointer", durable)):
+            walls, writes, write_s = [], [], []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                agent(question)
+                walls.append(time.perf_counter() - start)
+                summary = agent.last_run_metrics.summary()
+                writes.append(summary.get("checkpoint_writes", 0))
+                write_s.append(summary.get("checkpoint_write_s", 0.0))
+            results[label] = statistics.median(walls)
+            per_write = 1000 * sum(write_s) / sum(writes) if sum(writes) else 0.0
+            print(f"{label:<20} median run {results[label] * 1000:8.1f} ms | "
+                  f"{statistics.mean(writes):5.1f} writes/run | {per_write:6.3f} ms/write")
+        overhead = results["sqlite checkpointer"] - results["no checkpointer"]
+        print(f"Checkpoint overhead: {overhead * 1000:+.1f} ms per run "
+              f"({100 * overhead / results['no checkpointer']:+.1f}%)")
+
+        # --- 2. Resume after a failure ---
+        llm = fakes["llm"]
+        llm.calls, llm.fail_at_call = 0, args.steps   # fails on the last planned tool request
+        first = durable(question, thread_id="resume-demo")
+        calls_before = llm.calls
+        llm.fail_at_call = 0
+        second = durable(question, thread_id="resume-demo")
+        print(f"\nFirst attempt:  {first[:60]!r} after {calls_before} LLM calls")
+        print(f"Resumed run:    {second!r} with {llm.calls - calls_before} more LLM calls "
+              f"(a fresh run needs {args.steps + 1})")
+        calls_before = llm.calls
+        third = durable(question, thread_id="resume-demo")
+        print(f"Finished thread: {third!r} returned with {llm.calls - calls_before} LLM calls")
+
+
+if __name__ == "__main__":
+    main()
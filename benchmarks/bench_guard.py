@@ -0,0 +1,62 @@
+# benchmarks/bench_guard.py
+"""
+Tools guard on vs. off, offline.
+
+Scripted plans reproduce the loops seen in practice:
+  * repeat: the model issues the same search_web call over and over;
+  * ping-pong: it alternates between two calls;
+  * long: many distinct calls, more rounds than the step budget.
+With the guard, repeated calls are answered from the run's memo, a cycle or
+an exhausted budget forces the final answer, and the steps and tokens saved
+are reported.
+
+Usage:
+    python -m benchmarks.bench_guard [--llm-latency 0.1] [--tool-latency 0.1]
+"""
+
+import time
+import argparse
+
+from benchmarks.fakes import offline_stubs
+
+
+def build_scenarios() -> dict:
+    search = ("search_web", {"query": "population of Medellin 2020"})
+    other = ("search_web", {"query": "population of Medellin metropolitan area"})
+    return {
+        "repeat": ("What was the population of Medellin in 2020?", [search] * 7),
+        "ping-pong": ("How does Medellin compare to its metropolitan area?", [search, other] * 4),
+        "long": ("List ten facts about Medellin.",
+                 [("search_web", {"query": f"Medellin fact {i}"}) for i in range(12)]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="Seconds per fake LLM call.")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="Seconds per fake tool call.")
+    args = parser.parse_args()
+
+    from agent_core.agent_wrapper import BasicAgent
+
+    scenarios = build_scenarios()
+    plans = {question: plan for question, plan in scenarios.values()}
+    with offline_stubs(args.llm_latency, args.tool_latency, plans=plans):
+        print(f"\n--- LLM {args.llm_latency * 1000:.0f} ms, tools {args.tool_latency * 1000:.0f} ms ---")
+        print(f"{'scenario':<11}{'guard':>6}{'wall ms':>9}{'llm':>5}{'tools':>7}{'tokens':>8}  guard stats")
+        for name, (question, _) in scenarios.items():
+            for guard in (False, True):
+                agent = BasicAgent(verbose=False, guard=guard)
+                start = time.perf_counter()
+                answer = agent(question)
+                wall = time.perf_counter() - start
+                s = agent.last_run_metrics.summary()
+                stats = {k: v for k, v in s.items() if k.startswith("guard_") and k != "guard_stop"}
+                if answer.startswith("AGENT ERROR"):
+                    stats = {"error": answer[:70]}
+                print(f"{name:<11}{'on' if guard else 'off':>6}{wall * 1000:>9.0f}{s['llm_calls']:>5}{s['tool_calls']:>7}"
+                      f"{s['input_tokens'] + s['output_tokens']:>8}  {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_image_preprocess.py
+"""
+Bytes uploaded and extract_text latency with and without image preprocessing.
+
+Three synthetic images are generated with Pillow: a 12 MP camera photo
+(JPEG), a 300 dpi scanned page (PNG) and a photographed page (noisy JPEG at
+the same resolution). The vision model is the offline fake with a fixed
+per-request latency plus an upload time proportional to the payload, so the
+gain from smaller payloads and concurrent tiles is visible offline.
+
+Trade-off: both pages are too long to downscale legibly. The compact PNG scan
+is sent whole, unchanged. The photographed page exceeds IMAGE_MAX_UPLOAD_KB
+and is tiled: concurrent tiles are faster than one large upload, but they cost
+more requests, and tiles are never smaller than one legible upload would be.
+
+Usage:
+    python -m benchmarks.bench_image_preprocess [--upload-mbps 20] [--latency-ms 800]
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+
+
+def make_photo(path: str) -> None:
+    from PIL import Image, ImageDraw
+    rng = random.Random(0)
+    image = Image.effect_noise((4000, 3000), 40).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    for _ in range(300):
+        x, y = rng.randrange(4000), rng.randrange(3000)
+        draw.rectangle((x, y, x + rng.randrange(50, 400), y + rng.randrange(50, 400)),
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    draw.text((200, 200), "Invoice total: 1250", fill="white")
+    image.save(path, format="JPEG", quality=95)
+
+
+def make_scan(path: str, photographed: bool = False) -> None:
+    from PIL import Image, ImageChops, ImageDraw
+    image = Image.new("L", (2550, 6600), 255)
+    draw = ImageDraw.Draw(image)
+    for line in range(300):
+        draw.text((150, 100 + line * 21), f"Line {line}: lorem ipsum dolor sit amet, total {line * 7}", fill=0)
+    if photographed:
+        # Sensor noise defeats compression, as in a phone picture of a page
+        image = ImageChops.multiply(image, Image.effect_noise(image.size, 30).point(lambda v: 155 + v // 3))
+        image.convert("RGB").save(path, format="JPEG", quality=90)
+    else:
+        image.save(path, format="PNG")
+
+
+def run(img_path: str, preprocess: bool) -> float:
+    from tools import specialized_tools, image_preprocess
+    saved = specialized_tools.prepare_image
+    if not preprocess:
+        # Previous behaviour: the raw file in a single request
+        specialized_tools.prepare_image = lambda data: [image_preprocess.PreparedImage(data, "image/png")]
+    start = time.perf_counter()
+    try:
+        specialized_tools._extract_image_text.__wrapped__(img_path)
+    finally:
+        specialized_tools.prepare_image = saved
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upload-mbps", type=float, default=20.0, help="Simulated upload bandwidth.")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Simulated model latency per request.")
+    args = parser.parse_args()
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Pillow is not installed; preprocessing falls back to sending the original bytes.")
+        return
+
+    from tools import specialized_tools
+    from benchmarks.fakes import FakeVisionLLM
+
+    saved_vision = specialized_tools.vision_llm
+    with tempfile.TemporaryDirectory() as tmp:
+        photo, scan, page = (os.path.join(tmp, name) for name in ("photo.jpg", "scan.png", "page.jpg"))
+        make_photo(photo)
+        make_scan(scan)
+        make_scan(page, photographed=True)
+
+        print(f"\n--- extract_text, {args.upload_mbps:.0f} Mbps upload, {args.latency_ms:.0f} ms model latency ---")
+        print(f"{'image':<10} {'mode':<13} {'file KB':>8} {'sent KB':>8} {'requests':>8} {'seconds':>8}")
+        try:
+            for label, path in (("photo", photo), ("scan", scan), ("page", page)):
+                for mode, preprocess in (("raw", False), ("preprocessed", True)):
+                    vision = FakeVisionLLM(latency_s=args.latency_ms / 1000, upload_mbps=args.upload_mbps)
+                    specialized_tools.vision_llm = vision
+                    elapsed = run(path, preprocess)
+                    print(f"{label:<10} {mode:<13} {os.path.getsize(path) / 1024:>8.0f} "
+                          f"{vision.bytes_uploaded / 1024:>8.0f} {vision.calls:>8} {elapsed:>8.2f}")
+        finally:
+            specialized_tools.vision_llm = saved_vision
+
+
+if __name__ == "__main__":
+    main()
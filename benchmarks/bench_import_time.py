@@ -0,0 +1,77 @@
+# benchmarks/bench_import_time.py
+"""
+Import-time guard for the agent entry points.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+reports the slowest imports, and fails (exit code 1) when the total exceeds
+the budget or when a heavy library is imported eagerly.
+
+Usage:
+    python -m benchmarks.bench_import_time [--module agent_core.agent_wrapper] [--budget-ms 3000]
+"""
+
+import re
+import sys
+import argparse
+import subprocess
+
+# Libraries that must only load when a tool actually needs them
+HEAVY_MODULES = [
+    "whisper", "torch", "pandas", "langchain_experimental", "youtube_transcript_api",
+    "langchain_google_genai", "langchain_google_community", "googleapiclient",
+]
+
+LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str):
+    """Returns ({module: cumulative_us} for top-level imports, total_us, eager heavy modules)."""
+    check = (f"import sys, {module}; "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", check],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed")
+
+    cumulative = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if not match:
+            continue
+        _, cum_us, indent, name = match.groups()
+        cumulative[name] = max(cumulative.get(name, 0), int(cum_us))
+        if len(indent) == 1:  # top-level import of the interpreter run
+            total_us += int(cum_us)
+    eager = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative, total_us, eager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="agent_core.agent_wrapper")
+    parser.add_argument("--budget-ms", type=float, default=3000.0)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    cumulative, total_us, eager = measure(args.module)
+
+    print(f"\n--- Import time for {args.module} ---")
+    for name, cum_us in sorted(cumulative.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"{cum_us / 1000:9.1f} ms  {name}")
+    print(f"\nTotal: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if eager:
+        print(f"❌ Heavy modules imported eagerly: {', '.join(eager)}")
+        failed = True
+    if total_us / 1000 > args.budget_ms:
+        print("❌ Import time budget exceeded.")
+        failed = True
+    if not failed:
+        print("✅ Import time within budget and no heavy modules loaded eagerly.")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_llm_scheduler.py
+"""
+Shared Gemini scheduler vs. uncoordinated clients against a quota-enforcing
+fake API, offline.
+
+The fake answers after a fixed latency and rejects calls beyond its
+requests-per-window quota with a 429 (ResourceExhausted), like Gemini.
+Main-loop workers and sub-agent workers (vision tiles, pandas agent) call it
+concurrently, with more demand than the quota allows:
+  * uncoordinated: every client retries on its own with the fixed exponential
+    backoff of the Gemini client (no jitter, no shared state);
+  * scheduled: all calls go through one GeminiScheduler with the same quota.
+
+Time is scaled so one quota window lasts --window-s seconds instead of 60.
+
+Usage:
+    python -m benchmarks.bench_llm_scheduler [--rpm 20] [--window-s 1] [--main-workers 4] [--sub-workers 8] [--calls 15]
+"""
+
+import time
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.llm_scheduler import GeminiScheduler, TokenBucket, PRIORITY_MAIN, PRIORITY_SUBAGENT
+
+
+class ResourceExhausted(Exception):
+    code = 429
+
+
+class FakeQuotaAPI:
+    """Answers after `latency_s`; rejects calls beyond `rpm` per window with a 429."""
+    def __init__(self, rpm: float, window_s: float, latency_s: float):
+        self.bucket = TokenBucket(rpm, window_s)
+        self.latency_s = latency_s
+        self.lock = threading.Lock()
+        self.served = 0
+        self.rejected = 0
+
+    def generate(self) -> str:
+        with self.lock:
+            now = time.monotonic()
+            allowed = self.bucket.wait_time(1, now) <= 0
+            if allowed:
+                self.bucket.take(1, now)
+                self.served += 1
+            else:
+                self.rejected += 1
+        if not allowed:
+            time.sleep(self.latency_s / 5)
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        time.sleep(self.latency_s)
+        return "ok"
+
+
+def uncoordinated_call(api: FakeQuotaAPI, scale: float, max_retries: int = 6) -> str:
+    """The Gemini client's own retry: wait_exponential(multiplier=2, min=1, max=60), no jitter."""
+    for attempt in range(max_retries):
+        try:
+            return api.generate()
+        except ResourceExhausted:
+            if attempt == max_retries - 1:
+                raise
+            time.sleep(min(60.0, max(1.0, 2.0 * 2 ** attempt)) * scale)
+
+
+def run(mode: str, args) -> dict:
+    scale = args.window_s / 60.0
+    api = FakeQuotaAPI(args.rpm, args.window_s, args.latency_s)
+    scheduler = GeminiScheduler(rpm=args.rpm, tpm=1e9, max_concurrency=8, max_retries=6,
+                                backoff_base_s=1.0 * scale, backoff_max_s=60.0 * scale, window_s=args.window_s)
+    latencies = {PRIORITY_MAIN: [], PRIORITY_SUBAGENT: []}
+    failures = [0]
+
+    def worker(priority: int) -> None:
+        for _ in range(args.calls):
+            start = time.perf_counter()
+            try:
+                if mode == "scheduled":
+                    scheduler.call(api.generate, "gemini-2.5-flash", 500, priority)
+                else:
+                    uncoordinated_call(api, scale)
+                latencies[priority].append(time.perf_counter() - start)
+            except ResourceExhausted:
+                failures[0] += 1
+
+    start = time.perf_counter()
+    priorities = [PRIORITY_MAIN] * args.main_workers + [PRIORITY_SUBAGENT] * args.sub_workers
+    with ThreadPoolExecutor(max_workers=len(priorities)) as pool:
+        list(pool.map(worker, priorities))
+    wall = time.perf_counter() - start
+    return {
+        "wall_s": wall,
+        "throughput": api.served / wall * args.window_s,
+        "rejected": api.rejected,
+        "failed": failures[0],
+        "main_ms": statistics.mean(latencies[PRIORITY_MAIN] or [0]) * 1000,
+        "sub_ms": statistics.mean(latencies[PRIORITY_SUBAGENT] or [0]) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpm", type=float, default=20, help="Quota: requests per window.")
+    parser.add_argument("--window-s", type=float, default=1.0, help="Scaled length of the one-minute quota window.")
+    parser.add_argument("--latency-s", type=float, default=0.05, help="Fake API latency per call.")
+    parser.add_argument("--main-workers", type=int, default=4)
+    parser.add_argument("--sub-workers", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=15, help="Calls per worker.")
+    args = parser.parse_args()
+
+    total = (args.main_workers + args.sub_workers) * args.calls
+    print(f"\n--- {total} calls, quota {args.rpm:.0f} per window of {args.window_s}s, "
+          f"{args.main_workers} main + {args.sub_workers} sub-agent workers ---")
+    print(f"{'mode':<14}{'wall s':>8}{'served/window':>15}{'429s':>7}{'failed':>8}{'main ms':>9}{'sub ms':>9}")
+    for mode in ("uncoordinated", "scheduled"):
+        r = run(mode, args)
+        print(f"{mode:<14}{r['wall_s']:>8.2f}{r['throughput']:>15.1f}{r['rejected']:>7}{r['failed']:>8}"
+              f"{r['main_ms']:>9.0f}{r['sub_ms']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
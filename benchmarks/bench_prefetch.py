@@ -0,0 +1,75 @@
+# benchmarks/bench_prefetch.py
+"""
+Speculative file prefetch on vs. off, offline.
+
+With prefetch the tool for each input file (vision for images, Whisper for
+audio, DataFrame load for data files) starts as soon as the path is detected,
+overlapping with the first LLM turn; the assistant's later tool call is then
+served from that result. Gemini, Vision and Whisper are latency-configurable
+fakes.
+
+Usage:
+    python -m benchmarks.bench_prefetch [--llm-latency 0.4] [--tool-latency 0.6] [--repeats 3]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+from benchmarks.fakes import expect_answer, offline_stubs
+
+
+def build_scenarios(workdir: str) -> dict:
+    """{name: (question, plan, expected answer)}."""
+    image_path = os.path.join(workdir, "invoice.png")
+    audio_path = os.path.join(workdir, "memo.mp3")
+    for path in (image_path, audio_path):
+        with open(path, "wb") as f:
+            f.write(b"\x00" * 2048)
+    return {
+        "image": (f"What is the invoice total in {image_path} ?",
+                  [("extract_text", {"img_path": image_path})], "1250"),
+        "audio": (f"What year is mentioned in {audio_path} ?",
+                  [("audio_to_text", {"audio_path": audio_path})], "1969"),
+        "image+audio": (f"Does {image_path} match the amount said in {audio_path} ?",
+                        [("extract_text", {"img_path": image_path}),
+                         ("audio_to_text", {"audio_path": audio_path})], "1969"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="Seconds per fake LLM call.")
+    parser.add_argument("--tool-latency", type=float, default=0.6, help="Seconds per fake vision/Whisper call.")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    from agent_core.agent_wrapper import BasicAgent
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scenarios = build_scenarios(tmp)
+        plans = {question: plan for question, plan, _ in scenarios.values()}
+        with offline_stubs(llm_latency_s=args.llm_latency, tool_latency_s=args.tool_latency, plans=plans):
+            print(f"\n--- LLM {args.llm_latency * 1000:.0f} ms, tools {args.tool_latency * 1000:.0f} ms ---")
+            print(f"{'scenario':<14} {'off ms':>8} {'on ms':>8} {'saved':>7}  prefetch stats")
+            for name, (question, _, expected) in scenarios.items():
+                timings = {}
+                for mode in (False, True):
+                    agent = BasicAgent(verbose=False, prefetch=mode)
+                    walls = []
+                    for _ in range(args.repeats):
+                        start = time.perf_counter()
+                        answer = agent(question)
+                        walls.append(time.perf_counter() - start)
+                        expect_answer(name, answer, expected)
+                    timings[mode] = statistics.median(walls)
+                summary = agent.last_run_metrics.summary()
+                stats = {k: v for k, v in summary.items() if k.startswith("prefetch_")}
+                saved = 100 * (1 - timings[True] / timings[False])
+                print(f"{name:<14} {timings[False] * 1000:>8.0f} {timings[True] * 1000:>8.0f} {saved:>6.0f}%  {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# benchmarks/bench_prompt_prefix.py
+"""
+Per-turn cost of the system prompt: the old layout (prompt rebuilt every turn
+with the input file embedded) vs. the precomputed static prefix plus a small
+per-question state message.
+
+Offline it measures prompt build time per turn and how many prompt tokens are
+a prefix shared with the previous request (and therefore cacheable by the
+provider). The shared prefix is the same for both layouts: the old prompt
+already carried the input file at its very end, so the gain of the static
+prefix is build time. Tokens only leave the request with
+PROMPT_CACHE_MODE=explicit, whose share is reported separately. With --live
+it runs real questions and reports the input and cached token counts that
+Gemini actually returned per turn.
+
+Usage:
+    python -m benchmarks.bench_prompt_prefix [--live "question 1" "question 2" ...]
+"""
+
+import os
+import timeit
+import argparse
+
+from benchmarks.fakes import approx_tokens
+
+QUESTIONS = [
+    ("What is the square root of 625?", None),
+    ("What is the year mentioned in test_assets/audio.mp3 ?", "test_assets/audio.mp3"),
+    ("What is the total of Sales in test_assets/sales.xlsx ?", "test_assets/sales.xlsx"),
+]
+
+
+def common_prefix_len(a: str, b: str) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=4, help="Simulated ReAct turns per question.")
+    parser.add_argument("--live", nargs="*", help="Run these questions against Gemini and report token usage.")
+    args = parser.parse_args()
+
+    from tools import ALL_TOOLS
+    from agent_core.state_and_graph import STATIC_SYSTEM_PROMPT, build_static_system_prompt, build_state_message
+
+    def old_prompt(input_file):
+        # Previous behaviour: tool descriptions and the whole prompt rebuilt per turn
+        return build_static_system_prompt(ALL_TOOLS) + f"\nCurrent Input File State: {input_file} \n"
+
+    def new_prompt(input_file):
+        return STATIC_SYSTEM_PROMPT + str(build_state_message({"input_file": input_file}).content)
+
+    # --- 1. Build time per turn ---
+    n = 2000
+    old_us = timeit.timeit(lambda: old_prompt("x.png"), number=n) / n * 1e6
+    new_us = timeit.timeit(lambda: new_prompt("x.png"), number=n) / n * 1e6
+    print("\n--- Prompt build time per turn ---")
+    print(f"Rebuilt per turn: {old_us:8.1f} us")
+    print(f"Precomputed:      {new_us:8.1f} us")
+
+    # --- 2. Cacheable prefix across a stream of requests ---
+    print("\n--- Prompt tokens shared with the previous request (cacheable prefix) ---")
+    for label, build in (("rebuilt", old_prompt), ("precomputed", new_prompt)):
+        previous, total, shared = "", 0, 0
+        for question, input_file in QUESTIONS:
+            history = question
+            for turn in range(args.turns):
+                request = build(input_file) + "\n" + history
+                total += approx_tokens(request)
+                shared += approx_tokens(request[:common_prefix_len(previous, request)]) if previous else 0
+                previous = request
+                history += f"\n[observation {turn}]"
+        print(f"{label:<12} {shared:>7} / {total:>7} prompt tokens cacheable ({100 * shared / total:.0f}%)")
+
+    # With an explicit context cache the static prefix is stored server-side and not resent
+    requests = len(QUESTIONS) * args.turns
+    static = approx_tokens(STATIC_SYSTEM_PROMPT) * requests
+    print(f"{'explicit':<12} {static:>7} / {total:>7} prompt tokens served from the context cache "
+          f"({100 * static / total:.0f}%, on every request including the first turn of each question)")
+
+    # --- 3. Live token usage ---
+    if args.live:
+        from agent_core.agent_wrapper import BasicAgent
+        agent = BasicAgent(verbose=False)
+        print("\n--- Live token usage per turn ---")
+        for question in args.live:
+            agent(question)
+            for event in agent.last_run_metrics.events:
+                if event["type"] == "llm":
+                    print(f"{question[:40]:<42} input {event['input_tokens']:>6} | cached {event['cached_tokens']:>6} "
+                          f"| {event['duration_s'] * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_query_engines.py
+"""
+Full-load pandas path vs. the out-of-core SQL engine of query_data_file.
+
+A synthetic CSV is generated once; each engine then runs the same filtered
+group-by in a fresh subprocess so peak memory is measured independently.
+
+Usage:
+    python -m benchmarks.bench_query_engines [--rows 2000000] [--csv /tmp/bench_sales.csv]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import resource
+import subprocess
+
+SQL = "SELECT Region, SUM(Sales) AS total FROM df WHERE Units > 5 GROUP BY Region ORDER BY Region"
+PANDAS = "print(df[df['Units'] > 5].groupby('Region')['Sales'].sum().sort_index())"
+
+
+def generate_csv(path: str, rows: int) -> None:
+    rng = random.Random(42)
+    regions = ["North", "South", "East", "West"]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Order Id", "Region", "Units", "Sales", "Comment"])
+        for i in range(rows):
+            writer.writerow([i, rng.choice(regions), rng.randint(1, 10),
+                             round(rng.uniform(1, 500), 2), f"order number {i}"])
+
+
+def run_engine(engine: str, csv_path: str) -> None:
+    """Child-process entry point: runs one engine and prints a JSON line."""
+    start = time.perf_counter()
+    if engine == "pandas":
+        import pandas as pd
+        df = pd.read_csv(csv_path, encoding="utf-8")
+        df.columns = df.columns.str.replace(' ', '_', regex=False)
+        exec(PANDAS, {"df": df, "pd": pd})
+    else:
+        from tools.ooc_query import run_sql_query
+        print(run_sql_query(csv_path, SQL))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"engine": engine, "seconds": elapsed, "peak_rss_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--csv", default="/tmp/bench_sales.csv")
+    parser.add_argument("--engine", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.engine:
+        run_engine(args.engine, args.csv)
+        return
+
+    if not os.path.exists(args.csv):
+        print(f"Generating {args.rows} rows into {args.csv}...")
+        generate_csv(args.csv, args.rows)
+    size_mb = os.path.getsize(args.csv) / (1024 * 1024)
+
+    print(f"\n--- Query engine benchmark ({size_mb:.0f} MB CSV) ---")
+    # The SQL engine runs twice: the first run may build its on-disk table
+    for engine in ["pandas", "sql", "sql"]:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_query_engines", "--engine", engine, "--csv", args.csv],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{engine:>6}: FAILED\n{proc.stderr.strip()[-500:]}")
+            continue
+        stats = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{engine:>6}: {stats['seconds']:.2f}s | peak RSS {stats['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
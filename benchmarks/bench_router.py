@@ -0,0 +1,112 @@
+# benchmarks/bench_router.py
+"""
+Fast-path router on vs. off, offline.
+
+One question per route:
+  * calculator: pure arithmetic, answered by calculate_expression without a model;
+  * light-file: an image question, light model with extract_text only;
+  * light: a lookup the light model classifies as simple;
+  * escalated: classified simple, but the light model's answer is weak, so
+    the full loop takes over;
+  * full: a multi-step question the classifier sends to the full loop.
+Each question runs with the router off, on (heuristics only, the default) and
+on with ROUTER_CLASSIFY, so the classifier's extra light-model call shows up
+in the latency, LLM calls and tokens of every question it sees, including the
+ones it sends to the full loop.
+The fake main model is priced as gemini-2.5-flash and the light one as
+gemini-2.0-flash-lite, and the light model answers faster. Latency, LLM calls,
+tokens and estimated cost are reported per question and per route.
+
+Usage:
+    python -m benchmarks.bench_router [--llm-latency 0.3] [--light-latency 0.12] [--tool-latency 0.05]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+from benchmarks.fakes import expect_answer, offline_stubs
+
+SIMPLE = "What is the capital of Antioquia?"
+WEAK = "Who designed the Medellin metro logo?"
+COMPLEX = "Which Medellin mayor built the most metrocables, and how many stations do they have in total?"
+
+
+def build_scenarios(workdir: str) -> dict:
+    """{name: (question, plan of the main model, plan of the light model, expected answer)}."""
+    image_path = os.path.join(workdir, "invoice.png")
+    with open(image_path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048)
+    search = lambda q: ("search_web", {"query": q})
+    image_plan = [("extract_text", {"img_path": image_path})]
+    return {
+        "calculator": ("What is the square root of 625?",
+                       [("calculate_expression", {"expression": "math.sqrt(625)"})], [], "25"),
+        "light-file": (f"What is the invoice total in {image_path} ?", image_plan, image_plan, "1250"),
+        "light": (SIMPLE, [search("capital of Antioquia")], [search("capital of Antioquia")], "42"),
+        # The light model gives up without searching; the full loop searches
+        "escalated": (WEAK, [search("Medellin metro logo designer")], [], "42"),
+        "full": (COMPLEX, [search("Medellin metrocables by mayor"), search("metrocable stations"),
+                           ("calculate_expression", {"expression": "3 + 4 + 4"})], [], "11"),
+    }
+
+
+ROUTES = {
+    SIMPLE: {"route": "light", "tools": ["search_web"], "confidence": 0.9},
+    WEAK: {"route": "light", "tools": ["search_web"], "confidence": 0.8},
+    COMPLEX: {"route": "full", "confidence": 0.9},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds per main-model call.")
+    parser.add_argument("--light-latency", type=float, default=0.12, help="Seconds per light-model call.")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Seconds per fake tool call.")
+    args = parser.parse_args()
+
+    from agent_core import router as router_module
+    from agent_core.agent_wrapper import BasicAgent
+    from agent_core.instrumentation import MetricsRegistry
+
+    with tempfile.TemporaryDirectory() as workdir:
+        scenarios = build_scenarios(workdir)
+        plans = {question: plan for question, plan, _, _ in scenarios.values()}
+        with offline_stubs(args.llm_latency, args.tool_latency, plans=plans, routes=ROUTES,
+                           light_latency_s=args.light_latency) as fakes:
+            fakes["llm"].model_name = "gemini-2.5-flash"
+            fakes["light_llm"].model_name = "gemini-2.0-flash-lite"
+            fakes["light_llm"].plans = {question: plan for question, _, plan, _ in scenarios.values()}
+
+            print(f"\n--- main LLM {args.llm_latency * 1000:.0f} ms, light LLM {args.light_latency * 1000:.0f} ms, "
+                  f"tools {args.tool_latency * 1000:.0f} ms ---")
+            print(f"{'scenario':<12}{'router':>13}{'route':>11}{'wall ms':>9}{'llm':>5}{'tokens':>8}{'cost µ$':>9}  answer")
+            registry = MetricsRegistry()
+            saved_classify = router_module.ROUTER_CLASSIFY
+            try:
+                for name, (question, _, _, expected) in scenarios.items():
+                    for mode, router, classify in (("off", False, False), ("on", True, False),
+                                                   ("on+classify", True, True)):
+                        router_module.ROUTER_CLASSIFY = classify
+                        agent = BasicAgent(verbose=False, router=router)
+                        start = time.perf_counter()
+                        answer = agent(question)
+                        wall = time.perf_counter() - start
+                        expect_answer(f"{name} ({mode})", answer, expected)
+                        s = agent.last_run_metrics.summary()
+                        if classify:
+                            registry.record_run(s.get("route"), wall, s["cost_usd"])
+                        print(f"{name:<12}{mode:>13}{s.get('route', '-'):>11}{wall * 1000:>9.0f}"
+                              f"{s['llm_calls']:>5}{s['input_tokens'] + s['output_tokens']:>8}"
+                              f"{s['cost_usd'] * 1e6:>9.1f}  {answer[:30]}")
+            finally:
+                router_module.ROUTER_CLASSIFY = saved_classify
+
+            print(f"\nWith ROUTER_CLASSIFY:\n{'route':<12}{'runs':>5}{'mean ms':>9}{'mean µ$':>9}")
+            for route, (runs, seconds, cost) in sorted(registry.routes.items()):
+                print(f"{route:<12}{runs:>5}{seconds / runs * 1000:>9.0f}{cost / runs * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
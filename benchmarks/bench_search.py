@@ -0,0 +1,113 @@
+# benchmarks/bench_search.py
+"""
+search_web client against a local stand-in for the Google Custom Search API.
+
+The stand-in answers with CSE-shaped JSON after a fixed delay, so the run is
+offline and deterministic. It compares:
+  * a new connection per request with no cache (the previous behaviour),
+  * the pooled client with its normalized-query TTL cache,
+  * a batch of queries fanned out concurrently with merged, de-duplicated results.
+
+Usage:
+    python -m benchmarks.bench_search [--latency-ms 120] [--queries 20]
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_server(latency_s: float) -> ThreadingHTTPServer:
+    class StandInSearch(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+        requests_served = 0
+        connections = set()
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+            num = int(parse_qs(urlparse(self.path).query).get("num", ["3"])[0])
+            type(self).requests_served += 1
+            type(self).connections.add(self.client_address)
+            time.sleep(latency_s)
+            # Overlapping links across queries exercise the batch de-duplication
+            words = query.lower().split() or ["empty"]
+            items = [{"title": f"{w} page", "link": f"https://example.org/{w}",
+                      "snippet": f"About {w}: {query} ({i})"} for i, w in enumerate(words[:num])]
+            body = json.dumps({"items": items}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), StandInSearch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=120.0, help="Stand-in server delay per request.")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per scenario.")
+    args = parser.parse_args()
+
+    import requests
+    from tools.search_client import GoogleSearchClient
+
+    server = make_server(args.latency_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/customsearch/v1"
+    handler = server.RequestHandlerClass
+
+    # Near-identical phrasings of a few questions, as the agent tends to issue
+    topics = ["capital of australia", "boiling point of water", "tallest mountain in africa", "speed of light"]
+    stream = []
+    for i in range(args.queries):
+        topic = topics[i % len(topics)]
+        stream.append(topic.title() + "?" if i % 2 else f"  {topic} ")
+
+    print(f"\n--- {args.queries} queries, {len(topics)} distinct after normalization ---")
+
+    # 1. Previous behaviour: new connection, no cache
+    handler.requests_served, handler.connections = 0, set()
+    start = time.perf_counter()
+    for query in stream:
+        requests.get(base_url, params={"q": query, "num": 3}, timeout=10).json()
+    elapsed = time.perf_counter() - start
+    print(f"Unpooled, uncached: {elapsed:6.2f}s | {handler.requests_served} requests | {len(handler.connections)} connections")
+
+    # 2. Pooled client with TTL cache
+    handler.requests_served, handler.connections = 0, set()
+    client = GoogleSearchClient(api_key="x", cse_id="x", base_url=base_url)
+    start = time.perf_counter()
+    for query in stream:
+        client.run(query)
+    elapsed = time.perf_counter() - start
+    print(f"Pooled + cache:     {elapsed:6.2f}s | {handler.requests_served} requests | {len(handler.connections)} connections "
+          f"| {client.stats()}")
+
+    # 3. Batch fan-out of distinct queries
+    batch = [f"{topic} history" for topic in topics]
+    handler.requests_served, handler.connections = 0, set()
+    client = GoogleSearchClient(api_key="x", cse_id="x", base_url=base_url)
+    start = time.perf_counter()
+    for query in batch:
+        client.search(query)
+    sequential = time.perf_counter() - start
+    client.cache.clear()
+    start = time.perf_counter()
+    merged = client.search_batch(batch + batch[:2])
+    fan_out = time.perf_counter() - start
+    print(f"\n--- Batch of {len(batch)} queries (+2 repeated) ---")
+    print(f"Sequential: {sequential:6.2f}s | Batch: {fan_out:6.2f}s | "
+          f"{len(merged)} merged results from {sum(len(client.search(q)) for q in batch)} raw")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
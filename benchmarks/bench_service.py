@@ -0,0 +1,117 @@
+# benchmarks/bench_service.py
+"""
+Load test of the HTTP service mode on localhost, offline.
+
+Starts AgentService in-process with the fakes from benchmarks/fakes.py
+(latency-configurable Gemini and tools) and drives it over HTTP:
+  * closed-loop clients against /ask: throughput and latency percentiles;
+  * a burst larger than workers + queue: how many requests are shed with 503;
+  * /ask/stream: time to the first graph event vs. to the final answer;
+  * a request with a timeout shorter than the run: 504.
+
+Usage:
+    python -m benchmarks.bench_service [--clients 16] [--requests 64] [--workers 4] [--queue-size 8]
+"""
+
+import json
+import time
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import offline_stubs
+
+QUESTION = "How many moons does the answer have times two?"
+PLAN = [("search_web", {"query": "the answer"}), ("calculate_expression", {"expression": "42 * 2"})]
+
+
+def post(base_url: str, path: str, payload: dict):
+    request = urllib.request.Request(base_url + path, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent closed-loop clients.")
+    parser.add_argument("--requests", type=int, default=64, help="Requests in the closed-loop phase.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="Seconds per fake LLM call.")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Seconds per fake tool call.")
+    args = parser.parse_args()
+
+    from agent_core.agent_wrapper import BasicAgent
+    from agent_core.batch_runner import percentile
+    from agent_core.service import AgentService, serve
+
+    with offline_stubs(args.llm_latency, args.tool_latency, plans={QUESTION: PLAN}):
+        service = AgentService(BasicAgent(verbose=False), workers=args.workers, queue_size=args.queue_size)
+        server = serve(service, "127.0.0.1", 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        post(base_url, "/ask", {"question": QUESTION})   # warm-up
+
+        # 1. Closed loop: every client retries on 503 after a short pause
+        latencies, statuses = [], []
+
+        def client_call(_):
+            start = time.perf_counter()
+            while True:
+                status, _body = post(base_url, "/ask", {"question": QUESTION})
+                if status != 503:
+                    break
+                time.sleep(0.05)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            list(pool.map(client_call, range(args.requests)))
+        wall = time.perf_counter() - start
+        print(f"\n--- {args.requests} requests, {args.clients} clients, {args.workers} workers, "
+              f"queue {args.queue_size} (LLM {args.llm_latency * 1000:.0f} ms, tools {args.tool_latency * 1000:.0f} ms) ---")
+        print(f"Throughput: {args.requests / wall:.1f} req/s | p50 {percentile(latencies, 50) * 1000:.0f} ms "
+              f"| p95 {percentile(latencies, 95) * 1000:.0f} ms | non-200: {sum(s != 200 for s in statuses)}")
+
+        # 2. Burst with no retries: capacity is workers + queue, the rest is shed
+        burst = args.workers + args.queue_size + 12
+        with ThreadPoolExecutor(max_workers=burst) as pool:
+            codes = list(pool.map(lambda _: post(base_url, "/ask", {"question": QUESTION})[0], range(burst)))
+        print(f"Burst of {burst}: {codes.count(200)} answered, {codes.count(503)} rejected with 503")
+
+        # 3. Streaming
+        request = urllib.request.Request(base_url + "/ask/stream", data=json.dumps({"question": QUESTION}).encode("utf-8"))
+        start = time.perf_counter()
+        first_node, events = None, []
+        with urllib.request.urlopen(request, timeout=60) as response:
+            for line in response:
+                event = json.loads(line)
+                events.append(event["event"] + (f":{event['node']}" if event.get("node") else ""))
+                if event["event"] == "node" and first_node is None:
+                    first_node = time.perf_counter() - start
+        total = time.perf_counter() - start
+        print(f"Stream: first node event after {first_node * 1000:.0f} ms, final after {total * 1000:.0f} ms")
+        print(f"        {' -> '.join(events)}")
+
+        # 4. Per-request timeout
+        status, body = post(base_url, "/ask", {"question": QUESTION, "timeout_s": args.llm_latency / 2})
+        print(f"Timeout {args.llm_latency / 2 * 1000:.0f} ms: HTTP {status} {json.loads(body)}")
+
+        time.sleep(args.llm_latency * 3)   # let the cancelled run stop at its next step
+        print(f"Service stats: {service.stats()}")
+        metrics = urllib.request.urlopen(base_url + "/metrics").read().decode("utf-8")
+        print("".join(line + "\n" for line in metrics.splitlines() if line.startswith("agent_service") or line.startswith("agent_runs")), end="")
+
+        server.shutdown()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
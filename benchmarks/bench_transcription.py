@@ -0,0 +1,119 @@
+# benchmarks/bench_transcription.py
+"""
+Transcription backends compared on one recording: real-time factor, peak
+memory and word error rate.
+
+Each backend runs in its own process, so load time and peak RSS are not
+polluted by the other engine. WER is computed against --reference (a text
+file or literal transcript); without one, the first backend's output is
+used as the reference.
+
+Usage:
+    python -m benchmarks.bench_transcription [test_assets/audio.mp3] [--backends openai-whisper,faster-whisper]
+        [--model-size base] [--threads 4] [--beam-size 1] [--reference transcript.txt] [--repeats 2]
+"""
+
+import os
+import re
+import time
+import argparse
+import resource
+import multiprocessing
+
+
+def normalize_words(text: str) -> list:
+    """Lower-case words without punctuation, as usual for WER."""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / reference words, by word-level edit distance."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_backend(name: str, audio_path: str, model_size: str, threads: int, beam_size: int, repeats: int) -> dict:
+    """Runs in a fresh process: load, warm-up, then timed transcriptions."""
+    from tools.audio_pipeline import SAMPLE_RATE, load_audio
+    from tools.transcription import make_backend
+
+    backend = make_backend(name, threads=threads, beam_size=beam_size)
+    if not backend.available():
+        return {"backend": name, "error": f"package '{backend.package}' is not installed"}
+    audio = load_audio(audio_path)
+    duration_s = len(audio) / SAMPLE_RATE
+    baseline_mb = _peak_rss_mb()
+
+    start = time.perf_counter()
+    model = backend.load_model(model_size)
+    load_s = time.perf_counter() - start
+
+    times, text = [], ""
+    for _ in range(repeats):
+        start = time.perf_counter()
+        text = model.transcribe(audio, **backend.options())["text"].strip()
+        times.append(time.perf_counter() - start)
+    return {
+        "backend": backend.describe(),
+        "duration_s": duration_s,
+        "load_s": load_s,
+        "rtf": min(times) / duration_s,
+        "peak_mb": _peak_rss_mb() - baseline_mb,
+        "text": text,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio_path", nargs="?", default="test_assets/audio.mp3")
+    parser.add_argument("--backends", default="openai-whisper,faster-whisper")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--beam-size", type=int, default=1, help="Same beam for every backend (1 = greedy).")
+    parser.add_argument("--reference", default=None, help="Reference transcript: a text file or the text itself.")
+    parser.add_argument("--repeats", type=int, default=2)
+    args = parser.parse_args()
+
+    reference = args.reference
+    if reference and os.path.exists(reference):
+        with open(reference, "r", encoding="utf-8") as f:
+            reference = f.read()
+
+    # 'spawn' gives every backend a clean process (memory and thread pools)
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        with context.Pool(1) as pool:
+            results.append(pool.apply(_run_backend, (name, args.audio_path, args.model_size,
+                                                     args.threads, args.beam_size, args.repeats)))
+
+    ok = [r for r in results if "error" not in r]
+    if ok and not reference:
+        reference = ok[0]["text"]
+        print(f"(no --reference: WER is measured against {ok[0]['backend']})")
+
+    print(f"\n--- {args.audio_path}, model '{args.model_size}', {args.threads} threads, beam {args.beam_size} ---")
+    print(f"{'backend':<58}{'load s':>8}{'RTF':>7}{'peak MB':>9}{'WER':>7}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<58} skipped: {r['error']}")
+            continue
+        print(f"{r['backend']:<58}{r['load_s']:>8.1f}{r['rtf']:>7.3f}{r['peak_mb']:>9.0f}"
+              f"{word_error_rate(reference, r['text']) * 100:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_whisper_pool.py
+"""
+Cold vs. warm transcription latency for the shared Whisper model pool.
+
+Usage:
+    python -m benchmarks.bench_whisper_pool [audio_path] [--model-size base] [--repeats 3]
+"""
+
+import argparse
+import statistics
+import time
+
+from tools.whisper_pool import WhisperModelPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio_path", nargs="?", default="test_assets/audio.mp3")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # Cold: a fresh pool per call reproduces the old load-on-every-call behaviour.
+    cold = []
+    for _ in range(args.repeats):
+        pool = WhisperModelPool()
+        start = time.perf_counter()
+        with pool.lease(args.model_size) as model:
+            model.transcribe(args.audio_path)
+        cold.append(time.perf_counter() - start)
+
+    # Warm: one shared pool, the model is loaded once before timing.
+    pool = WhisperModelPool()
+    pool.warm([args.model_size])
+    warm = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        with pool.lease(args.model_size) as model:
+            model.transcribe(args.audio_path)
+        warm.append(time.perf_counter() - start)
+
+    print(f"\n--- Whisper pool benchmark ({args.model_size}, {args.repeats} runs) ---")
+    print(f"Cold (load + transcribe): mean {statistics.mean(cold):.2f}s | min {min(cold):.2f}s")
+    print(f"Warm (pooled model):      mean {statistics.mean(warm):.2f}s | min {min(warm):.2f}s")
+    print(f"Speed-up: {statistics.mean(cold) / statistics.mean(warm):.1f}x")
+    print(f"Pool stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
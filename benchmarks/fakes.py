@@ -0,0 +1,233 @@
+# benchmarks/fakes.py
+"""
+Deterministic local stand-ins for Gemini, Gemini Vision, Google Search and
+Whisper, used to drive BasicAgent without network access.
+"""
+
+import sys
+import json
+import time
+import types
+import threading
+import asyncio
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+Plan = List[Tuple[str, Dict[str, Any]]]
+
+
+def approx_tokens(text: str) -> int:
+    """~4 characters per token, good enough for relative comparisons."""
+    return max(1, len(text) // 4)
+
+
+def _question_of(messages: List[BaseMessage]) -> str:
+    humans = [m for m in messages if isinstance(m, HumanMessage)]
+    return str(humans[-1].content) if humans else ""
+
+
+def _is_router_prompt(messages: List[BaseMessage]) -> bool:
+    from agent_core.router import ROUTER_SYSTEM_PROMPT
+    prefix = ROUTER_SYSTEM_PROMPT.split("{tools}")[0]
+    return bool(messages) and isinstance(messages[0], SystemMessage) and str(messages[0].content).startswith(prefix)
+
+
+# --- 1. Main reasoning LLM ---
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that follows a fixed tool plan per question: it requests the
+    plan's tool calls one per turn, then answers with the last observation.
+    Asked the router's classification prompt, it replies with `routes[question]`
+    (default: the full route). Token usage is estimated from the prompt so
+    instrumentation still works.
+    """
+    plans: Dict[str, Plan] = {}
+    routes: Dict[str, Dict[str, Any]] = {}
+    latency_s: float = 0.0
+    model_name: str = "scripted-fake"
+    # Raise on this call number (1-based, 0 = never) to simulate a crash mid-run
+    fail_at_call: int = 0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        # Reported as the model name in the metrics' LLM events
+        return {"model_name": self.model_name}
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool schemas are irrelevant to a scripted model
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if self.calls == self.fail_at_call:
+            raise TimeoutError(f"Simulated LLM failure on call {self.calls}")
+        question = _question_of(messages)
+        if _is_router_prompt(messages):
+            route = self.routes.get(question, {"route": "full", "confidence": 1.0})
+            return self._with_usage(messages, AIMessage(content=json.dumps(route)))
+        plan = self.plans.get(question)
+        if plan is None:
+            plan = [("search_web", {"query": question[:60]})]
+        observations = [m for m in messages if isinstance(m, ToolMessage)]
+        step = len(observations)
+
+        # An instruction after the observations (e.g. the guard's forced final turn) means: answer now
+        forced_final = bool(observations) and isinstance(messages[-1], HumanMessage)
+        if step < len(plan) and not forced_final:
+            name, args = plan[step]
+            message = AIMessage(content="", tool_calls=[
+                {"name": name, "args": args, "id": f"call_{step}", "type": "tool_call"}
+            ])
+        else:
+            last = str(observations[-1].content) if observations else "unknown"
+            answer = last.split(":", 1)[-1].strip()[:80]
+            message = AIMessage(content=f"Thought: I have the observation.\nFINAL ANSWER: {answer}")
+        return self._with_usage(messages, message)
+
+    @staticmethod
+    def _with_usage(messages: List[BaseMessage], message: AIMessage) -> AIMessage:
+        prompt_tokens = sum(approx_tokens(str(m.content)) for m in messages)
+        output_tokens = approx_tokens(str(message.content) or str(message.tool_calls))
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+        }
+        return message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency_s)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency_s)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+
+# --- 2. Vision, search and speech stand-ins ---
+class FakeVisionLLM:
+    """
+    Returns a fixed OCR result after a configurable delay. With `upload_mbps`
+    the delay also grows with the size of the image payload, as on a real link.
+    """
+    def __init__(self, latency_s: float = 0.0, text: str = "Invoice total: 1250", upload_mbps: float = 0.0):
+        self.latency_s = latency_s
+        self.text = text
+        self.upload_mbps = upload_mbps
+        self.calls = 0
+        self.bytes_uploaded = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, messages, *args, **kwargs) -> AIMessage:
+        payload = sum(len(str(m.content)) for m in messages)
+        with self._lock:
+            self.calls += 1
+            self.bytes_uploaded += payload
+        upload_s = payload * 8 / (self.upload_mbps * 1e6) if self.upload_mbps else 0.0
+        time.sleep(self.latency_s + upload_s)
+        return AIMessage(content=self.text)
+
+
+class FakeSearchEngine:
+    """Mimics GoogleSearchClient.run / run_batch with deterministic snippets."""
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+
+    def run(self, query: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return f"Result for '{query}': The answer is 42. Source: example.org"
+
+    def run_batch(self, queries) -> str:
+        return "\n".join(self.run(q) for q in queries)
+
+
+class FakeWhisperModel:
+    """Mimics whisper.Whisper.transcribe."""
+    def __init__(self, latency_s: float = 0.0, text: str = "The year mentioned is 1969."):
+        self.latency_s = latency_s
+        self.text = text
+
+    def transcribe(self, audio, **kwargs) -> dict:
+        time.sleep(self.latency_s)
+        return {"text": self.text}
+
+
+# --- 3. Installation ---
+@contextmanager
+def offline_stubs(llm_latency_s: float = 0.0, tool_latency_s: float = 0.0,
+                  plans: Optional[Dict[str, Plan]] = None, routes: Optional[Dict[str, Dict[str, Any]]] = None,
+                  light_latency_s: Optional[float] = None):
+    """
+    Swaps `llm`, `light_llm`, `vision_llm`, `search_engine` and the Whisper
+    loader for the fakes above and disables the persistent tool cache,
+    restoring everything on exit. The light model follows the same plans and
+    answers the router with `routes`. Yields the installed fakes.
+    """
+    from agent_core import state_and_graph
+    from tools import base_tools, specialized_tools, result_cache
+    from tools.whisper_pool import WhisperModelPool
+
+    fakes = {
+        "llm": ScriptedChatModel(plans=plans or {}, latency_s=llm_latency_s),
+        "light_llm": ScriptedChatModel(plans=plans or {}, routes=routes or {}, model_name="scripted-fake-light",
+                                       latency_s=llm_latency_s if light_latency_s is None else light_latency_s),
+        "vision_llm": FakeVisionLLM(latency_s=tool_latency_s),
+        "search_engine": FakeSearchEngine(latency_s=tool_latency_s),
+        "whisper_pool": WhisperModelPool(loader=lambda size: FakeWhisperModel(latency_s=tool_latency_s),
+                                         verbose=False),
+    }
+    saved = {
+        "llm": state_and_graph.llm,
+        "light_llm": state_and_graph.light_llm,
+        "vision_llm": specialized_tools.vision_llm,
+        "search_engine": base_tools.search_engine,
+        "whisper_pool": specialized_tools.WHISPER_POOL,
+        "load_audio": specialized_tools.load_audio,
+        "cache_disabled": result_cache.TOOL_CACHE_DISABLED,
+    }
+    # audio_to_text only checks that whisper is importable; decoding is faked too
+    added_whisper = "whisper" not in sys.modules and _missing("whisper")
+    if added_whisper:
+        sys.modules["whisper"] = types.ModuleType("whisper")
+
+    state_and_graph.llm = fakes["llm"]
+    state_and_graph.light_llm = fakes["light_llm"]
+    specialized_tools.vision_llm = fakes["vision_llm"]
+    base_tools.search_engine = fakes["search_engine"]
+    specialized_tools.WHISPER_POOL = fakes["whisper_pool"]
+    specialized_tools.load_audio = lambda path: [0.0] * 16000 * 5
+    result_cache.TOOL_CACHE_DISABLED = True
+    try:
+        yield fakes
+    finally:
+        state_and_graph.llm = saved["llm"]
+        state_and_graph.light_llm = saved["light_llm"]
+        specialized_tools.vision_llm = saved["vision_llm"]
+        base_tools.search_engine = saved["search_engine"]
+        specialized_tools.WHISPER_POOL = saved["whisper_pool"]
+        specialized_tools.load_audio = saved["load_audio"]
+        result_cache.TOOL_CACHE_DISABLED = saved["cache_disabled"]
+        if added_whisper:
+            sys.modules.pop("whisper", None)
+
+
+def expect_answer(scenario: str, answer: str, expected: str) -> None:
+    """Fails the benchmark when a run did not produce the scenario's answer (e.g. timed an error path)."""
+    if expected not in str(answer):
+        raise AssertionError(f"{scenario}: expected an answer containing {expected!r}, got {answer!r}")
+
+
+def _missing(module: str) -> bool:
+    import importlib.util
+    return importlib.util.find_spec(module) is None
@@ -0,0 +1,62 @@
+# service_app.py
+
+import sys
+import argparse
+from dotenv import load_dotenv
+
+
+# LOAD ENVIRONMENT VARIABLES (Must be the first executable code)
+try:
+    if not load_dotenv(dotenv_path='.secrets/.env'):
+        print("⚠️ Warning: Could not load .secrets/.env. Keys must be system variables.")
+except Exception as e:
+    print(f"❌ Error attempting to load .secrets/.env: {e}")
+
+from agent_core.agent_wrapper import BasicAgent
+from agent_core.service import (AgentService, serve, SERVICE_HOST, SERVICE_PORT, SERVICE_WORKERS,
+                                SERVICE_QUEUE_SIZE, SERVICE_TIMEOUT_S)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves BasicAgent over a local HTTP API with a bounded worker pool.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Questions run concurrently.")
+    parser.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE,
+                        help="Questions waiting for a worker before new ones get 503.")
+    parser.add_argument("--timeout", type=float, default=SERVICE_TIMEOUT_S, help="Maximum seconds per request.")
+    parser.add_argument("--quiet", action="store_true", help="Silence the agent's per-run debug output.")
+    parser.add_argument("--metrics-path", default=None, help="Append per-run timing/token events to this JSONL file.")
+    parser.add_argument("--checkpoint-path", default=None,
+                        help="SQLite file where every graph step is checkpointed (e.g. .cache/checkpoints.sqlite).")
+    args = parser.parse_args()
+
+    # --- 1. Agent Initialization (paid once for the life of the service) ---
+    try:
+        agent = BasicAgent(verbose=not args.quiet, metrics_path=args.metrics_path, checkpoint_path=args.checkpoint_path)
+        # Build the clients and preload models now rather than on the first request
+        from tools.lazy import unwrap
+        from agent_core.state_and_graph import llm
+        from tools.whisper_pool import warm_whisper_models
+        unwrap(llm)
+        warm_whisper_models()
+    except Exception as e:
+        print(f"❌ ERROR: Failed to initialize BasicAgent. Check your API keys and configuration. Details: {e}")
+        sys.exit(1)
+
+    # --- 2. Serve ---
+    service = AgentService(agent, workers=args.workers, queue_size=args.queue_size, timeout_s=args.timeout)
+    server = serve(service, args.host, args.port)
+    print(f"✅ Agent service listening on http://{args.host}:{server.server_address[1]} "
+          f"({args.workers} workers, queue {args.queue_size}, timeout {args.timeout:.0f}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down: finishing queued questions...")
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,32 @@
-import os
-import whisper
+import sys
+import time
 from pathlib import Path
-from tempfile import NamedTemporaryFile
 
+from tools.audio_pipeline import SAMPLE_RATE, load_audio
+from tools.transcription import TRANSCRIBE_BACKEND, TRANSCRIBE_MODEL_SIZE, make_backend
+
+# Uso: python test.py [ruta_audio] [backend]   (backend: openai-whisper | faster-whisper)
 try:
-    # 1. Rutas
-    audio_path = "test_assets/audio.mp3"
+    # 1. Rutas y backend (por defecto el de TRANSCRIBE_BACKEND)
+    audio_path = sys.argv[1] if len(sys.argv) > 1 else "test_assets/audio.mp3"
     full_path = Path(audio_path).resolve()
-    
-    # 2. Leer bytes y crear temporal
-    with open(full_path, "rb") as audio_file:
-        audio_bytes = audio_file.read()
+    backend = make_backend(sys.argv[2] if len(sys.argv) > 2 else TRANSCRIBE_BACKEND)
+    print(f"Backend: {backend.describe()}, modelo '{TRANSCRIBE_MODEL_SIZE}'")
 
-    with NamedTemporaryFile(suffix=full_path.suffix, delete=False) as temp_f:
-        temp_f.write(audio_bytes)
-        temp_path = temp_f.name
-        
-    print(f"Archivo temporal creado: {temp_path}")
+    # 2. Decodificar el audio directamente desde la ruta (sin copia temporal)
+    audio = load_audio(full_path)
+    duration_s = len(audio) / SAMPLE_RATE
 
     # 3. Ejecutar Transcripción (Punto Crítico)
-    model = whisper.load_model("base")
-    output = model.transcribe(temp_path)["text"].strip()
-    
+    model = backend.load_model(TRANSCRIBE_MODEL_SIZE)
+    start = time.perf_counter()
+    output = model.transcribe(audio, **backend.options())["text"].strip()
+    elapsed = time.perf_counter() - start
+
     print("\n✅ --- TRANSCRIPCIÓN EXITOSA --- ✅")
     print(output)
+    print(f"\n{duration_s:.1f}s de audio en {elapsed:.1f}s (RTF {elapsed / duration_s:.2f})")
 
 except Exception as e:
-    print("\n❌ --- FALLO CRÍTICO DE WHISPER --- ❌")
+    print(f"\n❌ --- FALLO CRÍTICO DE TRANSCRIPCIÓN --- ❌")
     print(f"Error: {e}")
-
-finally:
-    # 4. Limpieza
-    if 'temp_path' in locals() and os.path.exists(temp_path):
-        os.remove(temp_path)
-        print(f"Limpieza finalizada.")
\ No newline at end of file
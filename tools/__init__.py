@@ -1,4 +1,8 @@
 from .base_tools import BASE_TOOLS
 from .specialized_tools import SPECIALIZED_TOOLS
 
-ALL_TOOLS = BASE_TOOLS + SPECIALIZED_TOOLS
\ No newline at end of file
+ALL_TOOLS = BASE_TOOLS + SPECIALIZED_TOOLS
+
+# Name -> tool lookup. Tool schemas are declared at import time, while heavy
+# libraries and API clients are loaded on each tool's first call.
+TOOL_REGISTRY = {t.name: t for t in ALL_TOOLS}
@@ -0,0 +1,180 @@
+# tools/audio_pipeline.py
+
+import os
+import re
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+
+SAMPLE_RATE = 16000  # Whisper models expect 16 kHz mono audio
+
+# Recordings longer than this (seconds) go through the chunked, parallel path.
+LONG_AUDIO_THRESHOLD_S = float(os.getenv("LONG_AUDIO_THRESHOLD_S", "300"))
+AUDIO_PIPELINE_WORKERS = int(os.getenv("AUDIO_PIPELINE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+# --- 1. Decoding ---
+def load_audio(audio_path: str):
+    """
+    Decodes the source file straight into a 16 kHz float32 array via ffmpeg
+    (openai-whisper) or PyAV (faster-whisper, when openai-whisper is absent).
+    No intermediate copy of the file is written to disk.
+    """
+    try:
+        from whisper.audio import load_audio as whisper_load_audio
+    except ImportError:
+        from faster_whisper import decode_audio
+        return decode_audio(str(audio_path), sampling_rate=SAMPLE_RATE)
+    return whisper_load_audio(str(audio_path), sr=SAMPLE_RATE)
+
+
+# --- 2. Segmentation at silence boundaries ---
+def find_segments(audio, segment_s: float = 30.0, overlap_s: float = 1.5,
+                  search_window_s: float = 4.0, frame_s: float = 0.05) -> List[Tuple[int, int]]:
+    """
+    Splits `audio` into (start, end) sample ranges of roughly `segment_s` seconds.
+
+    Each cut is placed at the quietest frame within `search_window_s` before the
+    nominal boundary, so words are rarely split. Every segment after the first
+    starts `overlap_s` earlier than the previous cut; the overlap is removed
+    again when the transcripts are stitched.
+    """
+    import numpy as np
+
+    total = len(audio)
+    segment = int(segment_s * SAMPLE_RATE)
+    if total <= segment:
+        return [(0, total)]
+
+    frame = max(1, int(frame_s * SAMPLE_RATE))
+    n_frames = total // frame
+    energy = np.sqrt(np.mean(audio[: n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+
+    overlap = int(overlap_s * SAMPLE_RATE)
+    window = int(search_window_s * SAMPLE_RATE)
+    segments = []
+    start = 0
+    while start < total:
+        nominal_end = start + segment
+        if nominal_end >= total:
+            segments.append((start, total))
+            break
+        lo_frame = max(start + segment - window, start + overlap + frame) // frame
+        hi_frame = min(nominal_end // frame, n_frames)
+        if hi_frame > lo_frame:
+            cut = (lo_frame + int(np.argmin(energy[lo_frame:hi_frame]))) * frame
+        else:
+            cut = nominal_end
+        segments.append((start, cut))
+        start = max(cut - overlap, start + 1)
+    return segments
+
+
+# --- 3. Stitching ---
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_pair(previous: str, following: str, max_overlap_words: int = 12) -> str:
+    """
+    Removes from the start of `following` the longest run of words that
+    repeats the end of `previous` (the audio overlap), and returns what is left.
+    """
+    prev_words = previous.split()
+    next_words = following.split()
+    prev_norm = [_normalize_word(w) for w in prev_words[-max_overlap_words:]]
+    next_norm = [_normalize_word(w) for w in next_words[:max_overlap_words]]
+    for size in range(min(len(prev_norm), len(next_norm)), 0, -1):
+        if prev_norm[-size:] == next_norm[:size]:
+            return " ".join(next_words[size:])
+    return following.strip()
+
+
+def stitch_transcripts(texts: List[str]) -> str:
+    """Joins segment transcripts in order, dropping duplicated overlap words."""
+    merged = ""
+    for text in texts:
+        piece = stitch_pair(merged, text) if merged else text.strip()
+        if piece:
+            merged = f"{merged} {piece}".strip()
+    return merged
+
+
+# --- 4. Parallel transcription ---
+def _init_worker(threads_per_worker: int) -> None:
+    """Limits the engine's threads so workers do not oversubscribe the CPU."""
+    from .transcription import configure_backend, get_backend
+    # An explicit TRANSCRIBE_THREADS still wins if it is lower
+    threads = min(threads_per_worker, get_backend().threads or threads_per_worker)
+    configure_backend(threads=threads)
+
+
+def _transcribe_segment(job: Tuple[int, object, str]) -> Tuple[int, str]:
+    """Runs in a worker process; each worker keeps its own warm model pool."""
+    index, samples, model_size = job
+    from .whisper_pool import WHISPER_POOL
+    from .transcription import get_backend
+    with WHISPER_POOL.lease(model_size) as model:
+        result = model.transcribe(samples, **{**get_backend().options(), "condition_on_previous_text": False})
+    return index, result["text"].strip()
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Returns the shared process pool, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, AUDIO_PIPELINE_WORKERS)
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            # 'spawn' avoids forking a parent that may already hold torch threads
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads,),
+            )
+        return _executor
+
+
+def iter_transcribe_long_audio(audio, model_size: str = "base", segment_s: float = 30.0,
+                               overlap_s: float = 1.5) -> Iterator[str]:
+    """
+    Transcribes a decoded recording (or a path) segment by segment in parallel.
+
+    Yields the stitched transcript so far every time the next in-order
+    segment finishes, so callers can consume partial text while later
+    segments are still running. The last value yielded is the full transcript.
+    """
+    if isinstance(audio, (str, os.PathLike)):
+        audio = load_audio(audio)
+
+    segments = find_segments(audio, segment_s=segment_s, overlap_s=overlap_s)
+    executor = get_executor()
+    futures = [
+        executor.submit(_transcribe_segment, (i, audio[start:end], model_size))
+        for i, (start, end) in enumerate(segments)
+    ]
+
+    merged = ""
+    # Consume in submission order: partial text is always a clean prefix
+    for future in futures:
+        _, text = future.result()
+        piece = stitch_pair(merged, text) if merged else text.strip()
+        if piece:
+            merged = f"{merged} {piece}".strip()
+        yield merged
+
+
+def transcribe_long_audio(audio, model_size: str = "base",
+                          on_partial: Optional[Callable[[str], None]] = None, **kwargs) -> str:
+    """Blocking wrapper around `iter_transcribe_long_audio`; returns the full text."""
+    transcript = ""
+    for transcript in iter_transcribe_long_audio(audio, model_size=model_size, **kwargs):
+        if on_partial:
+            on_partial(transcript)
+    return transcript
@@ -1,15 +1,13 @@
 import os
 import math
-import base64
-from langchain_core.messages import HumanMessage
-from langchain_core.tools import Tool, tool as langchain_tool_decorator
-from langchain_google_community import GoogleSearchAPIWrapper
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import List
+from langchain_core.tools import tool as langchain_tool_decorator
+
+from .lazy import LazyObject
+from .relevance_index import focus_output
 
 os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY") or ""
 os.environ["GOOGLE_CSE_ID"] = os.getenv("GOOGLE_CSE_ID") or ""
-
-vision_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
     
 
 # --- 2. Calculation Tool ---
@@ -33,21 +31,43 @@ def calculate_expression(expression: str) -> str:
         return f"Calculation Error: Invalid expression or syntax. Details: {e}"
 
 # --- 3. Web Search Tool ---
-search_engine = GoogleSearchAPIWrapper(k=3)
+def _build_search_engine():
+    # Pooled HTTP session + normalized-query TTL cache (see tools/search_client.py)
+    from .search_client import GoogleSearchClient
+    return GoogleSearchClient(k=3)
+
+search_engine = LazyObject(_build_search_engine, name="GoogleSearchClient")
 
 @langchain_tool_decorator
-def search_web(query: str) -> str:
+def search_web(query: str, question: str = "", page: int = 1) -> str:
     """
     Searches for **up-to-date** external information on the web via Google. 
     Use this for real-time data or facts beyond the knowledge cutoff.
     The 'query' argument must be a concise and specific search phrase.
+    Long results are returned in parts: pass the user's 'question' to get the most
+    relevant parts first, and 'page' (2, 3, ...) to read further.
+    """
+    # Llama a la función run del cliente (resultados repetidos salen de la caché)
+    try:
+        # Se ordena por la pregunta del usuario; sin ella, por la consulta
+        return focus_output(search_engine.run(query), question or query, page)
+    except Exception as e:
+        return f"ERROR executing web search. The API failed: {e}"
+
+@langchain_tool_decorator
+def search_web_batch(queries: List[str], question: str = "") -> str:
+    """
+    Runs several web searches at once (e.g. one per entity to compare) and returns
+    the merged results without duplicates, each tagged with its query.
+    Prefer this over several consecutive 'search_web' calls.
+    Pass the user's 'question' to get the most relevant parts of long results.
     """
-    # Llama a la función run del wrapper
     try:
-        return search_engine.run(query) 
+        merged = search_engine.run_batch(queries)
+        return focus_output(merged, question or " ".join(queries))
     except Exception as e:
         return f"ERROR executing web search. The API failed: {e}"
 
 # --- List of all available tools ---
 # This list is imported by state_and_graph.py
-BASE_TOOLS = [calculate_expression, search_web]
+BASE_TOOLS = [calculate_expression, search_web, search_web_batch]
@@ -0,0 +1,202 @@
+# tools/code_executor.py
+
+import io
+import os
+import time
+import atexit
+import threading
+import multiprocessing
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+QUERY_WORKERS = int(os.getenv("QUERY_WORKERS", str(min(4, os.cpu_count() or 1))))
+QUERY_TIMEOUT_S = float(os.getenv("QUERY_TIMEOUT_S", "60"))
+QUERY_MEMORY_MB = int(os.getenv("QUERY_MEMORY_MB", "4096"))
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of one code execution in a worker process."""
+    ok: bool
+    output: str = ""
+    error: str = ""
+    columns: Optional[List[str]] = None
+    elapsed_s: float = 0.0
+
+
+# --- 1. Worker process ---
+def _apply_memory_limit(memory_mb: int) -> None:
+    """Caps the worker's address space (POSIX only)."""
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _worker_main(conn, memory_mb: int) -> None:
+    """
+    Worker loop: keeps pandas imported and DataFrames cached between jobs.
+    Each job runs with its own stdout buffer, so output never leaks across calls.
+    """
+    import pandas as pd
+    from .dataframe_cache import load_dataframe
+
+    _apply_memory_limit(memory_mb)
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        kind, data_path, code_query = job
+        df = None
+        try:
+            df = load_dataframe(data_path)
+            # Replace spaces in column names for easier Agent code generation
+            df.columns = df.columns.str.replace(' ', '_', regex=False)
+            if kind == "load":
+                conn.send(("ok", "", None))
+                continue
+
+            stdout_capture = io.StringIO()
+            with redirect_stdout(stdout_capture):
+                exec(code_query, {'df': df, 'pd': pd, 'os': os})
+            conn.send(("ok", stdout_capture.getvalue().strip(), None))
+        except BaseException as e:
+            columns = [str(c) for c in df.columns] if df is not None else None
+            conn.send(("error", str(e) or type(e).__name__, columns))
+
+
+# --- 2. Parent-side pool ---
+@dataclass
+class _Worker:
+    process: object
+    conn: object
+    recent_files: List[str] = field(default_factory=list)
+
+
+class CodeExecutorPool:
+    """
+    Pool of pre-started worker processes that execute LLM-generated pandas code.
+
+    Every call gets a wall-clock timeout and can be cancelled through a
+    `threading.Event`; a worker that times out, is cancelled or dies is killed
+    and replaced, so one runaway query never blocks the others.
+    """
+    def __init__(self, workers: int = QUERY_WORKERS, timeout_s: float = QUERY_TIMEOUT_S,
+                 memory_mb: int = QUERY_MEMORY_MB):
+        self.size = max(1, workers)
+        self.timeout_s = timeout_s
+        self.memory_mb = memory_mb
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._cond = threading.Condition()
+        self._started = False
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(target=_worker_main, args=(child_conn, self.memory_mb), daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process=process, conn=parent_conn)
+
+    def start(self) -> None:
+        """Starts all workers (done lazily on the first execution)."""
+        with self._cond:
+            if self._started:
+                return
+            self._idle = [self._spawn() for _ in range(self.size)]
+            self._started = True
+            atexit.register(self.shutdown)
+
+    def _acquire(self, data_path: str, deadline: float) -> Optional[_Worker]:
+        with self._cond:
+            while not self._idle:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            # Prefer a worker that already holds this file in its cache
+            for i, worker in enumerate(self._idle):
+                if data_path in worker.recent_files:
+                    return self._idle.pop(i)
+            return self._idle.pop()
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if not healthy:
+            worker.process.kill()
+            worker.process.join(timeout=5)
+            worker = self._spawn()
+        with self._cond:
+            self._idle.append(worker)
+            self._cond.notify()
+
+    def _run(self, kind: str, data_path: str, code_query: str, timeout: Optional[float],
+             cancel_event: Optional[threading.Event]) -> ExecutionResult:
+        self.start()
+        start = time.monotonic()
+        deadline = start + (timeout if timeout is not None else self.timeout_s)
+
+        worker = self._acquire(data_path, deadline)
+        if worker is None:
+            return ExecutionResult(ok=False, error="Timed out waiting for a free query worker.")
+
+        healthy = False
+        try:
+            worker.conn.send((kind, data_path, code_query))
+            while not worker.conn.poll(0.05):
+                if cancel_event is not None and cancel_event.is_set():
+                    return ExecutionResult(ok=False, error="Execution cancelled.", elapsed_s=time.monotonic() - start)
+                if time.monotonic() > deadline:
+                    return ExecutionResult(ok=False, error=f"Execution timed out after {deadline - start:.0f}s.",
+                                           elapsed_s=time.monotonic() - start)
+                if not worker.process.is_alive():
+                    return ExecutionResult(ok=False, error="Query worker crashed (possibly out of memory).",
+                                           elapsed_s=time.monotonic() - start)
+            status, payload, columns = worker.conn.recv()
+            healthy = True
+            if data_path not in worker.recent_files:
+                worker.recent_files = (worker.recent_files + [data_path])[-4:]
+            elapsed = time.monotonic() - start
+            if status == "ok":
+                return ExecutionResult(ok=True, output=payload, elapsed_s=elapsed)
+            return ExecutionResult(ok=False, error=payload, columns=columns, elapsed_s=elapsed)
+        except (EOFError, OSError) as e:
+            return ExecutionResult(ok=False, error=f"Query worker failed: {e}", elapsed_s=time.monotonic() - start)
+        finally:
+            self._release(worker, healthy)
+
+    # --- Public API ---
+    def execute(self, data_path: str, code_query: str, timeout: Optional[float] = None,
+                cancel_event: Optional[threading.Event] = None) -> ExecutionResult:
+        """Runs `code_query` against the DataFrame loaded from `data_path` in a worker."""
+        return self._run("exec", str(data_path), code_query, timeout, cancel_event)
+
+    def preload(self, data_path: str, timeout: Optional[float] = None) -> ExecutionResult:
+        """Loads `data_path` into one worker's DataFrame cache ahead of a query."""
+        return self._run("load", str(data_path), "", timeout, None)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            for worker in self._idle:
+                worker.process.kill()
+            self._idle = []
+            self._started = False
+
+
+_pool: Optional[CodeExecutorPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_code_executor() -> CodeExecutorPool:
+    """Returns the shared worker pool (workers start on the first query)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CodeExecutorPool()
+        return _pool
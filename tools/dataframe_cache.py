@@ -0,0 +1,169 @@
+# tools/dataframe_cache.py
+
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Tuple
+
+DATAFRAME_CACHE_MAX_MB = float(os.getenv("DATAFRAME_CACHE_MAX_MB", "1024"))
+DATAFRAME_SIDECAR = os.getenv("DATAFRAME_SIDECAR", "1").lower() in ("1", "true", "yes")
+DATAFRAME_SIDECAR_DIR = os.getenv("DATAFRAME_SIDECAR_DIR", ".cache/dataframes")
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+
+def _file_key(full_path: Path) -> Tuple[str, int, int]:
+    stat = full_path.stat()
+    return (str(full_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _parse_file(full_path: Path):
+    """Parses the source file with pandas (the slow path)."""
+    import pandas as pd
+    extension = full_path.suffix.lower()
+    if extension == '.csv':
+        return pd.read_csv(full_path, encoding='utf-8')
+    if extension in ('.xlsx', '.xls'):
+        return pd.read_excel(full_path)
+    raise ValueError(f"Unsupported file format: {extension}. Only CSV, XLSX, and XLS are supported.")
+
+
+class DataFrameCache:
+    """
+    In-process LRU cache of parsed DataFrames keyed by (path, mtime, size).
+
+    On a miss the file is parsed once and, when pyarrow is available, an
+    uncompressed Arrow (Feather) sidecar is written next to the cache so
+    later processes can memory-map it instead of re-parsing CSV/Excel.
+    """
+    def __init__(self, max_memory_mb: float = DATAFRAME_CACHE_MAX_MB,
+                 sidecar: bool = DATAFRAME_SIDECAR, sidecar_dir: str = DATAFRAME_SIDECAR_DIR):
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.sidecar = sidecar
+        self.sidecar_dir = Path(sidecar_dir)
+        self._frames: "OrderedDict[Tuple[str, int, int], Tuple[object, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Tuple[str, int, int], threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.sidecar_hits = 0
+
+    # --- Sidecar files ---
+    def _sidecar_path(self, key: Tuple[str, int, int]) -> Path:
+        path_hash = hashlib.sha1(key[0].encode("utf-8")).hexdigest()[:16]
+        return self.sidecar_dir / f"{path_hash}-{key[1]}-{key[2]}.arrow"
+
+    def _read_sidecar(self, sidecar_path: Path):
+        if not self.sidecar or not sidecar_path.exists():
+            return None
+        try:
+            import pyarrow.feather as feather
+            return feather.read_table(sidecar_path, memory_map=True).to_pandas()
+        except Exception as e:
+            print(f"⚠️ Could not read DataFrame sidecar {sidecar_path}: {e}")
+            return None
+
+    def _write_sidecar(self, sidecar_path: Path, df) -> None:
+        if not self.sidecar:
+            return
+        try:
+            import pyarrow.feather as feather
+        except ImportError:
+            return
+        try:
+            self.sidecar_dir.mkdir(parents=True, exist_ok=True)
+            # Remove sidecars left by older versions of the same file
+            for stale in self.sidecar_dir.glob(sidecar_path.name.split("-")[0] + "-*.arrow"):
+                if stale != sidecar_path:
+                    stale.unlink(missing_ok=True)
+            # Unique per writer: worker processes share this directory and may
+            # write the same sidecar at once; only complete files are renamed in
+            fd, tmp_name = tempfile.mkstemp(dir=self.sidecar_dir, prefix=sidecar_path.stem + ".", suffix=".tmp")
+            os.close(fd)
+            try:
+                feather.write_feather(df, tmp_name, compression="uncompressed")
+                os.replace(tmp_name, sidecar_path)
+            finally:
+                Path(tmp_name).unlink(missing_ok=True)
+        except Exception as e:
+            # Mixed-type object columns cannot always be stored as Arrow
+            print(f"⚠️ Skipping DataFrame sidecar for {sidecar_path.name}: {e}")
+
+    # --- LRU bookkeeping ---
+    def _store(self, key, df) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            self._frames[key] = (df, size)
+            self._frames.move_to_end(key)
+            while sum(s for _, s in self._frames.values()) > self.max_bytes:
+                self._frames.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._lock:
+            item = self._frames.get(key)
+            if item is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            return None
+
+    # --- Public API ---
+    def load(self, file_path, copy: bool = True):
+        """
+        Returns the DataFrame for `file_path`, parsing it only when the file
+        changed since the last load. A copy is returned by default so callers
+        may mutate it freely.
+        """
+        full_path = Path(file_path).resolve()
+        if full_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file format: {full_path.suffix.lower()}. Only CSV, XLSX, and XLS are supported.")
+        key = _file_key(full_path)
+
+        df = self._lookup(key)
+        if df is None:
+            with self._lock:
+                load_lock = self._loading.setdefault(key, threading.Lock())
+            with load_lock:
+                df = self._lookup(key)
+                if df is None:
+                    self.misses += 1
+                    sidecar_path = self._sidecar_path(key)
+                    df = self._read_sidecar(sidecar_path)
+                    if df is not None:
+                        self.sidecar_hits += 1
+                    else:
+                        df = _parse_file(full_path)
+                        self._write_sidecar(sidecar_path, df)
+                    self._store(key, df)
+                with self._lock:
+                    self._loading.pop(key, None)
+
+        return df.copy() if copy else df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "bytes": sum(s for _, s in self._frames.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "sidecar_hits": self.sidecar_hits,
+            }
+
+
+DATAFRAME_CACHE = DataFrameCache()
+
+
+def load_dataframe(file_path, copy: bool = True):
+    """Loads a CSV/Excel file through the shared DATAFRAME_CACHE."""
+    return DATAFRAME_CACHE.load(file_path, copy=copy)
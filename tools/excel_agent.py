@@ -0,0 +1,141 @@
+# tools/excel_agent.py
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+from .lazy import LazyObject, unwrap
+from .llm_scheduler import gemini_client
+from .dataframe_cache import load_dataframe, _file_key
+
+ANSWER_EXCEL_CACHE_SIZE = int(os.getenv("ANSWER_EXCEL_CACHE_SIZE", "8"))
+PROFILE_MAX_COLUMNS = 60
+PROFILE_SAMPLE_ROWS = 3
+PROFILE_TOP_VALUES = 5
+
+PANDAS_AGENT_PREFIX = (
+    "You are working with a pandas dataframe in Python. The name of the dataframe is `df`.\n"
+    "Its schema and statistics were profiled in advance, so do not spend steps re-inspecting "
+    "columns or dtypes; go straight to the computation the question needs.\n\n"
+    "{profile}\n\n"
+    "You should use the tools below to answer the question posed of you:"
+)
+
+
+def _build_excel_llm():
+    return gemini_client("excel")
+
+# One client shared by every pandas agent instead of one per call
+excel_llm = LazyObject(_build_excel_llm, name="pandas agent ChatGoogleGenerativeAI")
+
+
+# --- 1. Schema / statistics profile ---
+def profile_dataframe(df) -> str:
+    """
+    Compact description of a DataFrame: shape, and per column the dtype,
+    null count, cardinality, range (numeric) or top values (low-cardinality
+    text), followed by a few sample rows.
+    """
+    import pandas as pd
+
+    lines = [f"DataFrame shape: {df.shape[0]} rows x {df.shape[1]} columns", "Columns:"]
+    for name in list(df.columns)[:PROFILE_MAX_COLUMNS]:
+        column = df[name]
+        nulls = int(column.isna().sum())
+        try:
+            unique = int(column.nunique(dropna=True))
+        except TypeError:
+            unique = -1
+        detail = ""
+        if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column) and column.notna().any():
+            detail = f", min={column.min()}, max={column.max()}, mean={column.mean():.4g}"
+        elif pd.api.types.is_datetime64_any_dtype(column) and column.notna().any():
+            detail = f", from {column.min()} to {column.max()}"
+        elif 0 < unique <= 20:
+            top = column.value_counts(dropna=True).head(PROFILE_TOP_VALUES).index.tolist()
+            detail = f", values e.g. {top}"
+        lines.append(f"- {name!r}: {column.dtype}, {nulls} nulls, {unique if unique >= 0 else '?'} unique{detail}")
+    if df.shape[1] > PROFILE_MAX_COLUMNS:
+        lines.append(f"- ... and {df.shape[1] - PROFILE_MAX_COLUMNS} more columns")
+    with pd.option_context("display.max_columns", PROFILE_MAX_COLUMNS, "display.width", 200):
+        lines.append(f"Sample rows:\n{df.head(PROFILE_SAMPLE_ROWS).to_string()}")
+    return "\n".join(lines)
+
+
+# --- 2. Profile cache ---
+class DataFrameProfileCache:
+    """
+    LRU of file profiles keyed by (path, mtime, size), so a file is profiled
+    once and every later question about it reuses the profile. Executors are
+    not cached (see build_pandas_agent).
+    """
+    def __init__(self, max_entries: int = ANSWER_EXCEL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def profile(self, full_path: Path, df) -> str:
+        """The cached profile of the current version of the file, computed from `df` on a miss."""
+        key = _file_key(full_path)
+        with self._lock:
+            profile = self._entries.get(key)
+            if profile is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return profile
+            self.misses += 1
+
+        profile = profile_dataframe(df)
+        with self._lock:
+            # Drop profiles of older versions of the same file
+            for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                del self._entries[stale]
+            profile = self._entries.setdefault(key, profile)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return profile
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"profiles": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+PROFILE_CACHE = DataFrameProfileCache()
+
+
+# --- 3. Per-question pandas agent ---
+def build_pandas_agent(file_path) -> tuple:
+    """
+    Returns (executor, profile): a fresh pandas agent over a private copy of
+    the file's DataFrame, prompted with the cached profile. The agent's Python
+    tool keeps `df` and its variables between steps, so code run for one
+    question (e.g. `df.dropna(inplace=True)`) must not change what the next
+    one sees; building the executor is cheap next to parsing and profiling.
+    """
+    from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
+
+    full_path = Path(file_path).resolve()
+    # Private copy (the parsed frame itself stays in the DataFrame cache)
+    df = load_dataframe(full_path, copy=True)
+    profile = PROFILE_CACHE.profile(full_path, df)
+    executor = create_pandas_dataframe_agent(
+        unwrap(excel_llm),
+        df,
+        # ZERO_SHOT_REACT_DESCRIPTION or tool-calling works well here
+        agent_type="zero-shot-react-description",
+        # Braces in values or column names must not be read as prompt variables
+        prefix=PANDAS_AGENT_PREFIX.format(profile=profile.replace("{", "{{").replace("}", "}}")),
+        # The profile already carries sample rows
+        include_df_in_prompt=False,
+        verbose=False, # Set to True for debugging the internal agent
+        allow_dangerous_code=True # IMPORTANT: Required to execute code for analysis
+    )
+    return executor, profile
@@ -0,0 +1,158 @@
+# tools/image_preprocess.py
+
+import io
+import os
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+# Longest side sent to the vision model; larger images are downscaled (text
+# stays legible for OCR well below camera resolutions).
+IMAGE_MAX_SIDE = int(os.getenv("IMAGE_MAX_SIDE", "2048"))
+# Legibility threshold: downscaling an image whose longest side exceeds this
+# (e.g. a full-resolution scanned page) to IMAGE_MAX_SIDE would make its text
+# unreadable. Such an image is sent as is when its file is at most
+# IMAGE_MAX_UPLOAD_KB in an accepted format, and only otherwise split into
+# IMAGE_TILE_SIZE tiles along that side: tiles keep the text legible but cost
+# more requests and usually more bytes than one whole upload.
+IMAGE_TILE_THRESHOLD = int(os.getenv("IMAGE_TILE_THRESHOLD", "4096"))
+IMAGE_MAX_UPLOAD_KB = int(os.getenv("IMAGE_MAX_UPLOAD_KB", "1024"))
+IMAGE_TILE_SIZE = int(os.getenv("IMAGE_TILE_SIZE", "2048"))
+IMAGE_TILE_OVERLAP = 64
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_TILE_WORKERS = int(os.getenv("IMAGE_TILE_WORKERS", "4"))
+
+# Formats the vision model accepts as uploaded, without re-encoding
+_UPLOAD_MIME_TYPES = ("image/png", "image/jpeg", "image/webp")
+
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def detect_mime_type(data: bytes) -> Optional[str]:
+    """Image MIME type from the file's magic bytes (the extension is not trusted)."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[4:8] == b"ftyp" and data[8:12] in (b"heic", b"heix", b"mif1", b"heif"):
+        return "image/heic"
+    for signature, mime in _SIGNATURES:
+        if data.startswith(signature):
+            return mime
+    return None
+
+
+@dataclass
+class PreparedImage:
+    """One payload for the vision model: the whole image or one tile of it."""
+    data: bytes
+    mime_type: str
+    width: int = 0
+    height: int = 0
+    index: int = 0          # tile position in reading order (row-major)
+    count: int = 1          # number of tiles for the source image
+
+    @property
+    def data_url(self) -> str:
+        import base64
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+
+def _encode(image, source_mime: str) -> PreparedImage:
+    """Re-encodes a Pillow image: JPEG for photos, optimized PNG for everything else."""
+    buffer = io.BytesIO()
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if source_mime in ("image/jpeg", "image/heic", "image/webp") and not has_alpha:
+        image.convert("RGB").save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+        mime = "image/jpeg"
+    else:
+        if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        image.save(buffer, format="PNG")
+        mime = "image/png"
+    return PreparedImage(buffer.getvalue(), mime, image.width, image.height)
+
+
+def _tile_boxes(width: int, height: int, tile: int, overlap: int, threshold: int) -> List[tuple]:
+    """
+    Row-major crop boxes covering the image, with a small overlap so no text
+    line is cut in two. Only an axis longer than `threshold` is split, so a
+    tall scanned page becomes full-width horizontal bands.
+    """
+    def spans(size):
+        if size <= threshold or size <= tile:
+            return [(0, size)]
+        count = -(-(size - overlap) // (tile - overlap))
+        step = (size - tile) / (count - 1)
+        return [(round(i * step), round(i * step) + tile) for i in range(count)]
+    return [(left, top, right, bottom) for top, bottom in spans(height) for left, right in spans(width)]
+
+
+def prepare_image(data: bytes, max_side: int = IMAGE_MAX_SIDE, tile_threshold: int = IMAGE_TILE_THRESHOLD,
+                  tile_size: int = IMAGE_TILE_SIZE, max_upload_kb: int = IMAGE_MAX_UPLOAD_KB) -> List[PreparedImage]:
+    """
+    Turns raw image bytes into one or more payloads ready for upload.
+
+    Without Pillow the original bytes are sent with their real MIME type.
+    With Pillow the image is rotated per EXIF, downscaled to `max_side` and
+    re-encoded (the original is kept when it is already smaller). When its
+    longest side exceeds `tile_threshold` the downscale would not be legible:
+    the original is sent whole if it is at most `max_upload_kb`, otherwise it
+    is split into full-resolution tiles.
+    """
+    source_mime = detect_mime_type(data) or "image/png"
+    original = PreparedImage(data, source_mime)
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return [original]
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        # Read from the header, before decoding; EXIF rotation keeps the longest side
+        too_large = max(image.size) > tile_threshold
+        if too_large and source_mime in _UPLOAD_MIME_TYPES and len(data) <= max_upload_kb * 1024:
+            # One full-resolution upload is smaller and faster than the tiles
+            original.width, original.height = image.size
+            return [original]
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except Exception as e:
+        print(f"⚠️ Could not decode image for preprocessing, sending it as is: {e}")
+        return [original]
+
+    original.width, original.height = image.size
+    if too_large:
+        boxes = _tile_boxes(image.width, image.height, tile_size, IMAGE_TILE_OVERLAP, tile_threshold)
+        # Tiles keep full resolution (legibility is the reason to tile at all);
+        # Pillow releases the GIL while encoding, so tiles are encoded in parallel.
+        with ThreadPoolExecutor(max_workers=min(IMAGE_TILE_WORKERS, len(boxes))) as pool:
+            tiles = list(pool.map(lambda box: _encode(image.crop(box), source_mime), boxes))
+        for i, prepared in enumerate(tiles):
+            prepared.index, prepared.count = i, len(boxes)
+        return tiles
+
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    prepared = _encode(image, source_mime)
+    if len(prepared.data) >= len(data) and source_mime in _UPLOAD_MIME_TYPES:
+        # Already compact and in a format the model accepts: keep the original bytes
+        return [original]
+    return [prepared]
+
+
+def merge_tile_texts(texts: List[str]) -> str:
+    """Joins per-tile text in reading order, dropping lines repeated across a tile overlap."""
+    merged: List[str] = []
+    for text in texts:
+        lines = text.strip().splitlines()
+        while lines and merged and lines[0].strip() and lines[0].strip() == merged[-1].strip():
+            lines.pop(0)
+        merged.extend(lines)
+    return "\n".join(merged).strip()
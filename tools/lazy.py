@@ -0,0 +1,49 @@
+# tools/lazy.py
+
+import threading
+from typing import Any, Callable
+
+
+class LazyObject:
+    """
+    Stand-in for an expensive client (LLM, search wrapper, ...) that is only
+    imported and constructed on first use.
+
+    Attribute access is forwarded to the real object, so call sites such as
+    `vision_llm.invoke(...)` work unchanged. Module-level instances can still be
+    replaced outright (e.g. with a fake in benchmarks).
+    """
+    def __init__(self, factory: Callable[[], Any], name: str = ""):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "lazy object"))
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get(self) -> Any:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    @property
+    def is_loaded(self) -> bool:
+        return object.__getattribute__(self, "_instance") is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyObject {object.__getattribute__(self, '_name')} ({state})>"
+
+
+def unwrap(obj: Any) -> Any:
+    """Returns the real object behind a LazyObject (building it if needed)."""
+    return obj._get() if isinstance(obj, LazyObject) else obj
@@ -0,0 +1,296 @@
+# tools/llm_scheduler.py
+
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Per-model quotas shared by every Gemini client in the process (Gemini
+# enforces requests/min and tokens/min per model and API key).
+GEMINI_SCHEDULER = os.getenv("GEMINI_SCHEDULER", "1").lower() not in ("0", "false", "no")
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "1000"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+# Upper bound of the adaptive in-flight limit per model
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "6"))
+GEMINI_BACKOFF_BASE_S = 1.0
+GEMINI_BACKOFF_MAX_S = 60.0
+# Cheaper model used by the router for classification and simple questions
+GEMINI_LIGHT_MODEL = os.getenv("GEMINI_LIGHT_MODEL", "gemini-2.0-flash-lite")
+
+# Lower value = served first when calls queue up for the same model
+PRIORITY_MAIN = 0        # the agent's reasoning loop
+PRIORITY_SUBAGENT = 1    # vision OCR, pandas agent, summaries
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for quota errors (HTTP 429 / RESOURCE_EXHAUSTED) from any client layer."""
+    if getattr(error, "code", None) == 429 or type(error).__name__ in ("ResourceExhausted", "RateLimitError"):
+        return True
+    text = str(error)
+    return "RESOURCE_EXHAUSTED" in text or ("429" in text and "quota" in text.lower())
+
+
+def estimate_tokens(messages: Any) -> int:
+    """~4 characters per token over the prompt, used until the response reports real usage."""
+    total = 0
+    for message in messages or []:
+        content = getattr(message, "content", message)
+        if isinstance(content, list):
+            # Multimodal parts: count text, and a flat cost per image
+            total += sum(len(str(part.get("text", ""))) if isinstance(part, dict) and part.get("type") == "text"
+                         else 1032 for part in content)
+        else:
+            total += len(str(content))
+    return max(1, total // 4)
+
+
+# --- 1. Token buckets ---
+class TokenBucket:
+    """Refills continuously at `per_window / window_s` units per second, up to one window's worth."""
+    def __init__(self, per_window: float, window_s: float = 60.0):
+        self.capacity = float(per_window)
+        self.rate = self.capacity / window_s
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float, now: float) -> None:
+        """Consumes `amount` units; a negative amount refunds an over-estimate."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+
+class _ModelLimiter:
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int, window_s: float):
+        self.requests = TokenBucket(rpm, window_s)
+        self.tokens = TokenBucket(tpm, window_s)
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency          # adaptive in-flight limit
+        self.in_flight = 0
+        self.successes = 0
+        self.paused_until = 0.0
+        self.waiters = []                     # heap of (priority, seq)
+
+
+# --- 2. Scheduler ---
+class GeminiScheduler:
+    """
+    Admission control for every Gemini call in the process, per model:
+      * request and token buckets sized to the RPM/TPM quota, so calls wait
+        locally instead of being rejected by the API;
+      * an adaptive in-flight limit (halved on a 429, raised by one after a
+        full window of successes);
+      * jittered exponential backoff on 429, pausing the whole model so the
+        other callers back off too;
+      * strict priority: a waiting main-loop call is admitted before any
+        sub-agent call for the same model.
+    """
+    def __init__(self, rpm: float = GEMINI_RPM, tpm: float = GEMINI_TPM,
+                 max_concurrency: int = GEMINI_MAX_CONCURRENCY, max_retries: int = GEMINI_MAX_RETRIES,
+                 backoff_base_s: float = GEMINI_BACKOFF_BASE_S, backoff_max_s: float = GEMINI_BACKOFF_MAX_S,
+                 window_s: float = 60.0):
+        # window_s is the quota period (one minute for Gemini; shortened by the benchmark)
+        self.rpm, self.tpm, self.window_s = rpm, tpm, window_s
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._cond = threading.Condition()
+        self._limiters: Dict[str, _ModelLimiter] = {}
+        self._seq = itertools.count()
+        self.counters = {"calls": 0, "rate_limited": 0, "retries": 0, "failed": 0}
+        self.wait_s = {PRIORITY_MAIN: 0.0, PRIORITY_SUBAGENT: 0.0}
+
+    def _limiter(self, model: str) -> _ModelLimiter:
+        limiter = self._limiters.get(model)
+        if limiter is None:
+            limiter = self._limiters[model] = _ModelLimiter(self.rpm, self.tpm, self.max_concurrency, self.window_s)
+        return limiter
+
+    def acquire(self, model: str, tokens: int, priority: int = PRIORITY_MAIN) -> None:
+        """Blocks until a call of about `tokens` input tokens may be sent to `model`."""
+        start = time.monotonic()
+        with self._cond:
+            limiter = self._limiter(model)
+            ticket = (priority, next(self._seq))
+            heapq.heappush(limiter.waiters, ticket)
+            try:
+                while True:
+                    delay = None
+                    if limiter.waiters[0] == ticket and limiter.in_flight < limiter.limit:
+                        now = time.monotonic()
+                        delay = max(limiter.paused_until - now, limiter.requests.wait_time(1, now),
+                                    limiter.tokens.wait_time(tokens, now))
+                        if delay <= 0:
+                            break
+                    self._cond.wait(timeout=delay)
+            finally:
+                limiter.waiters.remove(ticket)
+                heapq.heapify(limiter.waiters)
+            now = time.monotonic()
+            limiter.requests.take(1, now)
+            limiter.tokens.take(tokens, now)
+            limiter.in_flight += 1
+            self.counters["calls"] += 1
+            self.wait_s[priority] = self.wait_s.get(priority, 0.0) + (now - start)
+            # The next waiter may be admissible too
+            self._cond.notify_all()
+
+    def release(self, model: str, estimated_tokens: int, used_tokens: Optional[int] = None,
+                rate_limited: bool = False, backoff_s: float = 0.0) -> None:
+        """Returns the slot, corrects the token estimate and adapts the in-flight limit."""
+        with self._cond:
+            limiter = self._limiter(model)
+            now = time.monotonic()
+            limiter.in_flight -= 1
+            if used_tokens:
+                limiter.tokens.take(used_tokens - estimated_tokens, now)
+            if rate_limited:
+                self.counters["rate_limited"] += 1
+                limiter.limit = max(1, limiter.limit // 2)
+                limiter.successes = 0
+                limiter.paused_until = max(limiter.paused_until, now + backoff_s)
+            else:
+                limiter.successes += 1
+                if limiter.successes >= limiter.limit and limiter.limit < limiter.max_concurrency:
+                    limiter.limit += 1
+                    limiter.successes = 0
+            self._cond.notify_all()
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Full-jitter exponential delay, never shorter than a retry delay suggested by the API."""
+        delay = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt)))
+        return max(delay, float(getattr(error, "retry_after", 0) or 0))
+
+    def _should_retry(self, model: str, tokens: int, attempt: int, error: BaseException) -> bool:
+        """Releases a failed attempt's slot; True when it was rate limited and retries remain."""
+        limited = is_rate_limited(error)
+        self.release(model, tokens, rate_limited=limited, backoff_s=self.backoff(attempt, error) if limited else 0.0)
+        with self._cond:
+            retry = limited and attempt < self.max_retries
+            self.counters["retries" if retry else "failed"] += 1
+        return retry
+
+    def call(self, fn: Callable[[], Any], model: str, tokens: int, priority: int = PRIORITY_MAIN,
+             usage: Callable[[Any], Optional[int]] = lambda result: None) -> Any:
+        """Runs `fn` under the model's limits, retrying rate-limited attempts with backoff."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire(model, tokens, priority)
+            try:
+                result = fn()
+            except Exception as e:
+                if not self._should_retry(model, tokens, attempt, e):
+                    raise
+                continue
+            self.release(model, tokens, used_tokens=usage(result))
+            return result
+
+    async def acall(self, fn: Callable[[], Any], model: str, tokens: int, priority: int = PRIORITY_MAIN,
+                    usage: Callable[[Any], Optional[int]] = lambda result: None) -> Any:
+        """Async counterpart of `call`: `fn` returns an awaitable; waiting happens off the event loop."""
+        for attempt in range(self.max_retries + 1):
+            await asyncio.to_thread(self.acquire, model, tokens, priority)
+            try:
+                result = await fn()
+            except Exception as e:
+                if not self._should_retry(model, tokens, attempt, e):
+                    raise
+                continue
+            self.release(model, tokens, used_tokens=usage(result))
+            return result
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                **self.counters,
+                "wait_s_main": round(self.wait_s.get(PRIORITY_MAIN, 0.0), 3),
+                "wait_s_subagent": round(self.wait_s.get(PRIORITY_SUBAGENT, 0.0), 3),
+                "models": {name: {"limit": l.limit, "in_flight": l.in_flight} for name, l in self._limiters.items()},
+            }
+
+
+GEMINI_SCHEDULER_INSTANCE = GeminiScheduler()
+
+
+def _result_tokens(result) -> Optional[int]:
+    """Total tokens reported by a ChatResult, if any."""
+    total = 0
+    for generation in getattr(result, "generations", []) or []:
+        metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+        total += int(metadata.get("total_tokens", 0) or 0)
+    return total or None
+
+
+# --- 3. Scheduled client and shared registry ---
+_scheduled_class = None
+
+
+def _scheduled_chat_class():
+    """ChatGoogleGenerativeAI subclass whose calls go through the shared scheduler (built on first use)."""
+    global _scheduled_class
+    if _scheduled_class is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        class ScheduledChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+            priority: int = PRIORITY_MAIN
+
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                parent = super()._generate
+                return GEMINI_SCHEDULER_INSTANCE.call(
+                    lambda: parent(messages, stop=stop, run_manager=run_manager, **kwargs),
+                    self.model, estimate_tokens(messages), self.priority, usage=_result_tokens)
+
+            async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+                parent = super()._agenerate
+                return await GEMINI_SCHEDULER_INSTANCE.acall(
+                    lambda: parent(messages, stop=stop, run_manager=run_manager, **kwargs),
+                    self.model, estimate_tokens(messages), self.priority, usage=_result_tokens)
+
+        _scheduled_class = ScheduledChatGoogleGenerativeAI
+    return _scheduled_class
+
+
+# role -> (constructor arguments, priority)
+GEMINI_CLIENT_SPECS = {
+    "main": (dict(model="gemini-2.5-flash", max_output_tokens=4096, request_timeout=270, temperature=0.0), PRIORITY_MAIN),
+    "vision": (dict(model="gemini-2.5-flash"), PRIORITY_SUBAGENT),
+    "excel": (dict(model="gemini-2.0-flash", temperature=0), PRIORITY_SUBAGENT),
+    "light": (dict(model=GEMINI_LIGHT_MODEL, max_output_tokens=2048, request_timeout=120, temperature=0.0), PRIORITY_MAIN),
+}
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def gemini_client(role: str):
+    """
+    The process-wide Gemini client for `role` ("main", "vision", "excel" or "light"),
+    created once. With GEMINI_SCHEDULER on (default) its calls share the
+    scheduler's quotas and the client's own uncoordinated retries are off.
+    """
+    with _clients_lock:
+        client = _clients.get(role)
+        if client is None:
+            kwargs, priority = GEMINI_CLIENT_SPECS[role]
+            if GEMINI_SCHEDULER:
+                # One attempt per call: retries are the scheduler's job
+                client = _scheduled_chat_class()(**kwargs, priority=priority, max_retries=1)
+            else:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                client = ChatGoogleGenerativeAI(**kwargs)
+            _clients[role] = client
+        return client
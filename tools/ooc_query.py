@@ -0,0 +1,247 @@
+# tools/ooc_query.py
+
+import os
+import re
+import csv
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import datetime as dt
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+# Files above this size (MB) are not loaded into pandas; the agent is asked to use SQL instead.
+QUERY_LARGE_FILE_MB = float(os.getenv("QUERY_LARGE_FILE_MB", "500"))
+SQL_RESULT_MAX_ROWS = int(os.getenv("SQL_RESULT_MAX_ROWS", "50"))
+SQL_CACHE_DIR = os.getenv("SQL_CACHE_DIR", ".cache/sql")
+CSV_CHUNK_ROWS = 100_000
+# Plain decimal numbers only: "1_000", "nan", "inf" or "1e5x" stay text
+_INTEGER = re.compile(r"[+-]?\d+")
+_FLOAT = re.compile(r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?")
+
+
+def _clean_column(name) -> str:
+    """Same convention as the pandas path: spaces become underscores."""
+    return str(name).strip().replace(' ', '_')
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _format_rows(columns: Sequence[str], rows: List[tuple], truncated: bool) -> str:
+    """Renders a query result compactly: a scalar for 1x1 results, otherwise a small table."""
+    if len(rows) == 1 and len(columns) == 1:
+        return str(rows[0][0])
+    lines = [" | ".join(columns)]
+    lines += [" | ".join("" if v is None else str(v) for v in row) for row in rows]
+    if truncated:
+        lines.append(f"... (showing first {len(rows)} rows)")
+    return "\n".join(lines)
+
+
+# --- 1. DuckDB engine (preferred for CSV: streaming scan with projection/filter pushdown) ---
+def _duckdb_query(full_path: Path, sql: str, timeout_s: float) -> Tuple[List[str], List[tuple], bool]:
+    import duckdb
+
+    con = duckdb.connect(database=":memory:")
+    timer = threading.Timer(timeout_s, con.interrupt)
+    try:
+        source = f"read_csv_auto({_sql_string(str(full_path))})"
+        described = con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
+        projection = ", ".join(f"{_quote(row[0])} AS {_quote(_clean_column(row[0]))}" for row in described)
+        con.execute(f"CREATE VIEW df AS SELECT {projection} FROM {source}")
+
+        timer.start()
+        cursor = con.execute(sql)
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchmany(SQL_RESULT_MAX_ROWS + 1)
+        return columns, rows[:SQL_RESULT_MAX_ROWS], len(rows) > SQL_RESULT_MAX_ROWS
+    finally:
+        timer.cancel()
+        con.close()
+
+
+# --- 2. On-disk SQLite table (Excel, and CSV without DuckDB: the file is streamed in once) ---
+def _sqlite_path(full_path: Path) -> Path:
+    stat = full_path.stat()
+    path_hash = hashlib.sha1(str(full_path).encode("utf-8")).hexdigest()[:16]
+    return Path(SQL_CACHE_DIR) / f"{path_hash}-{stat.st_mtime_ns}-{stat.st_size}.sqlite"
+
+
+def _csv_rows(full_path: Path) -> Iterator[list]:
+    """Header, then typed rows of a CSV file, read lazily."""
+    with open(full_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = [_clean_column(c) for c in next(reader, [])]
+        width = len(header)
+        yield header
+        for row in reader:
+            if row:
+                # Ragged rows are padded or cut to the header width, as pandas does for short rows
+                yield [_coerce(v) for v in (row + [""] * width)[:width]]
+
+
+def _xlsx_rows(full_path: Path) -> Iterator[list]:
+    """Header, then rows of the first sheet, streamed by openpyxl in read-only mode."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(full_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+        width = len(header)
+        yield [_clean_column(c if c is not None else f"Unnamed: {i}") for i, c in enumerate(header)]
+        for row in rows:
+            if any(v is not None for v in row):
+                yield [_sqlite_value(v) for v in (list(row) + [None] * width)[:width]]
+    finally:
+        workbook.close()
+
+
+def _sqlite_value(value):
+    """Excel cells arrive typed; dates are stored as ISO text, which sorts and compares correctly."""
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat(sep=" ") if isinstance(value, dt.datetime) else value.isoformat()
+    if isinstance(value, dt.timedelta):
+        return value.total_seconds()
+    return value
+
+
+def _build_sqlite(full_path: Path, db_path: Path) -> None:
+    """
+    Streams the file chunk by chunk into table `df`; CSV and .xlsx files are
+    never held in memory. Legacy .xls workbooks cannot be streamed (xlrd reads
+    the whole file), so they are read once with pandas.
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    for stale in db_path.parent.glob(db_path.name.split("-")[0] + "-*.sqlite"):
+        if stale != db_path:
+            stale.unlink(missing_ok=True)
+    # Unique per writer: concurrent builds of the same file must not share a temp file
+    fd, tmp_name = tempfile.mkstemp(dir=db_path.parent, prefix=db_path.stem + ".", suffix=".tmp")
+    os.close(fd)
+    conn = sqlite3.connect(tmp_name)
+    try:
+        extension = full_path.suffix.lower()
+        if extension in ('.csv', '.xlsx'):
+            rows = _csv_rows(full_path) if extension == '.csv' else _xlsx_rows(full_path)
+            header = next(rows)
+            placeholders = ", ".join("?" * len(header))
+            conn.execute(f"CREATE TABLE df ({', '.join(_quote(c) for c in header)})")
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= CSV_CHUNK_ROWS:
+                    conn.executemany(f"INSERT INTO df VALUES ({placeholders})", chunk)
+                    chunk = []
+            if chunk:
+                conn.executemany(f"INSERT INTO df VALUES ({placeholders})", chunk)
+        else:
+            from .dataframe_cache import load_dataframe
+            df = load_dataframe(full_path)
+            df.columns = [_clean_column(c) for c in df.columns]
+            df.to_sql("df", conn, index=False, chunksize=CSV_CHUNK_ROWS)
+        conn.commit()
+        conn.close()
+        os.replace(tmp_name, db_path)
+    except BaseException:
+        conn.close()
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _coerce(value: str):
+    """CSV cells arrive as text; store numbers as numbers so aggregations work."""
+    stripped = value.strip()
+    if stripped == "":
+        return None
+    if _INTEGER.fullmatch(stripped):
+        return int(stripped)
+    if _FLOAT.fullmatch(stripped):
+        return float(stripped)
+    return value
+
+
+def _sqlite_query(full_path: Path, sql: str, timeout_s: float) -> Tuple[List[str], List[tuple], bool]:
+    db_path = _sqlite_path(full_path)
+    if not db_path.exists():
+        print(f"⏳ Building on-disk SQL table for {full_path.name}...")
+        _build_sqlite(full_path, db_path)
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    deadline = time.monotonic() + timeout_s
+    # Abort long-running statements once the deadline passes
+    conn.set_progress_handler(lambda: int(time.monotonic() > deadline), 10_000)
+    try:
+        cursor = conn.execute(sql)
+        columns = [d[0] for d in cursor.description or []]
+        rows = cursor.fetchmany(SQL_RESULT_MAX_ROWS + 1)
+        return columns, rows[:SQL_RESULT_MAX_ROWS], len(rows) > SQL_RESULT_MAX_ROWS
+    finally:
+        conn.close()
+
+
+# --- 3. Public API ---
+def _scanned_by_duckdb(full_path: Path) -> bool:
+    if full_path.suffix.lower() != '.csv':
+        return False
+    try:
+        import duckdb  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def run_sql_query(data_path, sql: str, timeout_s: float = 60.0) -> str:
+    """
+    Runs `sql` against the file exposed as table `df` and returns the
+    formatted result (scalar or small table). CSV files are scanned by DuckDB
+    when installed; Excel files (and CSV without DuckDB) are streamed once
+    into an on-disk SQLite table. Only legacy .xls workbooks are read whole.
+    Raises on SQL errors so callers can report them to the agent.
+    """
+    full_path = Path(data_path).resolve()
+    if _scanned_by_duckdb(full_path):
+        columns, rows, truncated = _duckdb_query(full_path, sql, timeout_s)
+    else:
+        columns, rows, truncated = _sqlite_query(full_path, sql, timeout_s)
+    return _format_rows(columns, rows, truncated)
+
+
+def prepare_sql_table(data_path) -> bool:
+    """
+    Builds the on-disk SQLite table a later run_sql_query on this file will
+    use. False when there is nothing to build (CSV scanned by DuckDB).
+    """
+    full_path = Path(data_path).resolve()
+    if _scanned_by_duckdb(full_path):
+        return False
+    db_path = _sqlite_path(full_path)
+    if not db_path.exists():
+        _build_sqlite(full_path, db_path)
+    return True
+
+
+def describe_columns(data_path) -> List[str]:
+    """Reads only the header row to list the (cleaned) column names of a CSV or .xlsx file."""
+    full_path = Path(data_path).resolve()
+    extension = full_path.suffix.lower()
+    if extension not in ('.csv', '.xlsx'):
+        return []
+    rows = _csv_rows(full_path) if extension == '.csv' else _xlsx_rows(full_path)
+    try:
+        return next(rows, [])
+    finally:
+        rows.close()
+
+
+def is_large_file(data_path) -> bool:
+    return Path(data_path).stat().st_size > QUERY_LARGE_FILE_MB * 1024 * 1024
+
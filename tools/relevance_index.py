@@ -0,0 +1,153 @@
+# tools/relevance_index.py
+
+import os
+import re
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Optional, Tuple
+
+# Outputs up to this size are returned whole; longer ones are cut into chunks
+# and only the most relevant ones (for the current question) are returned.
+RETRIEVAL_BUDGET_CHARS = int(os.getenv("RETRIEVAL_BUDGET_CHARS", "4000"))
+RETRIEVAL_CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", "700"))
+RETRIEVAL_INDEX_CACHE_SIZE = 32
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?。])\s+|\n+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were "
+    "what which who when where how with did does do i you he she they we "
+    "el la los las un una y o de del en que es por para con se su al lo como".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def chunk_text(text: str, chunk_chars: int = RETRIEVAL_CHUNK_CHARS) -> List[str]:
+    """
+    Splits text into chunks of roughly `chunk_chars`, cutting at sentence or
+    line boundaries when possible (transcripts without punctuation fall back
+    to word boundaries).
+    """
+    pieces = [p for p in _SENTENCE_RE.split(text) if p.strip()]
+    chunks, current = [], ""
+    for piece in pieces:
+        while len(piece) > chunk_chars:
+            cut = piece.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > chunk_chars // 2 else chunk_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(piece[:cut].strip())
+            piece = piece[cut:].strip()
+        if current and len(current) + len(piece) + 1 > chunk_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+# --- 1. BM25 index ---
+class BM25Index:
+    """Okapi BM25 over a list of text chunks, built in-process."""
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1, self.b = k1, b
+        self._term_freqs = [Counter(tokenize(c)) for c in chunks]
+        self._lengths = [sum(tf.values()) for tf in self._term_freqs]
+        self._avg_length = (sum(self._lengths) / len(chunks)) if chunks else 0.0
+        doc_freq = Counter(term for tf in self._term_freqs for term in tf)
+        n = len(chunks)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query: str) -> List[float]:
+        terms = [t for t in set(tokenize(query)) if t in self._idf]
+        results = []
+        for tf, length in zip(self._term_freqs, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+            results.append(sum(
+                self._idf[t] * tf[t] * (self.k1 + 1) / (tf[t] + norm) for t in terms if t in tf
+            ))
+        return results
+
+    def search(self, query: str) -> List[Tuple[int, float]]:
+        """All chunk indexes ranked by score (ties keep document order)."""
+        ranked = sorted(enumerate(self.scores(query)), key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+_INDEX_CACHE: "OrderedDict[str, BM25Index]" = OrderedDict()
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index(text: str, chunk_chars: int = RETRIEVAL_CHUNK_CHARS) -> BM25Index:
+    """Index for `text`, reused when the same output is paged or re-queried."""
+    key = hashlib.sha1(f"{chunk_chars}:{text}".encode("utf-8")).hexdigest()
+    with _INDEX_LOCK:
+        index = _INDEX_CACHE.get(key)
+        if index is not None:
+            _INDEX_CACHE.move_to_end(key)
+            return index
+    index = BM25Index(chunk_text(text, chunk_chars))
+    with _INDEX_LOCK:
+        _INDEX_CACHE[key] = index
+        while len(_INDEX_CACHE) > RETRIEVAL_INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
+
+
+# --- 2. Paging over ranked chunks ---
+def _pages(order: List[int], chunks: List[str], budget_chars: int) -> List[List[int]]:
+    """Groups chunk indexes (in ranked order) into pages that fit the budget."""
+    pages, current, size = [], [], 0
+    for i in order:
+        length = len(chunks[i]) + 1
+        if current and size + length > budget_chars:
+            pages.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += length
+    if current:
+        pages.append(current)
+    return pages
+
+
+def focus_output(text: str, question: Optional[str] = "", page: int = 1,
+                 budget_chars: int = RETRIEVAL_BUDGET_CHARS) -> str:
+    """
+    Returns `text` unchanged when it fits in `budget_chars`. Otherwise returns
+    page `page` of its chunks: ranked by BM25 relevance to `question` when one
+    is given, or in document order when not. Selected chunks are printed in
+    document order, and a footer tells the agent how to request more.
+    """
+    if len(text) <= budget_chars:
+        return text
+
+    index = get_index(text)
+    chunks = index.chunks
+    order, by_relevance = list(range(len(chunks))), False
+    if question and question.strip():
+        ranked = index.search(question)
+        # With no matching term at all, reading in order is the best fallback
+        if ranked and ranked[0][1] > 0:
+            order, by_relevance = [i for i, _ in ranked], True
+
+    pages = _pages(order, chunks, budget_chars)
+    page = max(1, int(page or 1))
+    if page > len(pages):
+        return f"[No more content: page {page} requested, only {len(pages)} page(s) available.]"
+
+    selected = sorted(pages[page - 1])
+    body = "\n".join(f"[part {i + 1}/{len(chunks)}] {chunks[i]}" for i in selected)
+    basis = "most relevant to the question" if by_relevance else "in document order"
+    footer = f"[Showing page {page} of {len(pages)} ({basis}) out of {len(text)} characters."
+    if page < len(pages):
+        footer += f" Call the tool again with page={page + 1} for more."
+    return f"{body}\n{footer}]"
@@ -0,0 +1,223 @@
+# tools/result_cache.py
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import inspect
+import functools
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Optional
+
+TOOL_CACHE_PATH = os.getenv("TOOL_CACHE_PATH", ".cache/tool_results.sqlite")
+TOOL_CACHE_MAX_MB = float(os.getenv("TOOL_CACHE_MAX_MB", "256"))
+TOOL_CACHE_DISABLED = os.getenv("TOOL_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+class SQLiteResultCache:
+    """
+    Persistent key/value store for tool results, backed by a local SQLite file.
+
+    Entries are evicted least-recently-used first once the stored values exceed
+    `max_bytes`. Hit/miss counters are kept per tool for the current process.
+    """
+    def __init__(self, path: str = TOOL_CACHE_PATH, max_bytes: int = int(TOOL_CACHE_MAX_MB * 1024 * 1024)):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use so importing the tools never touches the disk
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, tool TEXT, value TEXT, size INTEGER,"
+                " created REAL, last_access REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_lru ON results(last_access)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS file_digests ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # --- Results ---
+    def get(self, key: str, tool: str = "") -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses[tool] += 1
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits[tool] += 1
+            return row[0]
+
+    def put(self, key: str, value: str, tool: str = "") -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, tool, value, size, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool, value, size, now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Deletes least recently used rows until the total size fits (lock held)."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM results ORDER BY last_access ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    # --- File digests ---
+    def file_digest(self, file_path: str) -> str:
+        """
+        SHA-256 of the file contents. The digest is remembered per
+        (path, size, mtime), so unchanged files are hashed only once.
+        """
+        full_path = Path(file_path).resolve()
+        stat = full_path.stat()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT digest FROM file_digests WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (str(full_path), stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row is not None:
+            return row[0]
+
+        sha = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO file_digests (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (str(full_path), stat.st_size, stat.st_mtime_ns, digest),
+            )
+            conn.commit()
+        return digest
+
+    # --- Maintenance ---
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connect()
+            entries, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM results")
+            conn.commit()
+
+
+TOOL_RESULT_CACHE = SQLiteResultCache()
+
+
+# --- Content keys ---
+def file_content_key(file_path: str) -> Optional[str]:
+    """Identifies a local file by the hash of its bytes (None if unreadable)."""
+    try:
+        return "sha256:" + TOOL_RESULT_CACHE.file_digest(file_path)
+    except OSError:
+        return None
+
+
+def extract_youtube_video_id(url: str) -> Optional[str]:
+    """Extracts the 11-character video ID from any common YouTube URL form."""
+    match = re.search(r'(?:v=|\/embed\/|youtu\.be\/|\/v\/|\/watch\?v=)([a-zA-Z0-9_-]{11})', url or "")
+    return match.group(1) if match else None
+
+
+def youtube_content_key(video_url: str) -> Optional[str]:
+    video_id = extract_youtube_video_id(video_url)
+    return f"youtube:{video_id}" if video_id else None
+
+
+def is_error_result(result) -> bool:
+    """Tool errors are reported as strings; they must never be cached."""
+    return not isinstance(result, str) or result.lstrip().upper().startswith(("ERROR", "UNEXPECTED ERROR"))
+
+
+# --- Decorator ---
+def cached_tool(tool_name: str, content_param: str, content_key: Callable[[str], Optional[str]] = file_content_key,
+                key_params: Optional[Callable[[dict], dict]] = None):
+    """
+    Caches a tool function's string result in TOOL_RESULT_CACHE.
+
+    The key combines `content_key(<content_param value>)` (e.g. the file hash
+    or the video id) with every other parameter of the call, so the same
+    asset under a different path still hits. `key_params`, if given, maps
+    those parameters to what actually determines the result (defaults
+    resolved, engine settings added). Apply it *below* the LangChain `@tool`
+    decorator so the tool schema is still inferred from the function.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if TOOL_CACHE_DISABLED:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            content_value = params.pop(content_param, None)
+            content_id = content_key(content_value) if content_value else None
+            if content_id is None:
+                return func(*args, **kwargs)
+            if key_params is not None:
+                params = key_params(params)
+
+            raw_key = json.dumps([tool_name, content_id, params], sort_keys=True, default=str)
+            key = hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+            cached = TOOL_RESULT_CACHE.get(key, tool=tool_name)
+            if cached is not None:
+                print(f"💾 Cache hit for {tool_name} ({content_id[:24]}).")
+                return cached
+
+            result = func(*args, **kwargs)
+            if not is_error_result(result):
+                TOOL_RESULT_CACHE.put(key, result, tool=tool_name)
+            return result
+
+        return wrapper
+    return decorator
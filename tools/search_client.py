@@ -0,0 +1,183 @@
+# tools/search_client.py
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+# Google Custom Search JSON API; point it to a local stand-in server for tests.
+SEARCH_BASE_URL = os.getenv("SEARCH_BASE_URL", "https://www.googleapis.com/customsearch/v1")
+SEARCH_RESULTS_K = int(os.getenv("SEARCH_RESULTS_K", "3"))
+SEARCH_CACHE_TTL_S = float(os.getenv("SEARCH_CACHE_TTL_S", "3600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+SEARCH_TIMEOUT_S = float(os.getenv("SEARCH_TIMEOUT_S", "10"))
+SEARCH_BATCH_WORKERS = int(os.getenv("SEARCH_BATCH_WORKERS", "4"))
+
+NO_RESULTS = "No good Google Search Result was found"
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the search, so they do not change the key."""
+    return _SPACES_RE.sub(" ", query).strip().strip("?!.,;:").strip().lower()
+
+
+# --- 1. TTL cache ---
+class TTLCache:
+    """Small thread-safe LRU whose entries expire after `ttl_s` seconds."""
+    def __init__(self, ttl_s: float = SEARCH_CACHE_TTL_S, max_entries: int = SEARCH_CACHE_SIZE):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_s, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# --- 2. Search client ---
+class GoogleSearchClient:
+    """
+    Google Custom Search client used by `search_web`.
+
+    One pooled `requests.Session` is shared by every call (keep-alive instead
+    of a new TLS handshake per query), results are cached per normalized
+    query for `SEARCH_CACHE_TTL_S`, and identical queries already in flight
+    wait for the first request instead of issuing their own.
+    `run(query)` keeps the output format of `GoogleSearchAPIWrapper.run`.
+    """
+    def __init__(self, api_key: Optional[str] = None, cse_id: Optional[str] = None,
+                 base_url: str = SEARCH_BASE_URL, k: int = SEARCH_RESULTS_K,
+                 timeout_s: float = SEARCH_TIMEOUT_S, cache: Optional[TTLCache] = None,
+                 max_workers: int = SEARCH_BATCH_WORKERS):
+        self.api_key = api_key if api_key is not None else os.getenv("GOOGLE_API_KEY", "")
+        self.cse_id = cse_id if cse_id is not None else os.getenv("GOOGLE_CSE_ID", "")
+        self.base_url = base_url
+        self.k = k
+        self.timeout_s = timeout_s
+        self.cache = cache if cache is not None else TTLCache()
+        self.max_workers = max_workers
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        self.requests_sent = 0
+        self.cache_hits = 0
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(4, self.max_workers * 2))
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def _fetch(self, query: str) -> List[dict]:
+        params = {"key": self.api_key, "cx": self.cse_id, "q": query, "num": self.k}
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout_s)
+        self.requests_sent += 1
+        response.raise_for_status()
+        items = response.json().get("items") or []
+        return [{"title": item.get("title", ""), "link": item.get("link", ""), "snippet": item.get("snippet", "")}
+                for item in items[:self.k]]
+
+    def search(self, query: str) -> List[dict]:
+        """Result dicts (title, link, snippet) for one query, from the cache when fresh."""
+        key = normalize_query(query)
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+            with self._inflight_lock:
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+            # Same query already being fetched: wait for it and re-check the
+            # cache (if that request failed, this caller fetches instead).
+            waiter.wait(self.timeout_s)
+
+        try:
+            results = self._fetch(query)
+            self.cache.put(key, results)
+            return results
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def search_batch(self, queries: Sequence[str]) -> List[dict]:
+        """
+        Runs several queries concurrently and merges their results: ranks are
+        interleaved across queries and repeated links are kept only once.
+        """
+        unique = list(OrderedDict((normalize_query(q), q) for q in queries if q and q.strip()).values())
+        if not unique:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique))) as pool:
+            per_query = list(pool.map(self.search, unique))
+
+        merged, seen = [], set()
+        for rank in range(max(len(r) for r in per_query)):
+            for query, results in zip(unique, per_query):
+                if rank < len(results):
+                    item = results[rank]
+                    link = item["link"] or item["snippet"]
+                    if link in seen:
+                        continue
+                    seen.add(link)
+                    merged.append({**item, "query": query})
+        return merged
+
+    @staticmethod
+    def format_results(results: List[dict]) -> str:
+        if not results:
+            return NO_RESULTS
+        return " ".join(item["snippet"].replace("\n", " ") for item in results if item.get("snippet"))
+
+    def run(self, query: str) -> str:
+        return self.format_results(self.search(query))
+
+    def run_batch(self, queries: Sequence[str]) -> str:
+        results = self.search_batch(queries)
+        if not results:
+            return NO_RESULTS
+        return "\n".join(f"[{item['query']}] {item['title']}: {item['snippet'].replace(chr(10), ' ')} ({item['link']})"
+                         for item in results)
+
+    def stats(self) -> dict:
+        return {"requests_sent": self.requests_sent, "cache_hits": self.cache_hits, "cached_queries": len(self.cache)}
@@ -1,122 +1,180 @@
 import os
-import sys
-import math
-import base64
+from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import HumanMessage
-from langchain_core.tools import Tool, tool as langchain_tool_decorator
-from langchain_google_community import GoogleSearchAPIWrapper
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.tools import tool as langchain_tool_decorator
 from pathlib import Path
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled
-import re
-from tempfile import NamedTemporaryFile
-import whisper
-import pandas as pd
-import io
 from langchain_core.tools import BaseTool
-from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
 # from langchain.agents.agent_types import AgentType
 from typing import Optional, Type
 from pydantic import BaseModel, Field
 
+from .lazy import LazyObject
+from .llm_scheduler import gemini_client
+from .whisper_pool import WHISPER_POOL
+from .transcription import TRANSCRIBE_MODEL_SIZE, get_backend
+from .result_cache import cached_tool, youtube_content_key, extract_youtube_video_id, is_error_result
+from .relevance_index import focus_output
+from .image_preprocess import PreparedImage, IMAGE_TILE_WORKERS, prepare_image, merge_tile_texts
+from .excel_agent import build_pandas_agent
+from .code_executor import get_code_executor, QUERY_TIMEOUT_S
+from .ooc_query import run_sql_query, describe_columns, is_large_file
+from .audio_pipeline import SAMPLE_RATE, LONG_AUDIO_THRESHOLD_S, load_audio, transcribe_long_audio
+
+# Heavy dependencies (whisper/torch, pandas, YouTube and Gemini clients,
+# langchain_experimental) are imported inside the tools that need them, so
+# importing this module only declares the tool schemas.
 
 os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY") or ""
 os.environ["GOOGLE_CSE_ID"] = os.getenv("GOOGLE_CSE_ID") or ""
 
-vision_llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
 
+def _build_vision_llm():
+    return gemini_client("vision")
 
-@langchain_tool_decorator
-def extract_text(img_path: str) -> str:
-    """
-    Extracts all readable text from an image file using a multimodal model (Gemini Vision).
-    This tool should be used first for any question referencing an image or file path.
-    """
-    if not img_path:
-        return "Error: No image path was provided."
-            
+vision_llm = LazyObject(_build_vision_llm, name="vision ChatGoogleGenerativeAI")
+
+
+EXTRACT_TEXT_PROMPT = "Extract all the text from this image. Return only the extracted text, without any additional commentary."
+
+
+def _vision_text(image: PreparedImage) -> str:
+    """One vision request for a whole image or a single tile."""
+    prompt = EXTRACT_TEXT_PROMPT
+    if image.count > 1:
+        prompt += (f" This is part {image.index + 1} of {image.count} of a larger image, in reading order; "
+                   "transcribe only what is visible in this part.")
+    message = [
+        HumanMessage(
+            content = [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": image.data_url}},
+            ]
+        )
+    ]
+    return str(vision_llm.invoke(message).content).strip()
+
+
+@cached_tool("extract_text", content_param="img_path")
+def _extract_image_text(img_path: str) -> str:
+    """Full text of an image (cached); `extract_text` trims it to the question."""
     try:
-        # Read the image file and encode it to base64 for the API
         with open(img_path, "rb") as image_file:
             image_bytes = image_file.read()
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        
-        message = [
-            HumanMessage(
-                content = [
-                    {
-                        "type": "text",
-                        "text": ("Extract all the text from this image. "
-                                 "Return only the extracted text, without any additional commentary."),
-                    },
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/png;base64, {image_base64}"
-                        },
-                    },
-                ]
-            )
-        ]
-        
-        response = vision_llm.invoke(message)
-        return response.content.strip()
+
+        # Real format detection, downscaling/re-encoding and tiling of very large images
+        prepared = prepare_image(image_bytes)
+        if len(prepared) == 1:
+            return _vision_text(prepared[0])
+
+        print(f"🧩 Large image: extracting text from {len(prepared)} tiles concurrently...")
+        with ThreadPoolExecutor(max_workers=min(IMAGE_TILE_WORKERS, len(prepared))) as pool:
+            texts = list(pool.map(_vision_text, prepared))
+        return merge_tile_texts(texts)
             
     except Exception as e:
         error_msg = f"Error extracting text from {img_path}: {str(e)}"
         return f"Error: {error_msg}"
-    
+
 
 @langchain_tool_decorator
-def youtube_transcript(video_url: str) -> str:
+def extract_text(img_path: str, question: str = "", page: int = 1) -> str:
     """
-    Retrieves, downloads, and concatenates the transcript for a YouTube video using its URL. 
-    Use the transcription result to answer questions about the video's content.
-    The argument 'video_url' must be the complete URL of the video.
+    Extracts all readable text from an image file using a multimodal model (Gemini Vision).
+    This tool should be used first for any question referencing an image or file path.
+    Long texts are cut into parts: pass the user's 'question' to get the most relevant
+    parts first, and 'page' (2, 3, ...) to read further.
     """
-    def extract_video_id(url):
-        # Helper function to extract the 11-character video ID
-        match = re.search(r'(?:v=|\/embed\/|youtu\.be\/|\/v\/|\/watch\?v=)([a-zA-Z0-9_-]{11})', url)
-        return match.group(1) if match else None
+    if not img_path:
+        return "Error: No image path was provided."
+
+    text = _extract_image_text(img_path)
+    if is_error_result(text):
+        return text
+    return focus_output(text, question, page)
+    
 
-    video_id = extract_video_id(video_url)
+# Transcript languages, in order of preference
+YOUTUBE_TRANSCRIPT_LANGUAGES = ['en', 'es']
+# Characters per page when no question is given to rank the transcript by
+YOUTUBE_TRANSCRIPT_CHARS = 15000
+
+
+@cached_tool("youtube_transcript_full", content_param="video_url", content_key=youtube_content_key,
+             key_params=lambda params: {**params, "languages": YOUTUBE_TRANSCRIPT_LANGUAGES})
+def _fetch_youtube_transcript(video_url: str) -> str:
+    """Full transcript text of a video (cached); `youtube_transcript` selects from it."""
+    # Helper shared with the result cache to extract the 11-character video ID
+    video_id = extract_youtube_video_id(video_url)
 
     if not video_id:
         return "ERROR: Invalid YouTube URL or video ID not found."
     
+    from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled
+
     try:
         # 1. Instanciar YouTubeTranscriptApi().
         # fetched_transcript es ahora un iterable de FetchedTranscriptSnippet objects.
         fetched_transcript = YouTubeTranscriptApi().fetch(
             video_id, 
-            languages=['en', 'es']
+            languages=YOUTUBE_TRANSCRIPT_LANGUAGES
         )
         
         # --- CORRECCIÓN AQUÍ: Usar item.text en lugar de item['text'] ---
         # Acceder al atributo 'text' de cada objeto.
-        full_transcript = " ".join([item.text for item in fetched_transcript])
-        
-        # Limitar la salida
-        transcript_summary = full_transcript[:15000] 
-        
-        return f"VIDEO TRANSCRIPT: {transcript_summary} [End of transcript]"
+        return " ".join([item.text for item in fetched_transcript])
 
     except TranscriptsDisabled:
         return f"ERROR: Transcription is disabled for this video ({video_id})."
     except Exception as e:
         return f"Unexpected ERROR retrieving the transcript: {e}"    
+
+
+@langchain_tool_decorator
+def youtube_transcript(video_url: str, question: str = "", page: int = 1) -> str:
+    """
+    Retrieves, downloads, and concatenates the transcript for a YouTube video using its URL. 
+    Use the transcription result to answer questions about the video's content.
+    The argument 'video_url' must be the complete URL of the video.
+    Long transcripts are cut into parts: pass the user's 'question' to get the most
+    relevant parts first, and 'page' (2, 3, ...) to read further.
+    """
+    full_transcript = _fetch_youtube_transcript(video_url)
+    if is_error_result(full_transcript):
+        return full_transcript
+
+    if question and question.strip():
+        # Con una pregunta se devuelven primero las partes más relevantes
+        focused = focus_output(full_transcript, question, page)
+    else:
+        # Sin pregunta: ventanas de 15000 caracteres en orden, como antes
+        focused = focus_output(full_transcript, "", page, budget_chars=YOUTUBE_TRANSCRIPT_CHARS)
+    if focused is full_transcript:
+        # Solo cuando cabe completo: las páginas ya traen su propio pie
+        return f"VIDEO TRANSCRIPT: {focused} [End of transcript]"
+    return f"VIDEO TRANSCRIPT: {focused}"
     
+def _transcription_key_params(params: dict) -> dict:
+    """A transcript depends on the engine and model that produced it, not only on the audio."""
+    backend = get_backend()
+    return {**params, "model_size": params.get("model_size") or TRANSCRIBE_MODEL_SIZE,
+            "backend": backend.describe(), "options": backend.options()}
+
+
 @langchain_tool_decorator
-def audio_to_text(audio_path: str) -> str:
+@cached_tool("audio_to_text", content_param="audio_path", key_params=_transcription_key_params)
+def audio_to_text(audio_path: str, model_size: str = "") -> str:
     """
     Transcribes the spoken content from an audio file (e.g., MP3, WAV) 
     using the local Whisper model for high-quality, fast transcription.
     This tool should be used first for any question referencing an audio 
     file path or a specific audio file.
+    The optional 'model_size' selects the Whisper checkpoint (e.g., 'tiny', 'base', 'small').
     """
-    # 1. Verificación de librerías
-    if not whisper:
-        return "ERROR: Whisper library is not installed. Please install 'openai-whisper' dependencies."
+    # 1. Verificación de librerías (el motor se importa solo cuando se usa esta herramienta)
+    backend = get_backend()
+    if not backend.available():
+        return f"ERROR: Transcription backend '{backend.name}' is not installed. Please install the '{backend.name}' package."
+    model_size = model_size or TRANSCRIBE_MODEL_SIZE
 
     if not audio_path:
         return "ERROR: No audio file path was provided."
@@ -127,36 +185,33 @@ def audio_to_text(audio_path: str) -> str:
     if not full_path.exists():
         return f"ERROR: Audio file not found at path: {audio_path}. The file must be accessible."
         
-    temp_path = None
-    
     try:
-        # 3. Leer los bytes del archivo
-        with open(full_path, "rb") as audio_file:
-            audio_bytes = audio_file.read()
-
-        # 4. Escribir los bytes a un archivo temporal
-        with NamedTemporaryFile(suffix=full_path.suffix, delete=False) as temp_f:
-            temp_f.write(audio_bytes)
-            temp_path = temp_f.name
-        
-        # 5. Transcribir con Whisper (usa el modelo "base")
-        model = whisper.load_model("base") 
-        output = model.transcribe(temp_path)["text"].strip()
+        # 3. Decodificar el audio directamente desde la ruta original (sin copia temporal)
+        audio = load_audio(full_path)
+        duration_s = len(audio) / SAMPLE_RATE
+
+        # 4. Transcribir con el backend configurado (modelo compartido del pool, cargado una sola vez)
+        if duration_s > LONG_AUDIO_THRESHOLD_S:
+            # Grabaciones largas: segmentos en paralelo, unidos sin duplicar el solapamiento
+            print(f"🎧 Long audio ({duration_s:.0f}s): transcribing in parallel segments...")
+            output = transcribe_long_audio(
+                audio,
+                model_size=model_size,
+                on_partial=lambda text: print(f"   ...{len(text.split())} words transcribed"),
+            )
+        else:
+            with WHISPER_POOL.lease(model_size) as model:
+                output = model.transcribe(audio, **backend.options())["text"].strip()
         
         return f"AUDIO TRANSCRIPT: {output}"
             
     except Exception as e:
         # Este bloque capturará errores como la falta de FFmpeg, aunque ya lo resolviste.
         return f"ERROR during Whisper transcription: {str(e)}"
-        
-    finally:
-        # 6. Limpieza del archivo temporal
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
 
 
 @langchain_tool_decorator
-def query_data_file(data_path: str, code_query: str) -> str:
+def query_data_file(data_path: str, code_query: str, engine: str = "pandas") -> str:
     """
     Reads an Excel (.xlsx, .xls) or CSV file into a pandas DataFrame (named 'df'), 
     executes a specific Python 'code_query' against it, and returns the result.
@@ -168,6 +223,10 @@ def query_data_file(data_path: str, code_query: str) -> str:
     line MUST be a 'print()' statement for the final result.
     
     Example code_query for correlation: 'print(df[["Col1", "Col2"]].corr().iloc[0, 1])'
+
+    For very large files use engine='sql': the file is queried out-of-core as the
+    SQL table 'df' (spaces in column names become underscores) and code_query must
+    be a single SQL SELECT, e.g. 'SELECT Region, SUM(Sales) FROM df GROUP BY Region'.
     """
     if not data_path:
         return "ERROR: No file path provided."
@@ -178,49 +237,33 @@ def query_data_file(data_path: str, code_query: str) -> str:
         return f"ERROR: Data file not found at path: {data_path}."
 
     file_extension = full_path.suffix.lower()
-    df = None
+    if file_extension not in ['.csv', '.xlsx', '.xls']:
+        return f"ERROR: Unsupported file format: {file_extension}. Only CSV, XLSX, and XLS are supported."
 
-    try:
-        # 1. Load the DataFrame (DF)
-        if file_extension in ['.csv']:
-            # Read CSV (with common encoding handling)
-            df = pd.read_csv(full_path, encoding='utf-8')
-            print(f"Loaded CSV with shape: {df.shape}")
-        elif file_extension in ['.xlsx', '.xls']:
-            # Read Excel files
-            df = pd.read_excel(full_path)
-            print(f"Loaded Excel with shape: {df.shape}")
-        else:
-            return f"ERROR: Unsupported file format: {file_extension}. Only CSV, XLSX, and XLS are supported."
-        
-        # 2. Replace spaces in column names for easier Agent code generation
-        # This converts "Operating Status" to "Operating_Status"
-        df.columns = df.columns.str.replace(' ', '_', regex=False)
-
-        # 3. Execute the query code (code_query)
-        # We capture the 'print' output into a text buffer
-        stdout_capture = io.StringIO()
-        sys.stdout = stdout_capture
-        
-        # The Agent must provide valid Python code that uses 'df'
-        # We use exec() to execute the code string
-        exec(code_query, {'df': df, 'pd': pd, 'os': os}) 
-        
-        # Restore standard output and get the result
-        sys.stdout = sys.__stdout__
-        result = stdout_capture.getvalue().strip()
-        
-        return f"QUERY_RESULT: {result}"
+    # 1. Out-of-core SQL engine: CSV and .xlsx files are streamed, not materialized in pandas
+    if engine.lower() == "sql":
+        try:
+            return f"QUERY_RESULT: {run_sql_query(full_path, code_query, timeout_s=QUERY_TIMEOUT_S)}"
+        except Exception as e:
+            return f"ERROR executing SQL: {str(e)}. Please check syntax and column names. Available columns: {describe_columns(full_path) or 'see file header'}"
 
-    except Exception as e:
-        # 4. Error Handling and Reporting
-        # Restore standard output in case of error
-        if sys.stdout != sys.__stdout__:
-            sys.stdout = sys.__stdout__
-            
-        # Return a column summary in case of code error so the Agent can correct itself
-        column_info = f"Available columns: {list(df.columns)}" if 'df' in locals() else "DataFrame not loaded."
-        return f"ERROR executing code: {str(e)}. Please check syntax and column names. {column_info}"
+    if is_large_file(full_path):
+        return (f"ERROR: {data_path} is too large to load into pandas. "
+                f"Re-run query_data_file with engine='sql' and a SQL SELECT over table 'df'. "
+                f"Available columns: {describe_columns(full_path)}")
+
+    # 2. Execute the query code (code_query) in an isolated worker process.
+    # The worker keeps the DataFrame cached, captures 'print' output per call,
+    # and enforces the QUERY_TIMEOUT_S / QUERY_MEMORY_MB limits.
+    result = get_code_executor().execute(str(full_path), code_query)
+
+    if result.ok:
+        return f"QUERY_RESULT: {result.output}"
+
+    # 3. Error Handling and Reporting
+    # Return a column summary in case of code error so the Agent can correct itself
+    column_info = f"Available columns: {result.columns}" if result.columns is not None else "DataFrame not loaded."
+    return f"ERROR executing code: {result.error}. Please check syntax and column names. {column_info}"
 
 
 class AnswerExcelToolArgs(BaseModel):
@@ -239,29 +282,15 @@ class AnswerExcelTool(BaseTool):
     args_schema: Type[BaseModel] = AnswerExcelToolArgs
 
     def _run(self, query: str, file_path: str) -> str:
-        # Load the file, supporting both Excel and CSV
+        if not file_path.lower().endswith(('.xlsx', '.xls', '.csv')):
+            return f"ERROR: Unsupported file format for Pandas Agent: {file_path}"
+
+        # Parsed frame and schema profile are cached per file version; the executor
+        # is built per question over a private copy, so one question's code cannot affect the next
         try:
-            if file_path.lower().endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file_path)
-            elif file_path.lower().endswith('.csv'):
-                df = pd.read_csv(file_path, encoding='utf-8')
-            else:
-                return f"ERROR: Unsupported file format for Pandas Agent: {file_path}"
+            agent_executor, _profile = build_pandas_agent(file_path)
         except Exception as e:
             return f"ERROR loading data file {file_path}: {e}"
-        
-        # Configure the internal LLM for the Pandas Agent
-        llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0)
-
-        # Create the specialized Pandas DataFrame agent
-        agent_executor = create_pandas_dataframe_agent(
-            llm,
-            df,
-            # ZERO_SHOT_REACT_DESCRIPTION or tool-calling works well here
-            agent_type="zero-shot-react-description",
-            verbose=False, # Set to True for debugging the internal agent
-            allow_dangerous_code=True # IMPORTANT: Required to execute code for analysis
-        )
 
         # Execute the query against the Pandas Agent
         try:
@@ -0,0 +1,146 @@
+# tools/transcription.py
+
+import os
+import threading
+from typing import Any, Dict, Optional
+
+# openai-whisper: full-precision PyTorch (default, previous behaviour)
+# faster-whisper: CTranslate2 engine with int8 weights, several times faster on CPU
+TRANSCRIBE_BACKEND = os.getenv("TRANSCRIBE_BACKEND", "openai-whisper").lower()
+TRANSCRIBE_MODEL_SIZE = os.getenv("TRANSCRIBE_MODEL_SIZE", "base")
+# 0 = the engine's default (all cores for torch, 4 for CTranslate2)
+TRANSCRIBE_THREADS = int(os.getenv("TRANSCRIBE_THREADS", "0"))
+# 0 = the engine's default (greedy decoding for openai-whisper, 5 for faster-whisper)
+TRANSCRIBE_BEAM_SIZE = int(os.getenv("TRANSCRIBE_BEAM_SIZE", "0"))
+TRANSCRIBE_COMPUTE_TYPE = os.getenv("TRANSCRIBE_COMPUTE_TYPE", "int8")
+
+
+class TranscriptionBackend:
+    """
+    A speech-to-text engine. `load_model` returns an object with the
+    openai-whisper interface, `transcribe(audio, **options) -> {"text": ...}`,
+    so the model pool and the long-audio pipeline work with any backend.
+    """
+    name = ""
+    package = ""
+
+    def __init__(self, threads: int = TRANSCRIBE_THREADS, beam_size: int = TRANSCRIBE_BEAM_SIZE):
+        self.threads = threads
+        self.beam_size = beam_size
+
+    def available(self) -> bool:
+        try:
+            __import__(self.package)
+            return True
+        except ImportError:
+            return False
+
+    def load_model(self, model_size: str):
+        raise NotImplementedError
+
+    def options(self) -> Dict[str, Any]:
+        """Decoding options passed to every `transcribe` call."""
+        return {"beam_size": self.beam_size} if self.beam_size else {}
+
+    def describe(self) -> str:
+        return f"{self.name} (threads={self.threads or 'default'}, beam={self.beam_size or 'default'})"
+
+
+# --- 1. openai-whisper (PyTorch) ---
+class OpenAIWhisperBackend(TranscriptionBackend):
+    name = "openai-whisper"
+    package = "whisper"
+
+    def load_model(self, model_size: str):
+        import torch
+        import whisper
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        # whisper picks the device itself: CUDA when available, else CPU
+        return whisper.load_model(model_size)
+
+    def options(self) -> Dict[str, Any]:
+        try:
+            import torch
+            on_gpu = torch.cuda.is_available()
+        except ImportError:
+            on_gpu = False
+        if on_gpu:
+            return super().options()
+        # fp16 is not supported on CPU; saying so skips whisper's warning
+        return {"fp16": False, **super().options()}
+
+
+# --- 2. faster-whisper (CTranslate2, quantized) ---
+class _FasterWhisperModel:
+    """Adapts faster_whisper.WhisperModel to the openai-whisper `transcribe` interface."""
+    # Options of openai-whisper that have the same meaning in faster-whisper
+    PASSTHROUGH = ("beam_size", "language", "task", "temperature", "condition_on_previous_text",
+                   "initial_prompt", "word_timestamps", "no_speech_threshold")
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, **options) -> Dict[str, Any]:
+        kwargs = {k: v for k, v in options.items() if k in self.PASSTHROUGH}
+        segments, info = self.model.transcribe(audio, **kwargs)
+        # Segments are generated lazily: decoding happens while joining them
+        text = " ".join(segment.text.strip() for segment in segments)
+        return {"text": text.strip(), "language": info.language}
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    name = "faster-whisper"
+    package = "faster_whisper"
+
+    def __init__(self, threads: int = TRANSCRIBE_THREADS, beam_size: int = TRANSCRIBE_BEAM_SIZE,
+                 compute_type: str = TRANSCRIBE_COMPUTE_TYPE):
+        super().__init__(threads, beam_size)
+        self.compute_type = compute_type
+
+    def load_model(self, model_size: str):
+        from faster_whisper import WhisperModel
+        return _FasterWhisperModel(WhisperModel(model_size, device="cpu", compute_type=self.compute_type,
+                                                cpu_threads=self.threads))
+
+    def describe(self) -> str:
+        return (f"{self.name} (threads={self.threads or 'default'}, beam={self.beam_size or 'default'}, "
+                f"compute={self.compute_type})")
+
+
+BACKENDS = {backend.name: backend for backend in (OpenAIWhisperBackend, FasterWhisperBackend)}
+
+_default_backend: Optional[TranscriptionBackend] = None
+_backend_lock = threading.Lock()
+
+
+def make_backend(name: str = TRANSCRIBE_BACKEND, **settings) -> TranscriptionBackend:
+    """A backend instance by name ("openai-whisper" or "faster-whisper")."""
+    if name not in BACKENDS:
+        raise ValueError(f"TRANSCRIBE_BACKEND must be one of {sorted(BACKENDS)}, got '{name}'.")
+    return BACKENDS[name](**settings)
+
+
+def get_backend() -> TranscriptionBackend:
+    """The process-wide backend selected by TRANSCRIBE_BACKEND."""
+    global _default_backend
+    with _backend_lock:
+        if _default_backend is None:
+            _default_backend = make_backend()
+        return _default_backend
+
+
+def configure_backend(**settings) -> TranscriptionBackend:
+    """
+    Replaces the process-wide backend, e.g. with fewer threads inside a worker
+    process. Call it before the first transcription: pooled models are not reloaded.
+    """
+    global _default_backend
+    with _backend_lock:
+        current = _default_backend or make_backend()
+        name = settings.pop("name", current.name)
+        base = {"threads": current.threads, "beam_size": current.beam_size}
+        if name == FasterWhisperBackend.name:
+            base["compute_type"] = getattr(current, "compute_type", TRANSCRIBE_COMPUTE_TYPE)
+        _default_backend = make_backend(name, **{**base, **settings})
+        return _default_backend
@@ -0,0 +1,171 @@
+# tools/whisper_pool.py
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from agent_core.instrumentation import AGENT_VERBOSE
+
+# Approximate fp32 footprint (MB) of each Whisper checkpoint. Used to decide
+# evictions *before* loading a model; the real size replaces it once loaded
+# (int8 faster-whisper models are smaller, so the estimate stays conservative).
+MODEL_SIZE_ESTIMATES_MB = {
+    "tiny": 150, "tiny.en": 150,
+    "base": 290, "base.en": 290,
+    "small": 970, "small.en": 970,
+    "medium": 3060, "medium.en": 3060,
+    "large": 6170, "large-v1": 6170, "large-v2": 6170, "large-v3": 6170,
+    "turbo": 3240, "large-v3-turbo": 3240,
+}
+DEFAULT_MODEL_ESTIMATE_MB = 1000
+
+
+def _default_loader(model_size: str):
+    """Loads a checkpoint with the configured transcription backend (imported on first use)."""
+    from .transcription import get_backend
+    return get_backend().load_model(model_size)
+
+
+def _measure_model_mb(model) -> Optional[float]:
+    """Returns the parameter + buffer footprint of a torch model in MB."""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class _PoolEntry:
+    """A loaded model plus the lock that serializes inference on it."""
+    def __init__(self, model, size_mb: float):
+        self.model = model
+        self.size_mb = size_mb
+        # Whisper installs kv-cache hooks on the shared modules while decoding,
+        # so two transcriptions must never run on the same instance at once.
+        self.lock = threading.Lock()
+
+
+class WhisperModelPool:
+    """
+    Process-wide, thread-safe registry of loaded Whisper models.
+
+    Each model size is loaded at most once and kept in memory until the
+    total footprint exceeds `max_memory_mb`, at which point the least
+    recently used models are evicted. Loads and evictions are printed only
+    when `verbose` (default AGENT_VERBOSE).
+    """
+    def __init__(self, max_memory_mb: float = 4096, loader: Optional[Callable] = None, verbose: bool = AGENT_VERBOSE):
+        self.max_memory_mb = max_memory_mb
+        self.verbose = verbose
+        self._loader = loader or _default_loader
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    # --- Internal helpers ---
+    def _used_mb(self) -> float:
+        return sum(entry.size_mb for entry in self._entries.values())
+
+    def _evict_for(self, needed_mb: float) -> None:
+        """Drops LRU entries until `needed_mb` fits under the cap (lock held)."""
+        while self._entries and self._used_mb() + needed_mb > self.max_memory_mb:
+            evicted_size, _ = self._entries.popitem(last=False)
+            self.evictions += 1
+            if self.verbose:
+                print(f"♻️ Whisper pool: evicted '{evicted_size}' model (memory cap {self.max_memory_mb:.0f} MB).")
+
+    def _get_entry(self, model_size: str) -> _PoolEntry:
+        with self._lock:
+            entry = self._entries.get(model_size)
+            if entry is not None:
+                self._entries.move_to_end(model_size)
+                self.hits += 1
+                return entry
+            load_lock = self._loading.setdefault(model_size, threading.Lock())
+
+        # Load outside the registry lock so other sizes stay available; the
+        # per-size lock guarantees a single load when threads race.
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(model_size)
+                if entry is not None:
+                    self._entries.move_to_end(model_size)
+                    self.hits += 1
+                    return entry
+                estimate = MODEL_SIZE_ESTIMATES_MB.get(model_size, DEFAULT_MODEL_ESTIMATE_MB)
+                self._evict_for(estimate)
+
+            if self.verbose:
+                print(f"⏳ Whisper pool: loading '{model_size}' model...")
+            model = self._loader(model_size)
+            size_mb = _measure_model_mb(model) or estimate
+
+            with self._lock:
+                self._evict_for(size_mb)
+                entry = _PoolEntry(model, size_mb)
+                self._entries[model_size] = entry
+                self.loads += 1
+                self._loading.pop(model_size, None)
+            return entry
+
+    # --- Public API ---
+    def get_model(self, model_size: str = "base"):
+        """Returns the shared model for `model_size`, loading it on first use."""
+        return self._get_entry(model_size).model
+
+    @contextmanager
+    def lease(self, model_size: str = "base"):
+        """
+        Yields the shared model while holding its inference lock.
+        Use this for transcription so concurrent callers do not interleave.
+        """
+        entry = self._get_entry(model_size)
+        with entry.lock:
+            yield entry.model
+
+    def warm(self, model_sizes: Iterable[str]) -> None:
+        """Loads the given model sizes ahead of time (e.g. at startup)."""
+        for model_size in model_sizes:
+            model_size = model_size.strip()
+            if model_size:
+                self._get_entry(model_size)
+
+    def evict(self, model_size: str) -> bool:
+        """Removes a model from the pool. Returns True if it was loaded."""
+        with self._lock:
+            return self._entries.pop(model_size, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": list(self._entries.keys()),
+                "used_mb": round(self._used_mb(), 1),
+                "max_memory_mb": self.max_memory_mb,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+# --- Shared instance ---
+# WHISPER_POOL_MAX_MB caps the memory held by cached models.
+WHISPER_POOL = WhisperModelPool(max_memory_mb=float(os.getenv("WHISPER_POOL_MAX_MB", "4096")))
+
+
+def warm_whisper_models(model_sizes: Optional[str] = None) -> None:
+    """
+    Preloads the comma-separated sizes in `model_sizes` (defaults to the
+    WHISPER_WARM_MODELS environment variable). Does nothing when unset.
+    """
+    model_sizes = model_sizes if model_sizes is not None else os.getenv("WHISPER_WARM_MODELS", "")
+    if model_sizes.strip():
+        WHISPER_POOL.warm(model_sizes.split(","))